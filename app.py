@@ -1,3 +1,4 @@
+import os
 import chainlit as cl
 from dotenv import load_dotenv
 from interface.chainlit_handler import ChainlitHandler
@@ -8,10 +9,19 @@ load_dotenv()
 validate_api_keys()
 print("✓ Environment validation passed")
 
+if os.environ.get("USE_RAG", "true").lower() == "true":
+    # Precalentar el modelo de embeddings para que el primer estudiante no pague la carga de torch
+    from final.rag.embeddings import warmup_embedding_model
+    warmup_embedding_model()
+
 @cl.on_chat_start
 async def start():
     await ChainlitHandler.init_session()
 
+@cl.on_chat_end
+async def end():
+    await ChainlitHandler.end_session()
+
 @cl.on_message
 async def main(message: cl.Message):
     await ChainlitHandler.process_message(message)
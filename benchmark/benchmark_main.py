@@ -1,4 +1,5 @@
 import argparse
+import random
 import sys
 import os
 import time
@@ -14,7 +15,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from benchmark.core.simulated_student import SimulatedStudent, ExpertPersona, NovicePersona, LearnerPersona
 from benchmark.core.runner import BenchmarkRunner
+from benchmark.core.difficulty_estimator import DifficultyEstimator, MIN_TRAINING_EXAMPLES
+from benchmark.core.topic_labeler import LABELING_MODES
 from benchmark.reporting.data_serializer import BenchmarkDataSerializer
+from final.llm_cache import LLM_CACHE_MODES, get_llm_cache
+from final.rate_limiter import get_rate_limiter_stats
 
 
 def parse_arguments():
@@ -22,8 +27,23 @@ def parse_arguments():
     parser.add_argument("--persona", type=str, choices=["expert", "novice", "learner"], required=True, 
                        help="Simulated student persona")
     parser.add_argument("--turns", type=int, default=10, help="Number of turns to simulate")
-    parser.add_argument("--sleep", type=float, default=0, 
-                       help="Sleep duration between turns in seconds (default: 0)")
+    parser.add_argument("--rpm", type=float, default=None,
+                       help="Requests per minute allowed per LLM provider "
+                            "(default: LLM_REQUESTS_PER_MINUTE or only the provider's own limits)")
+    parser.add_argument("--tpm", type=float, default=None,
+                       help="Tokens per minute allowed per LLM provider "
+                            "(default: LLM_TOKENS_PER_MINUTE or only the provider's own limits)")
+    parser.add_argument("--llm-cache", type=str, choices=LLM_CACHE_MODES, default=None,
+                       help="LLM response cache: record (call and store), replay (offline, cached only) "
+                            "or off (default: LLM_CACHE_MODE or off)")
+    parser.add_argument("--local-difficulty", action="store_true",
+                       help="Score difficulty with a local estimator trained on previous reports; "
+                            "only low-confidence questions go to the LLM judge")
+    parser.add_argument("--topic-labeling", type=str, choices=LABELING_MODES, default="llm",
+                       help="Subtopic labeling: llm (one call per turn), vector (embeddings only) "
+                            "or hybrid (embeddings, LLM only to break ties)")
+    parser.add_argument("--seed", type=int, default=None,
+                       help="Random seed (option shuffling); use the same seed to replay a recorded run")
     return parser.parse_args()
 
 
@@ -54,15 +74,47 @@ def create_persona_from_name(persona_name):
     return persona_map[persona_name]()
 
 
-def execute_benchmark(persona, turns, sleep_duration) -> dict:
+def load_difficulty_estimator():
+    """Train the local difficulty estimator on previous reports and print its agreement with the LLM judge."""
+    estimator, report = DifficultyEstimator.from_reports()
+    if estimator is None:
+        print(f"Local difficulty disabled: {report['examples']} judged questions in reports "
+              f"(need {MIN_TRAINING_EXAMPLES})")
+        return None, report
+
+    print(f"Local difficulty estimator trained on {report['examples']} questions: "
+          f"{report['coverage']:.0%} confident, agreement with LLM judge on those "
+          f"{report['exact']} exact / {report['within_one']} within one point")
+    return estimator, report
+
+
+def execute_benchmark(persona, turns, local_difficulty=False, topic_labeling="llm") -> dict:
     student = SimulatedStudent(persona)
-    runner = BenchmarkRunner(student, turns=turns, sleep_duration=sleep_duration)
+    estimator, report = load_difficulty_estimator() if local_difficulty else (None, None)
+    runner = BenchmarkRunner(
+        student,
+        turns=turns,
+        difficulty_estimator=estimator,
+        estimator_report=report,
+        topic_labeling=topic_labeling
+    )
     return runner.run()
 
 
 def main():
     args = parse_arguments()
 
+    if args.llm_cache:
+        os.environ["LLM_CACHE_MODE"] = args.llm_cache
+    if args.seed is not None:
+        random.seed(args.seed)
+        # Each seed records (and replays) its own LLM samples
+        os.environ["LLM_CACHE_NAMESPACE"] = f"seed{args.seed}"
+    if args.rpm is not None:
+        os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    if args.tpm is not None:
+        os.environ["LLM_TOKENS_PER_MINUTE"] = str(args.tpm)
+
     output_dir = create_benchmark_output_directory()
 
     benchmark_dir = os.path.dirname(os.path.abspath(__file__))
@@ -71,7 +123,7 @@ def main():
     print(f"Initializing benchmark for {args.persona} with {args.turns} turns...")
     
     persona = create_persona_from_name(args.persona)
-    raw_data = execute_benchmark(persona, args.turns, args.sleep)
+    raw_data = execute_benchmark(persona, args.turns, args.local_difficulty, args.topic_labeling)
 
     data_path = save_benchmark_data(raw_data, output_dir)
     print(f"\nBenchmark data saved to {data_path}")
@@ -84,6 +136,16 @@ def main():
         print(f"Max generation time: {metadata['max_generation_time_seconds']}s")
         print(f"Total generation time: {metadata['total_generation_time_seconds']}s")
 
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        stats = llm_cache.get_stats()
+        print(f"\nLLM cache ({stats['mode']}): {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['size']} stored responses")
+
+    for provider, stats in get_rate_limiter_stats().items():
+        print(f"\nRate limiter ({provider}): {stats['requests']} requests, {stats['tokens']} tokens, "
+              f"{stats['rate_limited']} rate-limited responses, {stats['waited_seconds']}s waiting")
+
     print(f"\nTo generate report, run: python generate_report.py {data_path}")
 
 if __name__ == "__main__":
@@ -0,0 +1,218 @@
+import glob
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+DEFAULT_REPORTS_GLOB = os.path.join(os.path.dirname(__file__), "..", "reports", "*", "data.json")
+
+# Below this many judged questions the estimator is not trusted at all
+MIN_TRAINING_EXAMPLES = 30
+
+
+class DifficultyEstimate(NamedTuple):
+    score: int
+    raw: float
+    confident: bool
+
+
+def load_training_examples(pattern: str = DEFAULT_REPORTS_GLOB) -> List[Tuple[str, List[str], int]]:
+    """
+    Collects (question, options, difficulty) from benchmark data.json files.
+
+    Only scores given by the LLM judge are used, so the estimator never
+    learns from its own predictions.
+    """
+    examples = []
+    seen = set()
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                results = json.load(f).get('results', [])
+        except (OSError, json.JSONDecodeError):
+            continue
+
+        for result in results:
+            question = result.get('question')
+            options = result.get('options')
+            score = result.get('difficulty_score')
+            if not question or not options or score is None:
+                continue
+            if result.get('difficulty_source', 'llm') != 'llm' or question in seen:
+                continue
+            seen.add(question)
+            examples.append((question, list(options), int(score)))
+    return examples
+
+
+class DifficultyEstimator:
+    """
+    Local 1-5 difficulty regressor for benchmark questions.
+
+    Features are the question embedding, the mean option embedding and how
+    close the options are to each other and to the question (close
+    distractors make a question harder). A ridge regressor gives the score;
+    a similarity-weighted k-nearest-neighbour estimate over the training
+    questions acts as a second opinion. A prediction is confident only when
+    the question is close to the training data and both estimates agree,
+    otherwise the caller should ask the LLM judge.
+    """
+
+    def __init__(
+        self,
+        embedding_model=None,
+        ridge_alpha: float = 1.0,
+        k: int = 5,
+        min_similarity: float = 0.6,
+        max_disagreement: float = 0.5
+    ):
+        """
+        Args:
+            embedding_model: Object with embed_documents (default: final.rag EmbeddingModel)
+            ridge_alpha: L2 regularization of the regressor
+            k: Neighbours for the second opinion
+            min_similarity: Minimum cosine similarity to a training question to be confident
+            max_disagreement: Maximum gap between regressor and neighbours to be confident
+        """
+        if embedding_model is None:
+            from final.rag.embeddings import EmbeddingModel
+            embedding_model = EmbeddingModel()
+
+        self.embedding_model = embedding_model
+        self.ridge_alpha = ridge_alpha
+        self.k = k
+        self.min_similarity = min_similarity
+        self.max_disagreement = max_disagreement
+        self._weights: Optional[np.ndarray] = None
+        self._train_vectors: Optional[np.ndarray] = None
+        self._train_scores: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self._weights is not None
+
+    def _features(self, questions: List[str], options_lists: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (feature matrix, normalized question embeddings) in one encoder pass."""
+        texts = list(questions)
+        for options in options_lists:
+            texts.extend(options)
+
+        embeddings = self.embedding_model.embed_documents(texts)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1.0, norms)
+
+        n = len(questions)
+        question_vectors = embeddings[:n]
+        rows = []
+        offset = n
+        for i, options in enumerate(options_lists):
+            option_vectors = embeddings[offset:offset + len(options)]
+            offset += len(options)
+
+            similarities = option_vectors @ option_vectors.T
+            pairs = len(options) * (len(options) - 1)
+            option_spread = (similarities.sum() - np.trace(similarities)) / pairs if pairs else 0.0
+            question_option_similarity = float((option_vectors @ question_vectors[i]).mean())
+
+            rows.append(np.concatenate([
+                question_vectors[i],
+                option_vectors.mean(axis=0),
+                [option_spread, question_option_similarity, 1.0]
+            ]))
+
+        return np.asarray(rows, dtype=np.float64), question_vectors
+
+    def _fit_arrays(self, features: np.ndarray, question_vectors: np.ndarray, scores: np.ndarray):
+        regularization = self.ridge_alpha * np.eye(features.shape[1])
+        regularization[-1, -1] = 0.0  # the bias term is not penalized
+        self._weights = np.linalg.solve(features.T @ features + regularization, features.T @ scores)
+        self._train_vectors = question_vectors
+        self._train_scores = scores
+
+    def _predict(self, features: np.ndarray, question_vectors: np.ndarray) -> List[DifficultyEstimate]:
+        raw_scores = features @ self._weights
+        similarities = question_vectors @ self._train_vectors.T
+        k = min(self.k, similarities.shape[1])
+
+        estimates = []
+        for raw, row in zip(raw_scores, similarities):
+            neighbours = np.argpartition(-row, k - 1)[:k]
+            weights = np.clip(row[neighbours], 1e-6, None)
+            neighbour_score = float(weights @ self._train_scores[neighbours] / weights.sum())
+
+            confident = (
+                row[neighbours].max() >= self.min_similarity
+                and abs(raw - neighbour_score) <= self.max_disagreement
+            )
+            estimates.append(DifficultyEstimate(int(np.clip(np.rint(raw), 1, 5)), float(raw), bool(confident)))
+        return estimates
+
+    def estimate(self, question: str, options: List[str]) -> DifficultyEstimate:
+        """
+        Estimates the difficulty of one question.
+
+        Returns:
+            DifficultyEstimate (score 1-5, raw regressor output, confident)
+        """
+        if not self.is_trained:
+            raise RuntimeError("DifficultyEstimator is not trained")
+        features, question_vectors = self._features([question], [options])
+        return self._predict(features, question_vectors)[0]
+
+    def fit(self, examples: List[Tuple[str, List[str], int]], folds: int = 5, seed: int = 0) -> Dict:
+        """
+        Trains the regressor on every example, first measuring agreement with
+        the LLM judge on held-out folds (one encoder pass for both).
+
+        Args:
+            examples: (question, options, difficulty) tuples judged by the LLM
+            folds: Cross-validation folds (0 skips the agreement report)
+
+        Returns:
+            Dict with examples, coverage (share of confident predictions),
+            exact and within_one agreement on confident predictions, and
+            exact_all over every prediction
+        """
+        features, question_vectors = self._features([e[0] for e in examples], [e[1] for e in examples])
+        scores = np.array([e[2] for e in examples], dtype=np.float64)
+        report = {"examples": len(examples)}
+
+        if folds > 1:
+            order = np.random.default_rng(seed).permutation(len(examples))
+            confident = exact = within_one = exact_all = 0
+            for fold in np.array_split(order, folds):
+                train = np.setdiff1d(order, fold)
+                self._fit_arrays(features[train], question_vectors[train], scores[train])
+                for estimate, truth in zip(self._predict(features[fold], question_vectors[fold]), scores[fold]):
+                    exact_all += int(estimate.score == truth)
+                    if estimate.confident:
+                        confident += 1
+                        exact += int(estimate.score == truth)
+                        within_one += int(abs(estimate.score - truth) <= 1)
+
+            report.update({
+                "coverage": round(confident / len(examples), 3),
+                "exact": round(exact / confident, 3) if confident else None,
+                "within_one": round(within_one / confident, 3) if confident else None,
+                "exact_all": round(exact_all / len(examples), 3)
+            })
+
+        self._fit_arrays(features, question_vectors, scores)
+        return report
+
+    @classmethod
+    def from_reports(cls, pattern: str = DEFAULT_REPORTS_GLOB, **kwargs) -> Tuple[Optional["DifficultyEstimator"], Dict]:
+        """
+        Trains an estimator on every judged question in the benchmark reports.
+
+        Returns:
+            (estimator, cross-validation report); the estimator is None when
+            there are fewer than MIN_TRAINING_EXAMPLES questions
+        """
+        examples = load_training_examples(pattern)
+        if len(examples) < MIN_TRAINING_EXAMPLES:
+            return None, {"examples": len(examples)}
+
+        estimator = cls(**kwargs)
+        report = estimator.fit(examples)
+        return estimator, report
@@ -1,19 +1,41 @@
-from typing import List
+from typing import List, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
-from final.agents import create_model
+from final.agents import get_model
+from benchmark.core.difficulty_estimator import DifficultyEstimator
 import re
 
 class BenchmarkEvaluator:
-    def __init__(self):
-        self.llm = create_model()
+    def __init__(self, estimator: Optional[DifficultyEstimator] = None):
+        """
+        Args:
+            estimator: Trained local estimator; confident estimates skip the LLM judge
+        """
+        self.llm = get_model()
+        self.estimator = estimator
+        self.last_source = "llm"
+        self.stats = {"local": 0, "llm": 0}
 
     def evaluate_difficulty(self, question: str, options: List[str]) -> int:
         """
         Evaluates the difficulty of a question on a scale of 1-5.
         1 = Very Easy
         5 = Very Hard
+
+        Uses the local estimator when it is confident and the LLM judge
+        otherwise; last_source records which one answered.
         """
-        
+        if self.estimator is not None:
+            estimate = self.estimator.estimate(question, options)
+            if estimate.confident:
+                self.last_source = "local"
+                self.stats["local"] += 1
+                return estimate.score
+
+        self.last_source = "llm"
+        self.stats["llm"] += 1
+        return self._evaluate_difficulty_llm(question, options)
+
+    def _evaluate_difficulty_llm(self, question: str, options: List[str]) -> int:
         system_prompt = """You are an objective educational expert. 
 Your task is to analyze a multiple-choice question and assign it a difficulty score from 1 to 5.
 
@@ -0,0 +1,170 @@
+import contextlib
+import multiprocessing
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from typing import Dict, List, NamedTuple, Optional
+from tqdm import tqdm
+
+from final.rate_limiter import install_rate_limiters, share_rate_limiters
+
+PERSONAS = ("expert", "novice", "learner")
+
+# Environment overrides per configuration. They are applied in the run's own
+# process before the agents are imported (final.agents reads USE_RAG at import).
+CONFIGURATIONS = {
+    "rag": {"USE_RAG": "true"},
+    "no_rag": {"USE_RAG": "false"},
+}
+
+
+class MatrixRun(NamedTuple):
+    persona: str
+    config: str
+    seed: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.persona}-{self.config}-seed{self.seed}"
+
+
+def build_matrix(personas: List[str], configs: List[str], seeds: List[int]) -> List[MatrixRun]:
+    """Every persona x configuration x seed combination."""
+    return [MatrixRun(persona, config, seed) for persona, config, seed in product(personas, configs, seeds)]
+
+
+def _init_worker(rate_limiters: Dict):
+    install_rate_limiters(rate_limiters)
+
+
+def _run_metrics(data: Dict) -> Dict:
+    """Headline metrics of one run (same definitions as the per-run report)."""
+    from benchmark.generate_report import reconstruct_persona, compute_adaptivity_metrics, compute_coverage_metrics
+    from benchmark.metrics.score_calculator import FinalScoreCalculator
+
+    results = data.get('results', [])
+    if not results:
+        return {}
+
+    persona = reconstruct_persona(data['metadata'])
+    adaptivity = compute_adaptivity_metrics(results, persona)
+    coverage = compute_coverage_metrics(results)
+    final_score = FinalScoreCalculator().calculate_final_score(
+        coverage.calculate_effective_coverage(),
+        coverage.calculate_remediation_efficiency(),
+        adaptivity.weighted_proficiency(),
+        adaptivity.error_sensitivity()
+    )
+
+    return {
+        'accuracy': round(sum(1 for r in results if r['is_correct']) / len(results), 3),
+        'average_difficulty': round(sum(r['difficulty_score'] for r in results) / len(results), 2),
+        'true_level': persona.true_level,
+        'calibration_offset': adaptivity.calibration_offset(),
+        'ema_convergence_error': adaptivity.ema_convergence_error(),
+        'error_sensitivity': adaptivity.error_sensitivity(),
+        'effective_coverage': round(coverage.calculate_effective_coverage(), 3),
+        'final_score': final_score
+    }
+
+
+def execute_run(run: MatrixRun, output_dir: str, turns: int, local_difficulty: bool, topic_labeling: str) -> Dict:
+    """
+    Runs one benchmark in the current (fresh) worker process.
+
+    Writes data.json, report.md and run.log to output_dir/<run name>/ and
+    returns the run's summary row.
+    """
+    run_dir = os.path.join(output_dir, run.name)
+    os.makedirs(run_dir, exist_ok=True)
+
+    os.environ.update(CONFIGURATIONS[run.config])
+    benchmark_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.environ["CONTENT_PATH"] = os.path.join(benchmark_dir, "content", "SD-Com.txt")
+    # Seeds of the same persona/config must not share cached LLM samples
+    os.environ["LLM_CACHE_NAMESPACE"] = f"seed{run.seed}"
+    random.seed(run.seed)
+
+    row = {'run': run.name, 'persona': run.persona, 'config': run.config, 'seed': run.seed, 'turns_planned': turns}
+    start = time.time()
+
+    with open(os.path.join(run_dir, "run.log"), 'w', encoding='utf-8') as log, \
+         contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            # Imported here so the configuration above is in place when the agents load
+            from benchmark.benchmark_main import create_persona_from_name, execute_benchmark, save_benchmark_data
+            from benchmark.generate_report import generate_report_from_data, save_report
+
+            data = execute_benchmark(
+                create_persona_from_name(run.persona), turns,
+                local_difficulty=local_difficulty, topic_labeling=topic_labeling
+            )
+            data['metadata'].update({'config': run.config, 'seed': run.seed})
+            row['data_path'] = save_benchmark_data(data, run_dir)
+            row['turns_completed'] = data['metadata']['turns_completed']
+
+            if data['results']:
+                save_report(generate_report_from_data(data), os.path.join(run_dir, "report.md"))
+            row.update(_run_metrics(data))
+        except Exception as e:
+            traceback.print_exc()
+            row['error'] = f"{type(e).__name__}: {e}"
+
+    row['wall_seconds'] = round(time.time() - start, 1)
+    return row
+
+
+class MatrixRunner:
+    """
+    Runs a persona x configuration x seed matrix of benchmarks in parallel.
+
+    Each run gets a fresh spawned process (the benchmark patches module
+    globals and the agents read their configuration at import), and every
+    process goes through the same shared per-provider rate limiter, so limits
+    and Retry-After pauses apply to the whole matrix.
+    """
+
+    def __init__(
+        self,
+        runs: List[MatrixRun],
+        output_dir: str,
+        turns: int = 10,
+        workers: Optional[int] = None,
+        local_difficulty: bool = False,
+        topic_labeling: str = "llm"
+    ):
+        self.runs = runs
+        self.output_dir = output_dir
+        self.turns = turns
+        self.workers = workers or min(len(runs), os.cpu_count() or 1)
+        self.local_difficulty = local_difficulty
+        self.topic_labeling = topic_labeling
+
+    def run(self) -> List[Dict]:
+        """Runs every benchmark and returns their summary rows in matrix order."""
+        rate_limiters = share_rate_limiters()
+        rows = {}
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(rate_limiters,),
+            max_tasks_per_child=1
+        ) as pool:
+            futures = {
+                pool.submit(
+                    execute_run, run, self.output_dir, self.turns, self.local_difficulty, self.topic_labeling
+                ): run
+                for run in self.runs
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Runs", unit="run", ncols=80):
+                row = future.result()
+                rows[row['run']] = row
+                status = f"failed ({row['error']})" if 'error' in row else f"score {row.get('final_score', '-')}"
+                tqdm.write(f"✔ {row['run']}: {status} in {row['wall_seconds']}s")
+
+        return [rows[run.name] for run in self.runs]
@@ -1,12 +1,12 @@
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from unittest.mock import MagicMock, patch
-from tqdm import tqdm
 
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage
 
 from final.models import AgentState
+from services.service import FeedbackMemo
 from final.nodes import (
     question_creator_node,
     difficulty_reviewer_node,
@@ -20,15 +20,23 @@ from final.nodes import (
 )
 from benchmark.core.simulated_student import SimulatedStudent
 from benchmark.core.evaluator import BenchmarkEvaluator
+from benchmark.core.difficulty_estimator import DifficultyEstimator
 from benchmark.core.topic_labeler import TopicLabeler
 
 class BenchmarkRunner:
-    def __init__(self, student: SimulatedStudent, turns: int = 10, sleep_duration: float = 0):
+    def __init__(
+        self,
+        student: SimulatedStudent,
+        turns: int = 10,
+        difficulty_estimator: Optional[DifficultyEstimator] = None,
+        estimator_report: Optional[Dict] = None,
+        topic_labeling: str = "llm"
+    ):
         self.student = student
         self.turns = turns
-        self.sleep_duration = sleep_duration
-        self.evaluator = BenchmarkEvaluator()
-        self.topic_labeler = TopicLabeler()
+        self.evaluator = BenchmarkEvaluator(estimator=difficulty_estimator)
+        self.estimator_report = estimator_report
+        self.topic_labeler = TopicLabeler(mode=topic_labeling)
         self.results: List[Dict[str, Any]] = []
         
         # We need a custom graph for benchmarking that mimics the real one
@@ -109,7 +117,8 @@ class BenchmarkRunner:
 
         with patch('final.nodes.get_service') as mock_get_service, \
              patch('final.nodes.get_open_service') as mock_get_open_service, \
-             patch('final.nodes.get_unified_perf_service') as mock_get_unified_perf:
+             patch('final.nodes.get_unified_perf_service') as mock_get_unified_perf, \
+             patch('final.nodes.get_feedback_memo', return_value=FeedbackMemo()):
             mock_service = MagicMock()
             mock_get_service.return_value = mock_service
             mock_get_open_service.return_value = MagicMock()
@@ -156,17 +165,15 @@ class BenchmarkRunner:
 
             if turn_result:
                 history.append({
+                    'question': turn_result['question'],
+                    'user_answer': turn_result['student_answer'],
+                    'correct_answer': turn_result['correct_answer'],
                     'is_correct': turn_result['is_correct'],
                     'answered_at': time.time()
                 })
                 self.results.append(turn_result)
             
-            next_state = self._get_next_turn_state()
-            
-            if self.sleep_duration > 0 and turn < self.turns:
-                self._sleep_with_progress(turn)
-                
-            return next_state, True
+            return self._get_next_turn_state(), True
             
         except Exception as e:
             print(f"Error in turn {turn}: {e}")
@@ -216,6 +223,7 @@ class BenchmarkRunner:
             "question": question,
             "options": options,
             "difficulty_score": difficulty_score,
+            "difficulty_source": self.evaluator.last_source,
             "subtopics": subtopic_ids,
             "is_correct": is_correct,
             "student_answer": student_answer_letter,
@@ -239,6 +247,9 @@ class BenchmarkRunner:
         }
 
         mock_service.get_last_question_id.return_value = "mock_id"
+        # The Feedback Agent memo is keyed on the history version and describes the latest answer
+        mock_service.get_answer_history.return_value = history
+        mock_unified_perf_service.history_version.return_value = (total, 0)
 
         recent_performance_formatted = [
             {'type': 'mcq', 'is_correct': h['is_correct']}
@@ -257,14 +268,16 @@ class BenchmarkRunner:
             'recent_overall_performance': recent_performance_formatted
         }
 
-    def _sleep_with_progress(self, current_turn: int):
-        """Sleep between turns with progress indicator."""
-        print(f"\n⏳ Rate limit protection: Waiting {self.sleep_duration}s before next turn...")
-        
-        for _ in tqdm(range(int(self.sleep_duration * 10)), desc="Sleeping", unit="0.1s", ncols=80):
-            time.sleep(0.1)
-        
-        print()
+    def _difficulty_metadata(self) -> Dict:
+        if self.evaluator.estimator is None:
+            return {}
+        return {
+            'difficulty_estimator': {
+                'local_evaluations': self.evaluator.stats['local'],
+                'llm_evaluations': self.evaluator.stats['llm'],
+                'cross_validation': self.estimator_report
+            }
+        }
 
     def _prepare_raw_results(self) -> Dict:
         """Prepare raw results for serialization."""
@@ -285,7 +298,9 @@ class BenchmarkRunner:
                 'turns_planned': self.turns,
                 'turns_completed': len(self.results),
                 'persona_type': self.student.persona.__class__.__name__,
-                **timing_stats
+                'topic_labeling': self.topic_labeler.mode,
+                **timing_stats,
+                **self._difficulty_metadata()
             },
             'persona_config': {
                 'true_level': self.student.persona.true_level,
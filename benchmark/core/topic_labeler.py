@@ -1,9 +1,17 @@
 import json
 import os
 import re
-from typing import List
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from langchain_core.messages import HumanMessage, SystemMessage
-from final.agents import create_model
+from final.agents import get_model
+
+LABELING_MODES = ("llm", "vector", "hybrid")
+
+# Normalized subtopic matrices per (embedding model, subtopic list); computed once per process
+_subtopic_matrices: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+_subtopic_matrices_lock = threading.Lock()
 
 
 class SubtopicLoader:
@@ -22,18 +30,122 @@ class SubtopicLoader:
             return json.load(f)
 
 
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def get_subtopic_matrix(embedding_model, subtopics: List[str]) -> np.ndarray:
+    """
+    Returns the (len(subtopics), dimension) matrix of normalized subtopic
+    embeddings, encoding the subtopics only the first time.
+    """
+    key = (getattr(embedding_model, "model_name", type(embedding_model).__name__), tuple(subtopics))
+    matrix = _subtopic_matrices.get(key)
+    if matrix is not None:
+        return matrix
+
+    with _subtopic_matrices_lock:
+        matrix = _subtopic_matrices.get(key)
+        if matrix is None:
+            matrix = np.ascontiguousarray(
+                _normalize_rows(embedding_model.embed_documents(list(subtopics))), dtype=np.float32
+            )
+            matrix.flags.writeable = False
+            _subtopic_matrices[key] = matrix
+        return matrix
+
+
 class TopicLabeler:
-    """Labels questions with relevant subtopic IDs using LLM."""
+    """
+    Labels questions with relevant subtopic IDs.
+
+    Modes:
+        llm: The LLM picks from the full subtopic list (one call per question)
+        vector: Cosine similarity between the question and the cached subtopic
+            embeddings; the top 2 above the threshold are kept (no LLM calls,
+            deterministic)
+        hybrid: Like vector, but when the leading candidates are within
+            tie_margin of each other the LLM chooses among them only
+    """
     
-    def __init__(self):
-        self.llm = create_model()
+    def __init__(
+        self,
+        mode: str = "llm",
+        embedding_model=None,
+        threshold: float = 0.35,
+        tie_margin: float = 0.03
+    ):
+        """
+        Args:
+            mode: "llm", "vector" or "hybrid"
+            embedding_model: Object with embed_documents/embed_query (default: final.rag EmbeddingModel)
+            threshold: Minimum cosine similarity for a subtopic to be labeled (vector/hybrid)
+            tie_margin: Similarity gap under which candidates are considered tied (hybrid)
+        """
+        if mode not in LABELING_MODES:
+            raise ValueError(f"Invalid labeling mode: {mode}. Options: {', '.join(LABELING_MODES)}")
+
+        self.mode = mode
+        self.threshold = threshold
+        self.tie_margin = tie_margin
         self.subtopics = SubtopicLoader().load_subtopics()
+        self.llm = get_model() if mode != "vector" else None
+
+        self.embedding_model = None
+        self.subtopic_matrix: Optional[np.ndarray] = None
+        if mode != "llm":
+            if embedding_model is None:
+                from final.rag.embeddings import EmbeddingModel
+                embedding_model = EmbeddingModel()
+            self.embedding_model = embedding_model
+            self.subtopic_matrix = get_subtopic_matrix(embedding_model, self.subtopics)
     
     def label_question(self, question: str, options: List[str]) -> List[int]:
         """Returns list of subtopic indices (0-based) covered in question."""
-        prompt = self._build_labeling_prompt(question, options)
+        if self.mode == "llm":
+            prompt = self._build_labeling_prompt(question, options)
+            response = self._invoke_llm(prompt)
+            return self._parse_subtopic_indices(response)
+
+        scores = self.score_subtopics(question)
+        ranked = np.argsort(-scores)
+        candidates = [int(i) for i in ranked[:3] if scores[i] >= self.threshold]
+
+        if self.mode == "hybrid" and len(candidates) > 1 and self._is_tied(scores, candidates):
+            return self._break_tie(question, options, candidates)
+        return sorted(candidates[:2])
+
+    def score_subtopics(self, question: str) -> np.ndarray:
+        """Cosine similarity of the question to every subtopic (one matrix-vector product)."""
+        query = _normalize_rows(np.asarray(self.embedding_model.embed_query(question), dtype=np.float32))
+        return self.subtopic_matrix @ query
+
+    def _is_tied(self, scores: np.ndarray, candidates: List[int]) -> bool:
+        # Ambiguous when the first choice barely beats the second, or the second barely beats the third
+        gaps = [scores[a] - scores[b] for a, b in zip(candidates, candidates[1:])]
+        return any(gap <= self.tie_margin for gap in gaps)
+
+    def _break_tie(self, question: str, options: List[str], candidates: List[int]) -> List[int]:
+        formatted_candidates = "\n".join(f"{i}. {self.subtopics[i]}" for i in candidates)
+        formatted_options = "\n".join([f"{chr(65+i)}) {opt}" for i, opt in enumerate(options)])
+        prompt = f"""These subtopics are similarly related to the question below:
+
+{formatted_candidates}
+
+Question: {question}
+
+Options:
+{formatted_options}
+
+Return ONLY a comma-separated list with the indices of the subtopics (at most 2, most relevant first) that are necessary to answer the question correctly.
+Ignore concepts that appear only in the background text or in incorrect options.
+
+Response:"""
         response = self._invoke_llm(prompt)
-        return self._parse_subtopic_indices(response)
+        chosen = [i for i in dict.fromkeys(int(n) for n in re.findall(r'\d+', response)) if i in candidates]
+        # An unusable answer keeps the vector ranking
+        return sorted(chosen[:2]) if chosen else sorted(candidates[:2])
     
     def _build_labeling_prompt(self, question: str, options: List[str]) -> str:
         subtopics_list = self._format_subtopics_for_prompt()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import sys
+import os
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.core.matrix_runner import CONFIGURATIONS, PERSONAS, MatrixRunner, build_matrix
+from benchmark.core.topic_labeler import LABELING_MODES
+from benchmark.reporting.matrix_summary import MatrixSummaryGenerator
+from final.llm_cache import LLM_CACHE_MODES
+from final.rate_limiter import get_rate_limiter_stats
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run a matrix of Adaptive AI benchmarks in parallel")
+    parser.add_argument("--personas", nargs="+", choices=PERSONAS, default=list(PERSONAS),
+                       help="Simulated student personas (default: all)")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGURATIONS), default=list(CONFIGURATIONS),
+                       help="Configurations to compare (default: all)")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0],
+                       help="Random seeds; each persona/config pair runs once per seed")
+    parser.add_argument("--turns", type=int, default=10, help="Number of turns per run")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Parallel runs (default: number of runs, capped at CPU count)")
+    parser.add_argument("--rpm", type=float, default=None,
+                       help="Requests per minute allowed per LLM provider across all workers "
+                            "(default: LLM_REQUESTS_PER_MINUTE or only the provider's own limits)")
+    parser.add_argument("--tpm", type=float, default=None,
+                       help="Tokens per minute allowed per LLM provider across all workers "
+                            "(default: LLM_TOKENS_PER_MINUTE or only the provider's own limits)")
+    parser.add_argument("--llm-cache", type=str, choices=LLM_CACHE_MODES, default=None,
+                       help="LLM response cache mode for every run (default: LLM_CACHE_MODE or off)")
+    parser.add_argument("--local-difficulty", action="store_true",
+                       help="Score difficulty with the local estimator (see benchmark_main)")
+    parser.add_argument("--topic-labeling", type=str, choices=LABELING_MODES, default="llm",
+                       help="Subtopic labeling mode (see benchmark_main)")
+    return parser.parse_args()
+
+
+def create_matrix_output_directory():
+    """Create timestamped directory for the matrix output."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+    output_dir = os.path.join(benchmark_dir, "reports", f"matrix_{timestamp}")
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def save_summary(summary: dict, output_dir: str) -> str:
+    """Save the combined summary as summary.json and summary.md."""
+    with open(os.path.join(output_dir, "summary.json"), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    summary_path = os.path.join(output_dir, "summary.md")
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(MatrixSummaryGenerator().generate_markdown(summary))
+    return summary_path
+
+
+def main():
+    args = parse_arguments()
+
+    # Workers inherit the environment
+    if args.llm_cache:
+        os.environ["LLM_CACHE_MODE"] = args.llm_cache
+    if args.rpm is not None:
+        os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    if args.tpm is not None:
+        os.environ["LLM_TOKENS_PER_MINUTE"] = str(args.tpm)
+
+    runs = build_matrix(args.personas, args.configs, args.seeds)
+    output_dir = create_matrix_output_directory()
+    runner = MatrixRunner(
+        runs,
+        output_dir,
+        turns=args.turns,
+        workers=args.workers,
+        local_difficulty=args.local_difficulty,
+        topic_labeling=args.topic_labeling
+    )
+
+    print(f"Running {len(runs)} benchmarks ({args.turns} turns each) with {runner.workers} workers...")
+    start = time.time()
+    rows = runner.run()
+
+    summary = MatrixSummaryGenerator().build_summary(rows, {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'turns': args.turns,
+        'seeds': args.seeds,
+        'workers': runner.workers,
+        'requests_per_minute': os.environ.get("LLM_REQUESTS_PER_MINUTE"),
+        'tokens_per_minute': os.environ.get("LLM_TOKENS_PER_MINUTE"),
+        # Shared limiters: requests, tokens, 429s and waiting time summed over all runs
+        'rate_limiter': get_rate_limiter_stats(),
+        'local_difficulty': args.local_difficulty,
+        'topic_labeling': args.topic_labeling,
+        'wall_seconds': round(time.time() - start, 1)
+    })
+    summary_path = save_summary(summary, output_dir)
+
+    failed = [row['run'] for row in rows if 'error' in row]
+    print(f"\nMatrix finished in {summary['metadata']['wall_seconds']}s; summary saved to {summary_path}")
+    if failed:
+        print(f"Failed runs (see run.log in their directories): {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import statistics
+import time
+from typing import Any, Dict, List
+
+
+class MatrixSummaryGenerator:
+    """Aggregates the runs of a benchmark matrix by persona and configuration."""
+
+    METRICS = ('final_score', 'accuracy', 'average_difficulty', 'calibration_offset', 'effective_coverage')
+
+    def build_summary(self, rows: List[Dict[str, Any]], metadata: Dict) -> Dict:
+        """
+        Build the combined summary.
+
+        Args:
+            rows: Summary row of every run (see matrix_runner.execute_run)
+            metadata: Matrix settings (turns, seeds, workers, wall time...)
+
+        Returns:
+            Dictionary with metadata, one group per (persona, config) with
+            mean and standard deviation of each metric across seeds, and the runs
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault((row['persona'], row['config']), []).append(row)
+
+        return {
+            'metadata': metadata,
+            'groups': [self._aggregate(persona, config, group) for (persona, config), group in groups.items()],
+            'runs': rows
+        }
+
+    def _aggregate(self, persona: str, config: str, rows: List[Dict[str, Any]]) -> Dict:
+        completed = [r for r in rows if 'error' not in r and r.get('turns_completed')]
+        group = {
+            'persona': persona,
+            'config': config,
+            'runs': len(rows),
+            'failed_runs': len(rows) - len(completed)
+        }
+        if completed:
+            group['true_level'] = completed[0]['true_level']
+        for metric in self.METRICS:
+            values = [r[metric] for r in completed]
+            group[metric] = {
+                'mean': round(statistics.mean(values), 3) if values else None,
+                'stdev': round(statistics.stdev(values), 3) if len(values) > 1 else 0.0
+            }
+        return group
+
+    def generate_markdown(self, summary: Dict) -> str:
+        """Generate the markdown comparison of the matrix."""
+        metadata = summary['metadata']
+        lines = [
+            "# Benchmark Matrix Summary\n",
+            f"**Date**: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"**Runs**: {len(summary['runs'])} ({metadata['turns']} turns each, seeds {metadata['seeds']}, "
+            f"{metadata['workers']} workers)",
+            f"**Wall Time**: {metadata['wall_seconds']}s\n",
+            "## By Persona and Configuration\n",
+            "| Persona | Config | Runs | Final Score | Accuracy | Avg Difficulty (target) | Calibration Offset | ECC |",
+            "|---|---|---|---|---|---|---|---|"
+        ]
+        for group in summary['groups']:
+            runs = f"{group['runs'] - group['failed_runs']}/{group['runs']}"
+            lines.append(
+                f"| {group['persona']} | {group['config']} | {runs} "
+                f"| {self._format(group['final_score'])} "
+                f"| {self._format(group['accuracy'])} "
+                f"| {self._format(group['average_difficulty'])} ({group.get('true_level', '-')}) "
+                f"| {self._format(group['calibration_offset'])} "
+                f"| {self._format(group['effective_coverage'])} |"
+            )
+
+        lines.extend([
+            "\n## Runs\n",
+            "| Run | Turns | Final Score | Accuracy | Avg Difficulty | Time (s) | Status |",
+            "|---|---|---|---|---|---|---|"
+        ])
+        for row in summary['runs']:
+            status = f"❌ {row['error']}" if 'error' in row else "✅"
+            lines.append(
+                f"| {row['run']} | {row.get('turns_completed', 0)}/{row['turns_planned']} "
+                f"| {row.get('final_score', '-')} | {row.get('accuracy', '-')} "
+                f"| {row.get('average_difficulty', '-')} | {row['wall_seconds']} | {status} |"
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def _format(self, stat: Dict) -> str:
+        if stat['mean'] is None:
+            return "-"
+        return f"{stat['mean']} ± {stat['stdev']}"
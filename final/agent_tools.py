@@ -1,3 +1,6 @@
+import asyncio
+import os
+from typing import List
 from langchain_core.tools import tool
 from tools.tools import (
     read_text_file,
@@ -19,14 +22,27 @@ def get_rag_components():
 
     if _vector_store is None:
         from final.rag.vector_store import ChromaVectorStore
-        from final.rag.retriever import ContentRetriever
+        from final.rag.retriever import ContentRetriever, DEFAULT_MAX_CONTEXT_TOKENS, DEFAULT_MIN_SIMILARITY
 
         _vector_store = ChromaVectorStore()
-        _retriever = ContentRetriever(_vector_store)
+        _retriever = ContentRetriever(
+            _vector_store,
+            # 0 = sin límite
+            max_context_tokens=int(os.getenv("RAG_MAX_CONTEXT_TOKENS", str(DEFAULT_MAX_CONTEXT_TOKENS))) or None,
+            min_similarity=float(os.getenv("RAG_MIN_SIMILARITY", str(DEFAULT_MIN_SIMILARITY)))
+        )
 
     return _vector_store, _retriever
 
 
+async def aget_rag_components():
+    """Async version of get_rag_components; the first (slow) initialization runs off the event loop."""
+    if _vector_store is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, get_rag_components)
+    return _vector_store, _retriever
+
+
 @tool
 def read_text_file_tool(file_path: str) -> str:
     """Read complete file content"""
@@ -88,6 +104,17 @@ def retrieve_content_tool(query: str, n_results: int = 3) -> str:
         return f"Error al recuperar contenido: {str(e)}"
 
 
+async def _aretrieve_content(query: str, n_results: int = 3) -> str:
+    try:
+        _, retriever = await aget_rag_components()
+        return await retriever.aretrieve_relevant_content(query, n_results)
+    except Exception as e:
+        return f"Error al recuperar contenido: {str(e)}"
+
+
+retrieve_content_tool.coroutine = _aretrieve_content
+
+
 @tool
 def get_topic_content_tool(topic: str, n_results: int = 3) -> str:
     """
@@ -101,6 +128,30 @@ def get_topic_content_tool(topic: str, n_results: int = 3) -> str:
         return f"Error al obtener contenido del tema: {str(e)}"
 
 
+async def _aget_topic_content(topic: str, n_results: int = 3) -> str:
+    try:
+        _, retriever = await aget_rag_components()
+        return await retriever.aretrieve_for_question_creation(topic=topic, n_results=n_results)
+    except Exception as e:
+        return f"Error al obtener contenido del tema: {str(e)}"
+
+
+get_topic_content_tool.coroutine = _aget_topic_content
+
+
+def _recent_incorrect_questions() -> List[str]:
+    """Texto de las preguntas respondidas mal entre las respuestas recientes."""
+    mcq_service = get_service()
+    score_data = mcq_service.compute_user_score()
+    # recent_performance solo trae el ID; el texto está en la pregunta almacenada
+    questions = [
+        mcq_service.get_question(p['question_id'])
+        for p in score_data['recent_performance']
+        if not p['is_correct']
+    ]
+    return [question.question for question in questions if question is not None]
+
+
 @tool
 def analyze_weak_areas_tool() -> str:
     """
@@ -109,12 +160,7 @@ def analyze_weak_areas_tool() -> str:
     """
     try:
         # Obtener preguntas incorrectas del usuario
-        mcq_service = get_service()
-        score_data = mcq_service.compute_user_score()
-        incorrect_questions = [
-            p['question'] for p in score_data['recent_performance']
-            if not p['is_correct']
-        ]
+        incorrect_questions = _recent_incorrect_questions()
 
         if not incorrect_questions:
             return "El usuario no tiene respuestas incorrectas recientes. Está respondiendo todo correctamente."
@@ -125,6 +171,23 @@ def analyze_weak_areas_tool() -> str:
         return f"Error al analizar áreas débiles: {str(e)}"
 
 
+async def _aanalyze_weak_areas() -> str:
+    try:
+        # Las preguntas se leen en el contexto de la sesión; solo la búsqueda va al executor
+        incorrect_questions = _recent_incorrect_questions()
+
+        if not incorrect_questions:
+            return "El usuario no tiene respuestas incorrectas recientes. Está respondiendo todo correctamente."
+
+        _, retriever = await aget_rag_components()
+        return await retriever.aretrieve_related_to_errors(incorrect_questions)
+    except Exception as e:
+        return f"Error al analizar áreas débiles: {str(e)}"
+
+
+analyze_weak_areas_tool.coroutine = _aanalyze_weak_areas
+
+
 @tool
 def search_concept_tool(concept: str, n_results: int = 2) -> str:
     """
@@ -136,3 +199,14 @@ def search_concept_tool(concept: str, n_results: int = 2) -> str:
         return retriever.search_specific_concept(concept, n_results)
     except Exception as e:
         return f"Error al buscar concepto: {str(e)}"
+
+
+async def _asearch_concept(concept: str, n_results: int = 2) -> str:
+    try:
+        _, retriever = await aget_rag_components()
+        return await retriever.asearch_specific_concept(concept, n_results)
+    except Exception as e:
+        return f"Error al buscar concepto: {str(e)}"
+
+
+search_concept_tool.coroutine = _asearch_concept
@@ -1,8 +1,13 @@
 import os
 import sys
+import threading
+from functools import cached_property
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
 from langchain.agents import create_agent
+from final.llm_cache import get_llm_cache
+from final.rate_limiter import async_rate_limit_event_hooks, get_rate_limiter, rate_limit_event_hooks
 from final.agent_tools import (
     read_text_file_tool,
     search_in_text_file_tool,
@@ -19,6 +24,64 @@ from final.agent_tools import (
 # Check if RAG is enabled
 USE_RAG = os.environ.get("USE_RAG", "true").lower() == "true"
 
+# Connection pool shared by every LLM call in the process (keep-alive between turns)
+HTTP_POOL_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+)
+
+
+def _rate_limited_http_clients(sdk, provider: str) -> dict:
+    """
+    Pooled sync/async HTTP clients for a provider SDK whose requests (including
+    SDK retries) go through the provider's shared limiter in final.rate_limiter.
+    """
+    limiter = get_rate_limiter(provider)
+    return {
+        "http_client": sdk.DefaultHttpxClient(
+            limits=HTTP_POOL_LIMITS,
+            event_hooks=rate_limit_event_hooks(limiter)
+        ),
+        "http_async_client": sdk.DefaultAsyncHttpxClient(
+            limits=HTTP_POOL_LIMITS,
+            event_hooks=async_rate_limit_event_hooks(limiter)
+        )
+    }
+
+
+def _create_chat_anthropic(**kwargs):
+    """
+    ChatAnthropic whose SDK clients use the rate-limited HTTP clients.
+
+    ChatAnthropic has no http_client field, so its cached SDK clients are
+    built here with the same event hooks openai and groq get: the limiter
+    sees every request, 429 and Retry-After, including SDK retries. The SDK's
+    retry sleep and the limiter's block both start at the 429, so they
+    overlap instead of adding up.
+    """
+    import anthropic
+    from langchain_anthropic import ChatAnthropic
+
+    http_clients = _rate_limited_http_clients(anthropic, "anthropic")
+
+    class RateLimitedChatAnthropic(ChatAnthropic):
+        @cached_property
+        def _client(self) -> anthropic.Client:
+            return anthropic.Client(**self._client_params, http_client=http_clients["http_client"])
+
+        @cached_property
+        def _async_client(self) -> anthropic.AsyncClient:
+            return anthropic.AsyncClient(**self._client_params, http_client=http_clients["http_async_client"])
+
+    return RateLimitedChatAnthropic(**kwargs)
+
+
+# Per-process registry: one provider client and one compiled graph per agent
+_shared_model = None
+_agents = {}
+_registry_lock = threading.RLock()
+
 
 def validate_api_keys():
     """
@@ -43,44 +106,107 @@ def create_model():
     1. OpenAI (if OPENAI_API_KEY is set)
     2. Anthropic (if ANTHROPIC_API_KEY is set)
     3. Groq (if GROQ_API_KEY is set)
+
+    With LLM_CACHE_MODE=record/replay, responses go through the content-addressed
+    cache in final.llm_cache. Requests that reach the provider go through its
+    adaptive rate limiter in final.rate_limiter (shared by the app and the benchmark).
     """
     validate_api_keys()
+    cache = get_llm_cache()
 
     openai_key = os.getenv("OPENAI_API_KEY")
     if openai_key:
+        import openai
         return ChatOpenAI(
             model="gpt-4o",
             temperature=0.7,
             max_tokens=2048,
             timeout=None,
-            max_retries=2
+            max_retries=2,
+            cache=cache,
+            **_rate_limited_http_clients(openai, "openai")
         )
 
     anthropic_key = os.getenv("ANTHROPIC_API_KEY")
     if anthropic_key:
         try:
-            from langchain_anthropic import ChatAnthropic
-            return ChatAnthropic(
+            return _create_chat_anthropic(
                 model="claude-sonnet-4-5-20250929",
                 temperature=0.7,
                 max_tokens=2048,
                 timeout=None,
-                max_retries=2
+                max_retries=2,
+                cache=cache
             )
         except ImportError:
             print("Warning: ANTHROPIC_API_KEY is set but langchain-anthropic is not installed.", file=sys.stderr)
             print("Install with: pip install langchain-anthropic", file=sys.stderr)
             print("Falling back to Groq...", file=sys.stderr)
 
+    import groq
     return ChatGroq(
         model="moonshotai/kimi-k2-instruct-0905",
         temperature=0.7,
         max_tokens=2048,
         timeout=None,
-        max_retries=2
+        max_retries=2,
+        cache=cache,
+        **_rate_limited_http_clients(groq, "groq")
     )
 
 
+def get_model():
+    """
+    Return the process-wide LLM client, creating it on first use.
+
+    Chat models are stateless between calls, so a single instance (and its
+    HTTP connection pool) is shared by every agent, node and benchmark
+    component instead of opening a new pool per call.
+    """
+    global _shared_model
+
+    if _shared_model is None:
+        with _registry_lock:
+            if _shared_model is None:
+                _shared_model = create_model()
+
+    return _shared_model
+
+
+def get_agent(name: str):
+    """
+    Return the compiled agent graph for `name`, building it once per process.
+
+    Compiled agents hold no per-run state, so concurrent sessions can share them.
+
+    Args:
+        name: One of AGENT_FACTORIES keys (e.g. "question_creator")
+    """
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+
+    if name not in AGENT_FACTORIES:
+        raise ValueError(f"Unknown agent: {name}. Options: {', '.join(AGENT_FACTORIES)}")
+
+    with _registry_lock:
+        agent = _agents.get(name)
+        if agent is None:
+            agent = AGENT_FACTORIES[name]()
+            _agents[name] = agent
+
+    return agent
+
+
+def reset_agent_registry():
+    """Drop cached agents and the shared client (e.g. after changing API keys)."""
+    global _shared_model
+
+    with _registry_lock:
+        _agents.clear()
+        _shared_model = None
+
+
 def create_question_creator_agent():
     tools = [
         list_questions_tool
@@ -100,13 +226,13 @@ def create_question_creator_agent():
             search_in_text_file_tool
         ])
 
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
 def create_difficulty_reviewer_agent():
     tools = [get_performance_tool]
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
@@ -120,13 +246,13 @@ def create_feedback_agent():
     if USE_RAG:
         tools.append(analyze_weak_areas_tool)
 
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
 def create_orchestrator_agent():
     tools = [get_performance_tool]
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
@@ -150,12 +276,22 @@ def create_open_question_creator_agent():
             search_in_text_file_tool
         ])
 
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
 def create_open_answer_evaluator_agent():
     """Creates Open-Ended Answer Evaluator agent"""
     tools = []  # No necesita tools, solo evalúa
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
+
+
+AGENT_FACTORIES = {
+    "question_creator": create_question_creator_agent,
+    "difficulty_reviewer": create_difficulty_reviewer_agent,
+    "feedback": create_feedback_agent,
+    "orchestrator": create_orchestrator_agent,
+    "open_question_creator": create_open_question_creator_agent,
+    "open_answer_evaluator": create_open_answer_evaluator_agent
+}
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatGeneration, Generation
+
+LLM_CACHE_MODES = ("off", "record", "replay")
+
+# Los IDs de preguntas (uuid4) cambian en cada corrida pero no cambian lo que se le pide al modelo
+_UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Llamada al LLM sin respuesta grabada en modo replay."""
+
+
+def prompt_ids(prompt: str) -> List[str]:
+    """UUIDs distintos del prompt en orden de primera aparición."""
+    return list(dict.fromkeys(_UUID_PATTERN.findall(prompt)))
+
+
+def cache_key(prompt: str, llm_string: str, occurrence: int = 0, namespace: str = "") -> str:
+    """
+    Clave de contenido de una llamada al chat model.
+
+    llm_string ya incluye proveedor, modelo, temperatura y los schemas de las
+    tools enlazadas; prompt es la lista completa de mensajes serializada (sin
+    IDs de mensaje). Cada UUID se reemplaza por su número de aparición, así
+    que dos corridas con IDs distintos comparten la clave y la respuesta
+    grabada se puede traducir a los IDs actuales.
+
+    Args:
+        prompt: Mensajes serializados
+        llm_string: Configuración del modelo
+        occurrence: Cuántas veces se hizo antes esta misma llamada en el proceso;
+            las repeticiones de un prompt muestreado tienen respuestas propias
+        namespace: Separa corridas que deben muestrear distinto (p. ej. la semilla)
+    """
+    numbering = {uuid: f"<id{i}>" for i, uuid in enumerate(prompt_ids(prompt))}
+    canonical_prompt = _UUID_PATTERN.sub(lambda match: numbering[match.group(0)], prompt)
+    return hashlib.sha256(
+        f"{namespace}\n{occurrence}\n{llm_string}\n{canonical_prompt}".encode("utf-8")
+    ).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Cache de respuestas del LLM direccionada por contenido, en SQLite.
+
+    Modos:
+        record: Responde desde la cache si la llamada ya se grabó; si no,
+            llama al proveedor y graba la respuesta
+        replay: Solo responde desde la cache; una llamada no grabada lanza
+            LLMCacheMiss (corridas offline y deterministas)
+
+    La n-ésima repetición de una misma llamada en el proceso usa la n-ésima
+    respuesta grabada, así que las candidatas o corridas que repiten un prompt
+    no colapsan en una sola muestra. Los UUIDs del prompt grabado se
+    reemplazan en la respuesta por los del prompt actual.
+    """
+
+    def __init__(self, path: str, mode: str = "record", namespace: str = ""):
+        """
+        Args:
+            path: Archivo SQLite (se crea si no existe)
+            mode: "record" o "replay"
+            namespace: Prefijo de las claves (p. ej. "seed7"); corridas con
+                namespaces distintos no comparten respuestas
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Modo de cache inválido: {mode}. Opciones: record, replay")
+
+        self.path = path
+        self.mode = mode
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Llamadas hechas por clave base, y ocurrencias que esperan su update tras un miss
+        self._occurrences: Dict[str, int] = {}
+        self._pending: Dict[str, Deque[int]] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, "
+            "llm_string TEXT NOT NULL, "
+            "response TEXT NOT NULL, "
+            "prompt_ids TEXT NOT NULL DEFAULT '[]', "
+            "created_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(llm_responses)")}
+        if "prompt_ids" not in columns:
+            self._db.execute("ALTER TABLE llm_responses ADD COLUMN prompt_ids TEXT NOT NULL DEFAULT '[]'")
+        self._db.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        base_key = cache_key(prompt, llm_string, namespace=self.namespace)
+
+        with self._lock:
+            occurrence = self._occurrences.get(base_key, 0)
+            self._occurrences[base_key] = occurrence + 1
+            key = cache_key(prompt, llm_string, occurrence, self.namespace)
+
+            row = self._db.execute(
+                "SELECT response, prompt_ids FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                self._pending.setdefault(base_key, deque()).append(occurrence)
+            else:
+                self._hits += 1
+
+        if row is None:
+            if self.mode == "replay":
+                raise LLMCacheMiss(f"Sin respuesta grabada para la llamada {key[:12]} (LLM_CACHE_MODE=replay)")
+            return None
+
+        # IDs de la corrida grabada -> IDs de esta corrida, por orden de aparición en el prompt
+        ids = dict(zip(json.loads(row[1]), prompt_ids(prompt)))
+        response = _UUID_PATTERN.sub(lambda match: ids.get(match.group(0), match.group(0)), row[0])
+
+        with warnings.catch_warnings():
+            # loads está en beta; solo se deserializan mensajes
+            warnings.simplefilter("ignore")
+            messages = loads(response, allowed_objects="messages")
+        return [ChatGeneration(message=message) for message in messages]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        base_key = cache_key(prompt, llm_string, namespace=self.namespace)
+        with self._lock:
+            pending = self._pending.get(base_key)
+            occurrence = pending.popleft() if pending else 0
+            if pending is not None and not pending:
+                del self._pending[base_key]
+
+        if self.mode != "record":
+            return
+
+        # Se guardan solo los mensajes, sin el ID de la corrida que los generó:
+        # al reproducirlos LangChain/LangGraph les asignan IDs nuevos
+        messages = [
+            generation.message.model_copy(update={"id": None})
+            for generation in return_val if isinstance(generation, ChatGeneration)
+        ]
+        if not messages:
+            return
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, llm_string, response, prompt_ids, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    cache_key(prompt, llm_string, occurrence, self.namespace), llm_string,
+                    dumps(messages), json.dumps(prompt_ids(prompt)), time.time()
+                )
+            )
+            self._db.commit()
+
+    def clear(self, **kwargs):
+        """Borra todas las respuestas grabadas."""
+        with self._lock:
+            self._db.execute("DELETE FROM llm_responses")
+            self._db.commit()
+            self._hits = self._misses = 0
+            self._occurrences.clear()
+            self._pending.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de uso de la cache.
+
+        Returns:
+            Diccionario con mode, hits, misses, size y hit_rate
+        """
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "mode": self.mode,
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": size,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Retorna la cache de respuestas del LLM del proceso, o None si está apagada.
+
+    Se configura con las variables de entorno:
+        LLM_CACHE_MODE: off (default), record o replay
+        LLM_CACHE_PATH: Archivo SQLite (default ./data/llm_cache.sqlite3)
+        LLM_CACHE_NAMESPACE: Prefijo de las claves, p. ej. la semilla de la corrida (default vacío)
+    """
+    global _llm_cache
+
+    mode = os.environ.get("LLM_CACHE_MODE", "off").lower()
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"LLM_CACHE_MODE inválido: {mode}. Opciones: {', '.join(LLM_CACHE_MODES)}")
+    if mode == "off":
+        return None
+
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache(
+                    os.environ.get("LLM_CACHE_PATH", "./data/llm_cache.sqlite3"),
+                    mode=mode,
+                    namespace=os.environ.get("LLM_CACHE_NAMESPACE", "")
+                )
+
+    return _llm_cache
@@ -39,3 +39,8 @@ def log_open_question_creator(message: str):
 def log_answer_evaluator(message: str):
     """Log messages from Open-Ended Answer Evaluator"""
     print(f"{Fore.BLUE}📝 [ANSWER EVALUATOR]{Style.RESET_ALL} {message}")
+
+
+def log_prefetcher(message: str):
+    """Log messages from the background question prefetcher"""
+    print(f"{Fore.LIGHTBLACK_EX}⏳ [PREFETCHER]{Style.RESET_ALL} {message}")
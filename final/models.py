@@ -42,6 +42,19 @@ class DifficultyReviewOutput(BaseModel):
     feedback: str = Field(description="Review feedback")
 
 
+class CandidateReview(BaseModel):
+    """Review of one candidate question in a batched difficulty review."""
+    index: int = Field(description="Candidate index (0-based)", ge=0)
+    approved: bool = Field(description="Whether the candidate is approved")
+    score: float = Field(description="Fit to the user's level from 0.0 to 10.0", ge=0.0, le=10.0)
+    feedback: str = Field(description="Review feedback")
+
+
+class BatchDifficultyReviewOutput(BaseModel):
+    """Batched Difficulty Reviewer output schema."""
+    reviews: list[CandidateReview] = Field(description="One review per candidate")
+
+
 class AgentState(TypedDict):
     """Shared state for multi-agent workflow."""
     messages: Annotated[list, add_messages]
@@ -56,6 +69,7 @@ class AgentState(TypedDict):
     question_approved: bool
     question_type_decision: str
     question_id: str
+    agent_runs: int
 
     # MCQ-specific fields
     current_question: str
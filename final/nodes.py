@@ -1,9 +1,13 @@
 """Workflow nodes and routing functions for multi-agent system."""
 
+import asyncio
+import contextvars
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from tools.tools import (
     register_multiple_choice_question,
     register_open_ended_question,
@@ -11,22 +15,22 @@ from tools.tools import (
     get_user_performance,
     get_unified_performance
 )
-from services.service_manager import get_service, get_open_service, get_unified_performance as get_unified_perf_service
+from services.service_manager import (
+    get_service,
+    get_open_service,
+    get_unified_performance as get_unified_perf_service,
+    get_feedback_memo
+)
 from final.models import (
     AgentState,
     QuestionOutput,
     OpenEndedQuestionOutput,
     OpenEndedEvaluationOutput,
-    DifficultyReviewOutput
-)
-from final.agents import (
-    create_question_creator_agent,
-    create_open_question_creator_agent,
-    create_open_answer_evaluator_agent,
-    create_difficulty_reviewer_agent,
-    create_feedback_agent,
-    create_orchestrator_agent
+    DifficultyReviewOutput,
+    BatchDifficultyReviewOutput
 )
+from final.agents import get_agent, get_model
+from final.routing import is_performance_request, is_question_request, question_type_decision
 from final.logs import (
     log_question_creator,
     log_difficulty_reviewer,
@@ -40,11 +44,23 @@ from final.prompts import (
     OPEN_ENDED_QUESTION_CREATOR_PROMPT,
     OPEN_ENDED_ANSWER_EVALUATOR_PROMPT,
     DIFFICULTY_REVIEWER_PROMPT,
+    BATCH_DIFFICULTY_REVIEWER_PROMPT,
     FEEDBACK_AGENT_PROMPT,
+    FEEDBACK_UPDATE_PROMPT,
     ORCHESTRATOR_PROMPT
 )
 
 
+def sync_and_async(func, afunc) -> RunnableLambda:
+    """
+    Wraps a node with sync and async implementations.
+
+    The graph runs `func` under invoke() (CLI, benchmark) and `afunc` under
+    ainvoke() (Chainlit), so LLM calls don't block worker threads there.
+    """
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
 def extract_json_from_response(content: str) -> dict:
     """Extracts JSON from LLM response string."""
     if isinstance(content, dict):
@@ -74,10 +90,9 @@ def extract_json_from_response(content: str) -> dict:
 
 import os
 
-def question_creator_node(state: AgentState):
-    """Executes Question Creator agent."""
-    log_question_creator("Iniciando creación de pregunta...")
-    agent = create_question_creator_agent()
+
+def _question_creator_request(state: AgentState) -> dict:
+    """Builds the Question Creator agent input."""
     context = ""
     if state.get("difficulty_feedback"):
         context = f"\n\nFeedback del revisor de dificultad: {state['difficulty_feedback']}"
@@ -96,42 +111,68 @@ def question_creator_node(state: AgentState):
         prompt = QUESTION_CREATOR_PROMPT_NO_RAG
         message = f"Crea una nueva pregunta de opción múltiple basada en el material del curso. USA load_course_content_tool para acceder al contenido.{context}"
 
+    return {
+        "messages": [
+            SystemMessage(content=prompt),
+            HumanMessage(content=message)
+        ]
+    }
+
+
+def _question_creator_result(result: dict) -> dict:
+    """Parses the Question Creator agent output into a state update."""
+    response_content = result["messages"][-1].content
+    if isinstance(response_content, QuestionOutput):
+        validated = response_content
+    else:
+        json_data = extract_json_from_response(response_content)
+        validated = QuestionOutput(**json_data)
+
+    log_question_creator(f"Pregunta creada: {validated.question}")
+
+    return {
+        "current_question": validated.question,
+        "question_options": validated.options,
+        "question_correct_index": validated.correct_index,
+        "messages": [AIMessage(content=f"Pregunta propuesta: {validated.question}")],
+        "next_action": "review_difficulty"
+    }
+
+
+def _question_creator_error(error: Exception) -> dict:
+    log_question_creator(f"Error al crear pregunta: {str(error)}")
+    return {
+        "messages": [AIMessage(content=f"Error al crear pregunta: {str(error)}")],
+        "next_action": "create_question"
+    }
+
+
+def question_creator_node(state: AgentState):
+    """Executes Question Creator agent."""
+    log_question_creator("Iniciando creación de pregunta...")
+    agent = get_agent("question_creator")
+
     try:
-        result = agent.invoke({
-            "messages": [
-                SystemMessage(content=prompt),
-                HumanMessage(content=message)
-            ]
-        })
+        result = agent.invoke(_question_creator_request(state))
+        return _question_creator_result(result)
+    except Exception as e:
+        return _question_creator_error(e)
 
-        response_content = result["messages"][-1].content
-        if isinstance(response_content, QuestionOutput):
-            validated = response_content
-        else:
-            json_data = extract_json_from_response(response_content)
-            validated = QuestionOutput(**json_data)
 
-        log_question_creator(f"Pregunta creada: {validated.question}")
+async def aquestion_creator_node(state: AgentState):
+    """Async version of question_creator_node."""
+    log_question_creator("Iniciando creación de pregunta...")
+    agent = get_agent("question_creator")
 
-        return {
-            "current_question": validated.question,
-            "question_options": validated.options,
-            "question_correct_index": validated.correct_index,
-            "messages": [AIMessage(content=f"Pregunta propuesta: {validated.question}")],
-            "next_action": "review_difficulty"
-        }
+    try:
+        result = await agent.ainvoke(_question_creator_request(state))
+        return _question_creator_result(result)
     except Exception as e:
-        log_question_creator(f"Error al crear pregunta: {str(e)}")
-        return {
-            "messages": [AIMessage(content=f"Error al crear pregunta: {str(e)}")],
-            "next_action": "create_question"
-        }
+        return _question_creator_error(e)
 
 
-def open_question_creator_node(state: AgentState):
-    """Executes Open-Ended Question Creator agent."""
-    log_question_creator("Iniciando creación de pregunta abierta...")
-    agent = create_open_question_creator_agent()
+def _open_question_creator_request(state: AgentState) -> dict:
+    """Builds the Open-Ended Question Creator agent input."""
     context = ""
     if state.get("difficulty_feedback"):
         context = f"\n\nFeedback del revisor de dificultad: {state['difficulty_feedback']}"
@@ -150,49 +191,79 @@ def open_question_creator_node(state: AgentState):
         prompt = OPEN_ENDED_QUESTION_CREATOR_PROMPT_NO_RAG
         message = f"Crea una nueva pregunta abierta basada en el material del curso. USA load_course_content_tool para acceder al contenido.{context}"
 
-    try:
-        result = agent.invoke({
-            "messages": [
-                SystemMessage(content=prompt),
-                HumanMessage(content=message)
-            ]
-        })
+    return {
+        "messages": [
+            SystemMessage(content=prompt),
+            HumanMessage(content=message)
+        ]
+    }
 
-        response_content = result["messages"][-1].content
-        if isinstance(response_content, OpenEndedQuestionOutput):
-            validated = response_content
-        else:
-            json_data = extract_json_from_response(response_content)
-            validated = OpenEndedQuestionOutput(**json_data)
 
-        log_question_creator(f"Pregunta abierta creada: {validated.question}")
+def _open_question_creator_result(result: dict) -> dict:
+    """Parses the Open-Ended Question Creator agent output into a state update."""
+    response_content = result["messages"][-1].content
+    if isinstance(response_content, OpenEndedQuestionOutput):
+        validated = response_content
+    else:
+        json_data = extract_json_from_response(response_content)
+        validated = OpenEndedQuestionOutput(**json_data)
 
-        return {
-            "question_type": "open_ended",
-            "open_question": validated.question,
-            "open_evaluation_criteria": validated.evaluation_criteria,
-            "open_key_concepts": validated.key_concepts,
-            "open_question_difficulty": validated.difficulty_level,
-            "messages": [AIMessage(content=f"Pregunta abierta propuesta: {validated.question}")],
-            "next_action": "review_difficulty"
-        }
+    log_question_creator(f"Pregunta abierta creada: {validated.question}")
+
+    return {
+        "question_type": "open_ended",
+        "open_question": validated.question,
+        "open_evaluation_criteria": validated.evaluation_criteria,
+        "open_key_concepts": validated.key_concepts,
+        "open_question_difficulty": validated.difficulty_level,
+        "messages": [AIMessage(content=f"Pregunta abierta propuesta: {validated.question}")],
+        "next_action": "review_difficulty"
+    }
+
+
+def _open_question_creator_error(error: Exception) -> dict:
+    log_question_creator(f"Error al crear pregunta abierta: {str(error)}")
+    return {
+        "messages": [AIMessage(content=f"Error al crear pregunta abierta: {str(error)}")],
+        "next_action": "create_open_question"
+    }
+
+
+def open_question_creator_node(state: AgentState):
+    """Executes Open-Ended Question Creator agent."""
+    log_question_creator("Iniciando creación de pregunta abierta...")
+    agent = get_agent("open_question_creator")
+
+    try:
+        result = agent.invoke(_open_question_creator_request(state))
+        return _open_question_creator_result(result)
     except Exception as e:
-        log_question_creator(f"Error al crear pregunta abierta: {str(e)}")
-        return {
-            "messages": [AIMessage(content=f"Error al crear pregunta abierta: {str(e)}")],
-            "next_action": "create_open_question"
-        }
+        return _open_question_creator_error(e)
 
 
-def open_answer_evaluator_node(state: AgentState):
-    """Evaluates user's open-ended answer."""
-    log_orchestrator("Evaluando respuesta abierta del usuario...")
+async def aopen_question_creator_node(state: AgentState):
+    """Async version of open_question_creator_node."""
+    log_question_creator("Iniciando creación de pregunta abierta...")
+    agent = get_agent("open_question_creator")
+
+    try:
+        result = await agent.ainvoke(_open_question_creator_request(state))
+        return _open_question_creator_result(result)
+    except Exception as e:
+        return _open_question_creator_error(e)
+
 
-    agent = create_open_answer_evaluator_agent()
+def _open_answer_evaluator_request(state: AgentState):
+    """
+    Builds the Open-Ended Answer Evaluator agent input.
 
+    Returns:
+        Tuple (agent_input, early_update); early_update is set when the
+        question cannot be evaluated and the node must return it directly.
+    """
     question_id = state.get("question_id")
     if not question_id:
-        return {
+        return None, {
             "messages": [AIMessage(content="Error: No se proporcionó question_id")],
             "next_action": "end"
         }
@@ -200,19 +271,19 @@ def open_answer_evaluator_node(state: AgentState):
     open_service = get_open_service()
     question_data = open_service.get_question(question_id)
     if not question_data:
-        return {
+        return None, {
             "messages": [AIMessage(content="Error: No se encontró la pregunta")],
             "next_action": "end"
         }
 
     evaluation_context = f"""
-Pregunta: {question_data['question']}
+Pregunta: {question_data.question}
 
 Criterios de evaluación:
-{question_data['evaluation_criteria']}
+{question_data.evaluation_criteria}
 
 Conceptos clave esperados:
-{', '.join(question_data['key_concepts'])}
+{', '.join(question_data.key_concepts)}
 
 Respuesta del usuario:
 {state['user_open_answer']}
@@ -227,67 +298,102 @@ Considera:
 Un puntaje de 7.0 o superior se considera aprobado.
 """
 
-    try:
-        result = agent.invoke({
-            "messages": [
-                SystemMessage(content=OPEN_ENDED_ANSWER_EVALUATOR_PROMPT),
-                HumanMessage(content=evaluation_context)
-            ]
-        })
+    return {
+        "messages": [
+            SystemMessage(content=OPEN_ENDED_ANSWER_EVALUATOR_PROMPT),
+            HumanMessage(content=evaluation_context)
+        ]
+    }, None
 
-        response_content = result["messages"][-1].content
-        if isinstance(response_content, OpenEndedEvaluationOutput):
-            validated = response_content
-        else:
-            json_data = extract_json_from_response(response_content)
-            validated = OpenEndedEvaluationOutput(**json_data)
-
-        # Store evaluation
-        evaluation_msg = evaluate_open_ended_answer(
-            question_id,
-            state['user_open_answer'],
-            validated.score,
-            validated.feedback,
-            validated.is_passing,
-            validated.strengths,
-            validated.weaknesses
-        )
 
-        log_orchestrator(f"Evaluación completada: {validated.score:.1f}/10")
+def _open_answer_evaluator_result(state: AgentState, result: dict) -> dict:
+    """Parses and stores the evaluation of the user's open-ended answer."""
+    response_content = result["messages"][-1].content
+    if isinstance(response_content, OpenEndedEvaluationOutput):
+        validated = response_content
+    else:
+        json_data = extract_json_from_response(response_content)
+        validated = OpenEndedEvaluationOutput(**json_data)
+
+    # Store evaluation
+    evaluation_msg = evaluate_open_ended_answer(
+        state["question_id"],
+        state['user_open_answer'],
+        validated.score,
+        validated.feedback,
+        validated.is_passing,
+        validated.strengths,
+        validated.weaknesses
+    )
 
-        return {
-            "evaluation_score": validated.score,
-            "evaluation_feedback": validated.feedback,
-            "evaluation_passing": validated.is_passing,
-            "messages": [AIMessage(content=evaluation_msg)],
-            "next_action": "end"
-        }
+    log_orchestrator(f"Evaluación completada: {validated.score:.1f}/10")
+
+    return {
+        "evaluation_score": validated.score,
+        "evaluation_feedback": validated.feedback,
+        "evaluation_passing": validated.is_passing,
+        "messages": [AIMessage(content=evaluation_msg)],
+        "next_action": "end"
+    }
+
+
+def _open_answer_evaluator_error(state: AgentState, error: Exception) -> dict:
+    log_orchestrator(f"Error en evaluación: {str(error)}")
+    # Provide default evaluation in case of error
+    default_msg = evaluate_open_ended_answer(
+        state["question_id"],
+        state['user_open_answer'],
+        5.0,
+        f"Error al evaluar respuesta: {str(error)}. Se asigna puntaje neutral.",
+        False,
+        [],
+        ["Error en evaluación automática"]
+    )
+    return {
+        "evaluation_score": 5.0,
+        "evaluation_feedback": str(error),
+        "evaluation_passing": False,
+        "messages": [AIMessage(content=default_msg)],
+        "next_action": "end"
+    }
+
+
+def open_answer_evaluator_node(state: AgentState):
+    """Evaluates user's open-ended answer."""
+    log_orchestrator("Evaluando respuesta abierta del usuario...")
+
+    agent = get_agent("open_answer_evaluator")
+
+    agent_input, early_update = _open_answer_evaluator_request(state)
+    if early_update:
+        return early_update
+
+    try:
+        result = agent.invoke(agent_input)
+        return _open_answer_evaluator_result(state, result)
     except Exception as e:
-        log_orchestrator(f"Error en evaluación: {str(e)}")
-        # Provide default evaluation in case of error
-        default_msg = evaluate_open_ended_answer(
-            question_id,
-            state['user_open_answer'],
-            5.0,
-            f"Error al evaluar respuesta: {str(e)}. Se asigna puntaje neutral.",
-            False,
-            [],
-            ["Error en evaluación automática"]
-        )
-        return {
-            "evaluation_score": 5.0,
-            "evaluation_feedback": str(e),
-            "evaluation_passing": False,
-            "messages": [AIMessage(content=default_msg)],
-            "next_action": "end"
-        }
+        return _open_answer_evaluator_error(state, e)
 
 
-def difficulty_reviewer_node(state: AgentState):
-    """Executes Difficulty Reviewer agent - handles both MCQ and Open-Ended."""
-    log_difficulty_reviewer("Revisando dificultad de la pregunta propuesta...")
-    agent = create_difficulty_reviewer_agent()
+async def aopen_answer_evaluator_node(state: AgentState):
+    """Async version of open_answer_evaluator_node."""
+    log_orchestrator("Evaluando respuesta abierta del usuario...")
+
+    agent = get_agent("open_answer_evaluator")
+
+    agent_input, early_update = _open_answer_evaluator_request(state)
+    if early_update:
+        return early_update
+
+    try:
+        result = await agent.ainvoke(agent_input)
+        return _open_answer_evaluator_result(state, result)
+    except Exception as e:
+        return _open_answer_evaluator_error(state, e)
+
 
+def _difficulty_reviewer_request(state: AgentState) -> dict:
+    """Builds the Difficulty Reviewer agent input from the proposed question and user performance."""
     # Get unified performance
     unified_perf = get_unified_perf_service()
     unified_data = unified_perf.compute_unified_performance()
@@ -344,92 +450,176 @@ INSTRUCCIÓN: Analiza si esta pregunta es apropiadamente desafiante para el nive
 
     message = f"Revisa la siguiente pregunta y determina si la dificultad es apropiada:\n\n{question_info}"
 
-    try:
-        result = agent.invoke({
-            "messages": [
-                SystemMessage(content=DIFFICULTY_REVIEWER_PROMPT),
-                HumanMessage(content=message)
-            ]
-        })
+    return {
+        "messages": [
+            SystemMessage(content=DIFFICULTY_REVIEWER_PROMPT),
+            HumanMessage(content=message)
+        ]
+    }
 
-        response_content = result["messages"][-1].content
-        if isinstance(response_content, DifficultyReviewOutput):
-            validated = response_content
-        else:
-            json_data = extract_json_from_response(response_content)
-            validated = DifficultyReviewOutput(**json_data)
 
-        approved = validated.approved
-        feedback = validated.feedback
+def _difficulty_reviewer_result(state: AgentState, result: dict) -> dict:
+    """Parses the review and decides whether to present or recreate the question."""
+    response_content = result["messages"][-1].content
+    if isinstance(response_content, DifficultyReviewOutput):
+        validated = response_content
+    else:
+        json_data = extract_json_from_response(response_content)
+        validated = DifficultyReviewOutput(**json_data)
 
-        log_difficulty_reviewer(f"Decisión: {'✓ APROBADA' if approved else '✗ RECHAZADA'}")
-        log_difficulty_reviewer(f"Feedback: {feedback}")
+    approved = validated.approved
+    feedback = validated.feedback
 
-        if approved:
+    log_difficulty_reviewer(f"Decisión: {'✓ APROBADA' if approved else '✗ RECHAZADA'}")
+    log_difficulty_reviewer(f"Feedback: {feedback}")
+
+    if approved:
+        return {
+            "question_approved": True,
+            "difficulty_feedback": feedback,
+            "messages": [AIMessage(content=f"Pregunta aprobada: {feedback}")],
+            "next_action": "present_question"
+        }
+    else:
+        iteration = state.get("iteration_count", 0) + 1
+        if iteration >= 3:
+            log_difficulty_reviewer("Máximo de iteraciones alcanzado, aprobando pregunta...")
             return {
                 "question_approved": True,
-                "difficulty_feedback": feedback,
-                "messages": [AIMessage(content=f"Pregunta aprobada: {feedback}")],
+                "difficulty_feedback": "Aprobada tras múltiples iteraciones",
+                "messages": [AIMessage(content="Pregunta aprobada tras revisión")],
                 "next_action": "present_question"
             }
         else:
-            iteration = state.get("iteration_count", 0) + 1
-            if iteration >= 3:
-                log_difficulty_reviewer("Máximo de iteraciones alcanzado, aprobando pregunta...")
-                return {
-                    "question_approved": True,
-                    "difficulty_feedback": "Aprobada tras múltiples iteraciones",
-                    "messages": [AIMessage(content="Pregunta aprobada tras revisión")],
-                    "next_action": "present_question"
-                }
-            else:
-                log_difficulty_reviewer(
-                    f"⚠️  Pregunta rechazada - Intento {iteration}/3. "
-                    f"Solicitando ajuste de dificultad..."
-                )
-                return {
-                    "question_approved": False,
-                    "difficulty_feedback": feedback,
-                    "iteration_count": iteration,
-                    "messages": [AIMessage(content=f"Pregunta rechazada: {feedback}")],
-                    "next_action": "create_question"
-                }
+            log_difficulty_reviewer(
+                f"⚠️  Pregunta rechazada - Intento {iteration}/3. "
+                f"Solicitando ajuste de dificultad..."
+            )
+            return {
+                "question_approved": False,
+                "difficulty_feedback": feedback,
+                "iteration_count": iteration,
+                "messages": [AIMessage(content=f"Pregunta rechazada: {feedback}")],
+                "next_action": "create_question"
+            }
+
+
+def _difficulty_reviewer_error(error: Exception) -> dict:
+    log_difficulty_reviewer(f"Error: {str(error)}")
+    return {
+        "question_approved": True,
+        "difficulty_feedback": "Aprobada por defecto tras error",
+        "messages": [AIMessage(content=f"Pregunta aprobada (error: {str(error)})")],
+        "next_action": "present_question"
+    }
+
+
+def difficulty_reviewer_node(state: AgentState):
+    """Executes Difficulty Reviewer agent - handles both MCQ and Open-Ended."""
+    log_difficulty_reviewer("Revisando dificultad de la pregunta propuesta...")
+    agent = get_agent("difficulty_reviewer")
+
+    agent_input = _difficulty_reviewer_request(state)
+
+    try:
+        result = agent.invoke(agent_input)
+        return _difficulty_reviewer_result(state, result)
     except Exception as e:
-        log_difficulty_reviewer(f"Error: {str(e)}")
-        return {
-            "question_approved": True,
-            "difficulty_feedback": "Aprobada por defecto tras error",
-            "messages": [AIMessage(content=f"Pregunta aprobada (error: {str(e)})")],
-            "next_action": "present_question"
-        }
+        return _difficulty_reviewer_error(e)
 
 
-def feedback_agent_node(state: AgentState):
-    """Executes Feedback Agent."""
-    log_feedback_agent("Analizando patrones de aprendizaje del usuario...")
+async def adifficulty_reviewer_node(state: AgentState):
+    """Async version of difficulty_reviewer_node."""
+    log_difficulty_reviewer("Revisando dificultad de la pregunta propuesta...")
+    agent = get_agent("difficulty_reviewer")
+
+    agent_input = _difficulty_reviewer_request(state)
+
+    try:
+        result = await agent.ainvoke(agent_input)
+        return _difficulty_reviewer_result(state, result)
+    except Exception as e:
+        return _difficulty_reviewer_error(e)
+
+
+def _latest_answer_summary(previous_version: tuple, version: tuple) -> str:
+    """Describes the answer added after previous_version (MCQ or open-ended)."""
+    if version[0] != previous_version[0]:
+        last = get_service().get_answer_history(limit=1)[-1]
+        result = "correcta" if last['is_correct'] else "incorrecta"
+        return (
+            f"Pregunta (opción múltiple): {last['question']}\n"
+            f"Respuesta del usuario: {last['user_answer']} (correcta: {last['correct_answer']}) -> {result}"
+        )
+
+    last = get_open_service().get_evaluation_history(limit=1)[-1]
+    return (
+        f"Pregunta (abierta): {last['question']}\n"
+        f"Respuesta del usuario: {last['user_answer']}\n"
+        f"Puntaje: {last['score']}/10 - Fortalezas: {', '.join(last['strengths'])} - "
+        f"Debilidades: {', '.join(last['weaknesses'])}"
+    )
 
+
+def _feedback_agent_request():
+    """
+    Builds the Feedback Agent input.
+
+    The analysis is memoized on the answer-history version: it is reused while
+    no new answers arrive, and refreshed with a single tool-less model call
+    when exactly one answer was added. Only larger changes run the full agent.
+
+    Returns:
+        Tuple (mode, payload, version). mode is "done" (payload is the state
+        update), "update" (payload is the model input) or "full" (payload is
+        the agent input).
+    """
     mcq_service = get_service()
     score_data = mcq_service.compute_user_score()
+    version = get_unified_perf_service().history_version()
 
     if score_data['total_questions'] < 3:
         log_feedback_agent("Historial insuficiente, omitiendo análisis detallado")
-        return {
+        return "done", {
             "user_feedback": "Usuario nuevo, sin suficiente historial para análisis",
             "messages": [AIMessage(content="Historial insuficiente para análisis")],
             "next_action": "create_question"
-        }
+        }, version
 
-    agent = create_feedback_agent()
+    memo = get_feedback_memo()
+    new_answers = memo.new_answers(version)
+
+    if new_answers == 0:
+        log_feedback_agent("Sin respuestas nuevas, reutilizando análisis previo")
+        return "done", {
+            "user_feedback": memo.analysis,
+            "messages": [AIMessage(content=memo.analysis)],
+            "next_action": "create_question"
+        }, version
+
+    if new_answers == 1:
+        log_feedback_agent("Una respuesta nueva, actualizando análisis previo")
+        message = (
+            f"Análisis anterior:\n{memo.analysis}\n\n"
+            f"Nueva respuesta:\n{_latest_answer_summary(memo.version, version)}"
+        )
+        return "update", [
+            SystemMessage(content=FEEDBACK_UPDATE_PROMPT),
+            HumanMessage(content=message)
+        ], version
 
     message = "Analiza el rendimiento del usuario e identifica patrones, fortalezas y áreas de mejora."
 
-    result = agent.invoke({
+    return "full", {
         "messages": [
             SystemMessage(content=FEEDBACK_AGENT_PROMPT),
             HumanMessage(content=message)
         ]
-    })
-    response_content = result["messages"][-1].content
+    }, version
+
+
+def _feedback_agent_result(response_content: str, version: tuple) -> dict:
+    get_feedback_memo().store(response_content, version)
 
     log_feedback_agent(f"Análisis: {response_content[:200]}...")
 
@@ -440,6 +630,288 @@ def feedback_agent_node(state: AgentState):
     }
 
 
+def feedback_agent_node(state: AgentState):
+    """Executes Feedback Agent."""
+    log_feedback_agent("Analizando patrones de aprendizaje del usuario...")
+
+    mode, payload, version = _feedback_agent_request()
+    if mode == "done":
+        return payload
+
+    if mode == "update":
+        response = get_model().invoke(payload)
+        return _feedback_agent_result(response.content, version)
+
+    agent = get_agent("feedback")
+    result = agent.invoke(payload)
+    return _feedback_agent_result(result["messages"][-1].content, version)
+
+
+async def afeedback_agent_node(state: AgentState):
+    """Async version of feedback_agent_node."""
+    log_feedback_agent("Analizando patrones de aprendizaje del usuario...")
+
+    mode, payload, version = _feedback_agent_request()
+    if mode == "done":
+        return payload
+
+    if mode == "update":
+        response = await get_model().ainvoke(payload)
+        return _feedback_agent_result(response.content, version)
+
+    agent = get_agent("feedback")
+    result = await agent.ainvoke(payload)
+    return _feedback_agent_result(result["messages"][-1].content, version)
+
+
+def _speculative_settings():
+    """
+    Candidates per wave and agent run cap for speculative question generation.
+
+    The cap counts agent runs, not model calls: a creator run that uses RAG
+    tools makes several model calls.
+    """
+    candidates = max(1, int(os.environ.get("SPECULATIVE_CANDIDATES", "3")))
+    # Each wave costs one creator run per candidate plus one batched review run
+    max_agent_runs = max(2, int(os.environ.get("SPECULATIVE_MAX_AGENT_RUNS", "8")))
+    return candidates, max_agent_runs
+
+
+def _candidate_request(state: AgentState, index: int, total: int) -> dict:
+    """Question Creator input for one candidate; the hint keeps candidates from converging."""
+    request = _question_creator_request(state)
+    hint = f"\n\n(Candidata {index + 1} de {total}: propone una pregunta distinta a las demás candidatas.)"
+    request["messages"][-1] = HumanMessage(content=request["messages"][-1].content + hint)
+    return request
+
+
+def _parse_candidate(result):
+    """Parses one creator result; returns None if the call failed or the output is invalid."""
+    if isinstance(result, Exception):
+        log_question_creator(f"Error al crear candidata: {str(result)}")
+        return None
+
+    try:
+        response_content = result["messages"][-1].content
+        if isinstance(response_content, QuestionOutput):
+            return response_content
+        return QuestionOutput(**extract_json_from_response(response_content))
+    except Exception as e:
+        log_question_creator(f"Candidata inválida: {str(e)}")
+        return None
+
+
+def _batch_review_request(candidates: list) -> dict:
+    """Difficulty Reviewer input with every candidate of the wave in a single call."""
+    unified_data = get_unified_perf_service().compute_unified_performance()
+    score_data = get_service().compute_user_score()
+    recent_correct = sum(1 for p in score_data['recent_performance'] if p['is_correct'])
+    recent_total = len(score_data['recent_performance'])
+
+    candidate_blocks = []
+    for i, candidate in enumerate(candidates):
+        options = "\n".join(f"{chr(65 + j)}) {option}" for j, option in enumerate(candidate.options))
+        candidate_blocks.append(
+            f"Candidata {i}: {candidate.question}\n{options}\n"
+            f"Respuesta correcta: {chr(65 + candidate.correct_index)}"
+        )
+
+    message = f"""Revisa las siguientes {len(candidates)} preguntas MCQ candidatas y determina cuáles tienen una dificultad apropiada.
+
+Contexto rápido: El usuario ha respondido {unified_data['total_questions']} preguntas totales.
+Rendimiento reciente MCQ: {recent_correct}/{recent_total} correctas en las últimas respuestas.
+Performance global: {unified_data['overall_percentage']:.1f}%
+
+{chr(10).join(candidate_blocks)}
+"""
+
+    return {
+        "messages": [
+            SystemMessage(content=BATCH_DIFFICULTY_REVIEWER_PROMPT),
+            HumanMessage(content=message)
+        ]
+    }
+
+
+def _rank_candidates(candidates: list, review_result) -> list:
+    """
+    Pairs each candidate with its review.
+
+    Returns:
+        List of (candidate, approved, score, feedback) in candidate order. If the
+        review call failed, candidates are approved by default (same policy as
+        difficulty_reviewer_node).
+    """
+    if isinstance(review_result, Exception):
+        log_difficulty_reviewer(f"Error: {str(review_result)}")
+        return [(candidate, True, 0.0, "Aprobada por defecto tras error") for candidate in candidates]
+
+    try:
+        response_content = review_result["messages"][-1].content
+        if isinstance(response_content, BatchDifficultyReviewOutput):
+            validated = response_content
+        else:
+            validated = BatchDifficultyReviewOutput(**extract_json_from_response(response_content))
+    except Exception as e:
+        log_difficulty_reviewer(f"Error: {str(e)}")
+        return [(candidate, True, 0.0, "Aprobada por defecto tras error") for candidate in candidates]
+
+    reviews = {review.index: review for review in validated.reviews}
+    ranked = []
+    for i, candidate in enumerate(candidates):
+        review = reviews.get(i)
+        if review is None:
+            ranked.append((candidate, False, 0.0, "Sin revisión"))
+        else:
+            ranked.append((candidate, review.approved, review.score, review.feedback))
+    return ranked
+
+
+def _speculative_plan(state: AgentState):
+    """
+    Speculative question generation as a generator of agent work orders.
+
+    Yields ("create", [agent inputs]) to run every candidate concurrently and
+    ("review", agent input) for the batched review, and receives the results
+    (exceptions are passed in as values). The sync and async nodes drive the
+    same plan, so the wave logic lives in one place.
+
+    Returns (via StopIteration) the state update.
+    """
+    n_candidates, max_agent_runs = _speculative_settings()
+    wave_state = dict(state)
+    agent_runs = 0
+    best = None
+    wave = 0
+
+    while max_agent_runs - agent_runs - 1 >= 1:
+        wave += 1
+        wave_size = min(n_candidates, max_agent_runs - agent_runs - 1)
+        log_question_creator(f"Oleada {wave}: generando {wave_size} candidata(s) en paralelo...")
+
+        results = yield ("create", [_candidate_request(wave_state, i, wave_size) for i in range(wave_size)])
+        agent_runs += wave_size
+
+        candidates = [candidate for candidate in map(_parse_candidate, results) if candidate]
+        if not candidates:
+            continue
+
+        review_result = yield ("review", _batch_review_request(candidates))
+        agent_runs += 1
+
+        ranked = _rank_candidates(candidates, review_result)
+        for candidate, approved, score, feedback in ranked:
+            if approved:
+                log_difficulty_reviewer(f"Decisión: ✓ APROBADA (oleada {wave}, {agent_runs} ejecuciones de agentes)")
+                log_difficulty_reviewer(f"Feedback: {feedback}")
+                return _speculative_update(candidate, feedback, agent_runs)
+
+        wave_best = max(ranked, key=lambda item: item[2])
+        if best is None or wave_best[2] > best[2]:
+            best = wave_best
+
+        log_difficulty_reviewer(f"⚠️  Oleada {wave} rechazada. Feedback: {wave_best[3]}")
+        wave_state["difficulty_feedback"] = wave_best[3]
+
+    if best is not None:
+        log_difficulty_reviewer("Presupuesto de ejecuciones agotado, presentando la mejor candidata...")
+        return _speculative_update(best[0], "Aprobada tras agotar el presupuesto de candidatas", agent_runs)
+
+    log_question_creator("No se pudo generar ninguna candidata válida")
+    return {
+        "question_approved": False,
+        "agent_runs": agent_runs,
+        "messages": [AIMessage(content="Error al crear pregunta: ninguna candidata válida")],
+        "next_action": "end"
+    }
+
+
+def _speculative_update(candidate: QuestionOutput, feedback: str, agent_runs: int) -> dict:
+    log_question_creator(f"Pregunta creada: {candidate.question}")
+    return {
+        "current_question": candidate.question,
+        "question_options": candidate.options,
+        "question_correct_index": candidate.correct_index,
+        "question_approved": True,
+        "difficulty_feedback": feedback,
+        "agent_runs": agent_runs,
+        "messages": [AIMessage(content=f"Pregunta aprobada: {feedback}")],
+        "next_action": "present_question"
+    }
+
+
+def _invoke_capturing(agent, agent_input):
+    try:
+        return agent.invoke(agent_input)
+    except Exception as e:
+        return e
+
+
+def speculative_question_node(state: AgentState):
+    """
+    Creates MCQ candidates concurrently and reviews them in one batched call.
+
+    Replaces the create → review → retry loop with parallel waves, capped
+    by SPECULATIVE_MAX_AGENT_RUNS.
+    """
+    log_question_creator("Iniciando creación especulativa de preguntas...")
+    creator = get_agent("question_creator")
+    reviewer = get_agent("difficulty_reviewer")
+
+    plan = _speculative_plan(state)
+    order = next(plan)
+    while True:
+        kind, payload = order
+        if kind == "create":
+            # Each thread runs in a copy of the session context (services are ContextVars)
+            with ThreadPoolExecutor(max_workers=len(payload)) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, _invoke_capturing, creator, agent_input)
+                    for agent_input in payload
+                ]
+                result = [future.result() for future in futures]
+        else:
+            result = _invoke_capturing(reviewer, payload)
+
+        try:
+            order = plan.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+
+async def aspeculative_question_node(state: AgentState):
+    """Async version of speculative_question_node."""
+    log_question_creator("Iniciando creación especulativa de preguntas...")
+    creator = get_agent("question_creator")
+    reviewer = get_agent("difficulty_reviewer")
+
+    plan = _speculative_plan(state)
+    order = next(plan)
+    while True:
+        kind, payload = order
+        if kind == "create":
+            result = await asyncio.gather(
+                *(creator.ainvoke(agent_input) for agent_input in payload),
+                return_exceptions=True
+            )
+        else:
+            try:
+                result = await reviewer.ainvoke(payload)
+            except Exception as e:
+                result = e
+
+        try:
+            order = plan.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+
+def route_after_speculative_creation(state: AgentState) -> Literal["present_question", "end"]:
+    if state.get("question_approved", False):
+        return "present_question"
+    return "end"
+
+
 def orchestrator_node(state: AgentState):
     """Executes Orchestrator agent."""
     log_orchestrator("Procesando solicitud del usuario...")
@@ -458,81 +930,46 @@ def orchestrator_node(state: AgentState):
     )
 
     # Route based on user request
-    if "pregunta" in user_request or "question" in user_request or "nueva" in user_request:
-        log_orchestrator("Solicitud de nueva pregunta detectada")
-
-        # Decide question type based on performance
-        overall_percentage = unified_data['overall_percentage']
-        threshold = float(os.environ.get("OPEN_ENDED_THRESHOLD", "70.0"))
-
-        if use_open_ended and overall_percentage >= threshold:
-            log_orchestrator(
-                f"✓ Performance >= {threshold}% ({overall_percentage:.1f}%) - "
-                "Usuario calificado para preguntas abiertas"
-            )
-            question_decision = "open"
-        else:
-            if use_open_ended and overall_percentage < threshold:
-                log_orchestrator(
-                    f"✗ Performance < {threshold}% ({overall_percentage:.1f}%) - "
-                    "Manteniendo preguntas MCQ"
-                )
-            question_decision = "mcq"
-
-        # Decide if feedback analysis is needed
-        if unified_data['total_questions'] >= 3:
-            log_orchestrator("Historial suficiente, consultando Feedback Agent")
-            return {
-                "next_action": "get_feedback",
-                "question_type_decision": question_decision
-            }
-        else:
-            log_orchestrator(f"Creando pregunta tipo: {question_decision}")
-            return {
-                "next_action": f"create_{question_decision}_question",
-                "question_type_decision": question_decision
-            }
-
-    elif "rendimiento" in user_request or "puntaje" in user_request or "score" in user_request:
+    if is_performance_request(user_request):
         log_orchestrator("Solicitud de rendimiento detectada")
         performance = get_unified_performance()
         log_user_output(performance)
         return {"next_action": "end", "messages": [AIMessage(content=performance)]}
 
+    if is_question_request(user_request):
+        log_orchestrator("Solicitud de nueva pregunta detectada")
     else:
         log_orchestrator("Solicitud general de pregunta")
 
-        # Decide question type based on performance (same logic as keyword match)
-        overall_percentage = unified_data['overall_percentage']
-        threshold = float(os.environ.get("OPEN_ENDED_THRESHOLD", "70.0"))
+    # Decide question type based on performance
+    overall_percentage = unified_data['overall_percentage']
+    threshold = float(os.environ.get("OPEN_ENDED_THRESHOLD", "70.0"))
+    question_decision = question_type_decision(overall_percentage)
 
-        if use_open_ended and overall_percentage >= threshold:
-            log_orchestrator(
-                f"✓ Performance >= {threshold}% ({overall_percentage:.1f}%) - "
-                "Usuario calificado para preguntas abiertas"
-            )
-            question_decision = "open"
-        else:
-            if use_open_ended and overall_percentage < threshold:
-                log_orchestrator(
-                    f"✗ Performance < {threshold}% ({overall_percentage:.1f}%) - "
-                    "Manteniendo preguntas MCQ"
-                )
-            question_decision = "mcq"
-
-        # Decide if feedback analysis is needed
-        if unified_data['total_questions'] >= 3:
-            log_orchestrator("Historial suficiente, consultando Feedback Agent")
-            return {
-                "next_action": "get_feedback",
-                "question_type_decision": question_decision
-            }
-        else:
-            log_orchestrator(f"Creando pregunta tipo: {question_decision}")
-            return {
-                "next_action": f"create_{question_decision}_question",
-                "question_type_decision": question_decision
-            }
+    if question_decision == "open":
+        log_orchestrator(
+            f"✓ Performance >= {threshold}% ({overall_percentage:.1f}%) - "
+            "Usuario calificado para preguntas abiertas"
+        )
+    elif use_open_ended:
+        log_orchestrator(
+            f"✗ Performance < {threshold}% ({overall_percentage:.1f}%) - "
+            "Manteniendo preguntas MCQ"
+        )
+
+    # Decide if feedback analysis is needed
+    if unified_data['total_questions'] >= 3:
+        log_orchestrator("Historial suficiente, consultando Feedback Agent")
+        return {
+            "next_action": "get_feedback",
+            "question_type_decision": question_decision
+        }
+
+    log_orchestrator(f"Creando pregunta tipo: {question_decision}")
+    return {
+        "next_action": f"create_{question_decision}_question",
+        "question_type_decision": question_decision
+    }
 
 
 def present_question_node(state: AgentState):
@@ -0,0 +1,173 @@
+"""Background pre-generation of reviewed questions per session."""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from typing import Deque, NamedTuple, Optional
+from langchain_core.messages import HumanMessage
+from services.service_manager import get_unified_performance
+from final.logs import log_prefetcher
+from final.routing import question_type_decision, route_request
+
+
+class PrefetchedQuestion(NamedTuple):
+    """Approved question waiting to be served, with the performance and question type it was built for."""
+    state: dict
+    performance: float
+    route: str
+    created_at: float
+
+
+class QuestionPrefetcher:
+    """
+    Keeps a small queue of reviewed questions ready for one session.
+
+    Questions are generated in the background with a workflow built with
+    present=False (approved but not registered), from the current
+    UnifiedPerformanceService snapshot. When an answer shifts the overall
+    performance by more than shift_threshold points, or across the point
+    where the orchestrator switches question type, queued questions built
+    for the old level are discarded and regenerated. Only MCQ questions are
+    queued: open-ended requests always run the workflow.
+
+    Must be created inside the session (after initialize_session_services):
+    the session's services and ContextVars are captured at construction and
+    reused by every background generation.
+    """
+
+    def __init__(self, workflow, target_size: Optional[int] = None, shift_threshold: Optional[float] = None):
+        """
+        Args:
+            workflow: Compiled workflow from build_workflow(present=False)
+            target_size: Questions to keep ready (default: PREFETCH_QUEUE_SIZE or 2)
+            shift_threshold: Performance change, in percentage points, that
+                invalidates a queued question (default: PREFETCH_SHIFT_THRESHOLD or 10)
+        """
+        self.workflow = workflow
+        self.target_size = target_size if target_size is not None else int(os.getenv("PREFETCH_QUEUE_SIZE", "2"))
+        self.shift_threshold = (
+            shift_threshold if shift_threshold is not None
+            else float(os.getenv("PREFETCH_SHIFT_THRESHOLD", "10.0"))
+        )
+        self._performance_service = get_unified_performance()
+        self._context = contextvars.copy_context()
+        self._ready: Deque[PrefetchedQuestion] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"served": 0, "misses": 0, "generated": 0, "invalidated": 0, "failed": 0}
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    def _current_performance(self) -> float:
+        return self._performance_service.compute_unified_performance()['overall_percentage']
+
+    def _fits(self, question: PrefetchedQuestion, performance: float) -> bool:
+        # The question type must still be the one the orchestrator would choose now
+        return (
+            question.route == question_type_decision(performance)
+            and abs(performance - question.performance) <= self.shift_threshold
+        )
+
+    def start(self):
+        """Starts filling the queue in the background if it is not full."""
+        if self.target_size <= 0 or len(self._ready) >= self.target_size:
+            return
+        if self._task is None or self._task.done():
+            # La tarea copia el contexto de la sesión, no el del mensaje que la dispara
+            self._task = self._context.run(asyncio.create_task, self._fill())
+
+    async def _fill(self):
+        failures = 0
+        while len(self._ready) < self.target_size and failures < 2:
+            snapshot = self._current_performance()
+            if question_type_decision(snapshot) != "mcq":
+                # serve() never hands out open-ended questions
+                return
+            try:
+                result = await self.workflow.ainvoke({
+                    "messages": [HumanMessage(content="nueva pregunta")],
+                    "iteration_count": 0
+                })
+            except Exception as e:
+                log_prefetcher(f"Error generando pregunta: {str(e)}")
+                self.stats["failed"] += 1
+                failures += 1
+                continue
+
+            if not result.get("question_approved"):
+                self.stats["failed"] += 1
+                failures += 1
+                continue
+
+            # The orchestrator decided the type from the performance it read itself
+            question = PrefetchedQuestion(
+                result, snapshot, result.get("question_type_decision", "mcq"), time.time()
+            )
+            # El rendimiento pudo cambiar mientras se generaba
+            if not self._fits(question, self._current_performance()):
+                self.stats["invalidated"] += 1
+                failures += 1
+                continue
+
+            self._ready.append(question)
+            self.stats["generated"] += 1
+            log_prefetcher(f"Pregunta lista ({len(self._ready)}/{self.target_size} en cola)")
+
+    def pop(self) -> Optional[dict]:
+        """
+        Takes the next ready question and schedules a refill.
+
+        Returns:
+            Final workflow state of the approved question, or None if the queue
+            is empty (the caller then runs the workflow as usual)
+        """
+        performance = self._current_performance()
+        while self._ready:
+            question = self._ready.popleft()
+            if self._fits(question, performance):
+                self.stats["served"] += 1
+                self.start()
+                return question.state
+            self.stats["invalidated"] += 1
+
+        self.stats["misses"] += 1
+        self.start()
+        return None
+
+    def serve(self, user_input: str) -> Optional[dict]:
+        """
+        Takes a ready question only if the orchestrator would route the request
+        to a new MCQ question; performance and open-ended requests leave the
+        queue untouched.
+
+        Returns:
+            Final workflow state of the approved question, or None if the request
+            is not an MCQ request or the queue is empty
+        """
+        if route_request(user_input, self._current_performance()) != "mcq":
+            return None
+        return self.pop()
+
+    def on_performance_change(self):
+        """Discards queued questions that no longer fit the student's level and refills."""
+        performance = self._current_performance()
+        kept = deque(question for question in self._ready if self._fits(question, performance))
+
+        dropped = len(self._ready) - len(kept)
+        if dropped:
+            log_prefetcher(f"{dropped} pregunta(s) invalidada(s) por cambio de rendimiento ({performance:.1f}%)")
+            self.stats["invalidated"] += dropped
+        self._ready = kept
+        self.start()
+
+    async def close(self):
+        """Cancels the background generation (call at session end)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._ready.clear()
@@ -141,6 +141,24 @@ Devuelve tu respuesta en este formato JSON exacto:
 }"""
 
 
+BATCH_DIFFICULTY_REVIEWER_PROMPT = DIFFICULTY_REVIEWER_PROMPT.split("Devuelve tu respuesta")[0] + """REVISIÓN EN LOTE:
+- Recibirás VARIAS preguntas candidatas numeradas desde 0
+- Evalúa cada candidata de forma independiente con los criterios anteriores
+- Asigna a cada una un puntaje de 0.0 a 10.0 según qué tan bien se ajusta al nivel del usuario
+
+Devuelve tu respuesta en este formato JSON exacto:
+{
+    "reviews": [
+        {
+            "index": 0,
+            "approved": true/false,
+            "score": 0.0-10.0,
+            "feedback": "explicación breve de por qué la candidata es/no es apropiada"
+        }
+    ]
+}"""
+
+
 FEEDBACK_AGENT_PROMPT = """Eres un experto en análisis de patrones de aprendizaje. Tu trabajo es:
 
 1. Analizar el historial de respuestas del usuario usando get_performance_tool y get_history_tool
@@ -163,6 +181,16 @@ Devuelve insights útiles sobre:
 Sé constructivo y específico con referencias al contenido del curso."""
 
 
+FEEDBACK_UPDATE_PROMPT = """Eres un experto en análisis de patrones de aprendizaje. Ya hiciste un análisis completo del historial del usuario y desde entonces respondió UNA pregunta más.
+
+Actualiza el análisis anterior con esa respuesta:
+- Mantén las fortalezas, debilidades y referencias al contenido que siguen vigentes
+- Ajusta las conclusiones que la nueva respuesta confirma o contradice
+- Si la respuesta revela un error nuevo, agrégalo como área a reforzar
+
+Devuelve SOLO el análisis actualizado, con el mismo formato que el anterior."""
+
+
 ORCHESTRATOR_PROMPT = """Eres el orquestador principal del sistema de generación de preguntas. Tu trabajo es:
 
 1. Recibir solicitudes del usuario
@@ -1,13 +1,27 @@
 """RAG (Retrieval Augmented Generation) module for intelligent content retrieval."""
 
-from final.rag.embeddings import EmbeddingModel
+from final.rag.embeddings import EmbeddingModel, get_shared_model, warmup_embedding_model, get_model_stats
+from final.rag.embedding_cache import EmbeddingCache, get_query_cache
 from final.rag.vector_store import ChromaVectorStore
 from final.rag.indexer import ContentIndexer
-from final.rag.retriever import ContentRetriever
+from final.rag.retriever import ContentRetriever, RetrievedChunk, RetrievalResult
+from final.rag.pipeline import IngestionPipeline
+from final.rag.spans import SourceSpanReader
+from final.rag.lexical_index import BM25Index
 
 __all__ = [
     'EmbeddingModel',
+    'get_shared_model',
+    'warmup_embedding_model',
+    'get_model_stats',
+    'EmbeddingCache',
+    'get_query_cache',
     'ChromaVectorStore',
     'ContentIndexer',
-    'ContentRetriever'
+    'ContentRetriever',
+    'RetrievedChunk',
+    'RetrievalResult',
+    'IngestionPipeline',
+    'SourceSpanReader',
+    'BM25Index'
 ]
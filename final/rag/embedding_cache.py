@@ -0,0 +1,193 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+def normalize_query_text(text: str) -> str:
+    """Normaliza una query para usarla como clave de cache (unicode NFC + espacios colapsados)."""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    Cache LRU + TTL thread-safe para embeddings de queries.
+
+    Las claves son (model_name, texto normalizado). Opcionalmente persiste
+    los vectores en un archivo SQLite para que sobrevivan reinicios.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        disk_path: Optional[str] = None
+    ):
+        """
+        Args:
+            max_size: Cantidad máxima de embeddings en memoria
+            ttl_seconds: Tiempo de vida de cada entrada (None = sin expiración)
+            disk_path: Ruta a un archivo SQLite para la capa persistente (opcional)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._db = None
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model_name TEXT NOT NULL, "
+                "text TEXT NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "PRIMARY KEY (model_name, text))"
+            )
+            self._db.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """
+        Busca el embedding de una query.
+
+        Args:
+            model_name: Modelo que generó el embedding
+            text: Texto de la query (se normaliza internamente)
+
+        Returns:
+            Vector float32 cacheado (solo lectura) o None si no existe o expiró
+        """
+        key = (model_name, normalize_query_text(text))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, vector = entry
+                if not self._is_expired(created_at):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return vector
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, created_at FROM query_embeddings WHERE model_name = ? AND text = ?",
+                    key
+                ).fetchone()
+                if row is not None and not self._is_expired(row[1]):
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._store_in_memory(key, row[1], vector)
+                    self._disk_hits += 1
+                    return vector
+
+            self._misses += 1
+            return None
+
+    def put(self, model_name: str, text: str, vector: np.ndarray):
+        """
+        Guarda el embedding de una query.
+
+        Args:
+            model_name: Modelo que generó el embedding
+            text: Texto de la query (se normaliza internamente)
+            vector: Vector de embedding (se guarda como float32 de solo lectura)
+        """
+        key = (model_name, normalize_query_text(text))
+        created_at = time.time()
+
+        # Los vectores se comparten entre threads, así que se congelan
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+
+        with self._lock:
+            self._store_in_memory(key, created_at, vector)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model_name, text, vector, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (*key, vector.tobytes(), created_at)
+                )
+                self._db.commit()
+
+    def _store_in_memory(self, key: Tuple[str, str], created_at: float, vector: np.ndarray):
+        self._entries[key] = (created_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """Vacía la cache en memoria y en disco, y resetea los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._disk_hits = self._misses = self._evictions = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de uso de la cache.
+
+        Returns:
+            Diccionario con hits, disk_hits, misses, evictions, size y hit_rate
+        """
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_rate": (self._hits + self._disk_hits) / lookups if lookups else 0.0
+            }
+
+
+_query_cache: Optional[EmbeddingCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> EmbeddingCache:
+    """
+    Retorna la cache de embeddings de queries compartida por el proceso.
+
+    Se configura con las variables de entorno:
+        EMBEDDING_CACHE_SIZE: Máximo de entradas en memoria (default 1024)
+        EMBEDDING_CACHE_TTL: Segundos de vida por entrada (default sin expiración)
+        EMBEDDING_CACHE_PATH: Archivo SQLite para la capa en disco (default deshabilitada)
+    """
+    global _query_cache
+
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                ttl = os.environ.get("EMBEDDING_CACHE_TTL")
+                _query_cache = EmbeddingCache(
+                    max_size=int(os.environ.get("EMBEDDING_CACHE_SIZE", "1024")),
+                    ttl_seconds=float(ttl) if ttl else None,
+                    disk_path=os.environ.get("EMBEDDING_CACHE_PATH") or None
+                )
+
+    return _query_cache
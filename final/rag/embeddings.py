@@ -1,51 +1,245 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import Dict, List, Optional
+from final.rag.embedding_cache import EmbeddingCache, get_query_cache
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Registro de modelos compartido por todo el proceso (threads y sesiones de Chainlit)
+_models: Dict[str, SentenceTransformer] = {}
+_model_stats: Dict[str, Dict] = {}
+_models_lock = threading.Lock()
+
+
+def _current_rss_mb() -> Optional[float]:
+    """Retorna la memoria residente actual del proceso en MB (None si la plataforma no la expone)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Retorna el pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _round_mb(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def get_shared_model(model_name: str = DEFAULT_MODEL_NAME) -> SentenceTransformer:
+    """
+    Obtiene el modelo de Sentence Transformers compartido del proceso.
+
+    El modelo se carga una única vez y se reutiliza en modo solo lectura
+    desde cualquier thread o sesión.
+
+    Args:
+        model_name: Nombre del modelo a cargar
+
+    Returns:
+        Instancia compartida del modelo
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is not None:
+            return model
+
+        print(f"🔧 Cargando modelo de embeddings: {model_name}...")
+        rss_before = _current_rss_mb()
+        start = time.perf_counter()
+
+        model = SentenceTransformer(model_name)
+        model.eval()
+
+        load_seconds = time.perf_counter() - start
+        rss_after = _current_rss_mb()
+
+        _model_stats[model_name] = {
+            "load_seconds": round(load_seconds, 2),
+            "warmup_seconds": None,
+            "rss_mb": _round_mb(rss_after),
+            "rss_delta_mb": (
+                round(rss_after - rss_before, 1)
+                if rss_before is not None and rss_after is not None else None
+            ),
+            "peak_rss_mb": _round_mb(_peak_rss_mb())
+        }
+        _models[model_name] = model
+
+        print(
+            f"✅ Modelo de embeddings cargado en {load_seconds:.2f}s"
+            + (f" (RSS: {rss_after:.0f} MB)" if rss_after is not None else "")
+        )
+        return model
+
+
+def warmup_embedding_model(model_name: str = DEFAULT_MODEL_NAME) -> Dict:
+    """
+    Carga el modelo y ejecuta un encode de prueba para que la primera
+    request real no pague la inicialización de torch.
+
+    Args:
+        model_name: Nombre del modelo a precalentar
+
+    Returns:
+        Estadísticas del modelo (ver get_model_stats)
+    """
+    model = get_shared_model(model_name)
+
+    stats = _model_stats[model_name]
+    if stats["warmup_seconds"] is None:
+        start = time.perf_counter()
+        model.encode("warmup", show_progress_bar=False, convert_to_numpy=True)
+        stats["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+        stats["rss_mb"] = _round_mb(_current_rss_mb())
+        stats["peak_rss_mb"] = _round_mb(_peak_rss_mb())
+
+        print(f"🔥 Modelo {model_name} precalentado en {stats['warmup_seconds']}s")
+
+    return get_model_stats()[model_name]
+
+
+def get_model_stats() -> Dict[str, Dict]:
+    """
+    Retorna tiempos de carga y memoria residente de los modelos cargados.
+
+    rss_mb y rss_delta_mb son la memoria residente actual (None donde no hay
+    /proc, p. ej. macOS); peak_rss_mb es el pico del proceso hasta ese momento.
+
+    Returns:
+        Diccionario con {model_name: {load_seconds, warmup_seconds, rss_mb, rss_delta_mb, peak_rss_mb}}
+    """
+    return {name: dict(stats) for name, stats in _model_stats.items()}
 
 
 class EmbeddingModel:
     """Wrapper para el modelo de embeddings usando Sentence Transformers."""
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        print(f"🔧 Cargando modelo de embeddings: {model_name}...")
-        self.model = SentenceTransformer(model_name)
-        print("✅ Modelo de embeddings cargado")
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        query_cache: Optional[EmbeddingCache] = None
+    ):
+        """
+        Args:
+            model_name: Nombre del modelo de Sentence Transformers
+            query_cache: Cache de embeddings de queries (default: la cache compartida del proceso)
+        """
+        self.model_name = model_name
+        self.model = get_shared_model(model_name)
+        self.query_cache = query_cache if query_cache is not None else get_query_cache()
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+    @property
+    def dimension(self) -> int:
+        """Dimensión de los vectores generados por el modelo."""
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed_documents(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
         """
         Genera embeddings para una lista de documentos.
 
         Args:
             texts: Lista de textos a embedear
+            batch_size: Tamaño de batch para el encoder
 
         Returns:
-            Lista de vectores de embeddings
+            Matriz float32 contigua de forma (len(texts), dimension)
         """
         if not texts:
-            return []
+            return np.empty((0, self.dimension), dtype=np.float32)
 
         embeddings = self.model.encode(
             texts,
+            batch_size=batch_size,
             show_progress_bar=False,
             convert_to_numpy=True
         )
-        return embeddings.tolist()
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
 
-    def embed_query(self, text: str) -> List[float]:
+    def embed_query(self, text: str) -> np.ndarray:
         """
         Genera embedding para una query individual.
 
+        Las queries repetidas se sirven desde la cache sin pasar por el modelo.
+
         Args:
             text: Texto de la query
 
         Returns:
-            Vector de embedding
+            Vector float32 de forma (dimension,), de solo lectura; para un
+            texto vacío, un vector vacío (los llamadores no deben consultar con él)
         """
         if not text:
-            return []
+            return np.empty((0,), dtype=np.float32)
 
-        embedding = self.model.encode(
-            text,
-            show_progress_bar=False,
-            convert_to_numpy=True
+        cached = self.query_cache.get(self.model_name, text)
+        if cached is not None:
+            return cached
+
+        embedding = np.ascontiguousarray(
+            self.model.encode(
+                text,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            ),
+            dtype=np.float32
         )
-        return embedding.tolist()
+        embedding.flags.writeable = False
+        self.query_cache.put(self.model_name, text, embedding)
+        return embedding
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Genera embeddings para varias queries en una sola pasada del encoder.
+
+        Las queries ya cacheadas no se vuelven a calcular; el resto se
+        codifica en un único batch.
+
+        Args:
+            texts: Lista de queries
+
+        Returns:
+            Matriz float32 contigua de forma (len(texts), dimension)
+        """
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self.query_cache.get(self.model_name, text) if text else None
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.append(i)
+
+        if missing:
+            encoded = self.model.encode(
+                [texts[i] for i in missing],
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+            for i, vector in zip(missing, encoded):
+                embeddings[i] = vector
+                if texts[i]:
+                    self.query_cache.put(self.model_name, texts[i], embeddings[i])
+
+        return embeddings
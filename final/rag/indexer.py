@@ -1,20 +1,100 @@
+import hashlib
+import json
 import os
-from typing import List, Tuple, Dict
+import re
+from typing import List, NamedTuple, Tuple, Dict, Optional, Union
 from final.rag.vector_store import ChromaVectorStore
+from final.rag.spans import Buffer, open_source
+
+MANIFEST_FILE_NAME = "index_manifest.json"
+
+# Se incrementa cuando cambia el algoritmo de chunking para invalidar el manifest
+CHUNKER_VERSION = 3
+
+# Los patrones de str y de bytes UTF-8 deben cortar igual: espacios solo ASCII
+# (el NBSP es parte de la palabra) y el » de cierre como secuencia de bytes
+_WORD_PATTERN = {str: re.compile(r"\S+", re.ASCII), bytes: re.compile(rb"\S+")}
+_SENTENCE_END_PATTERN = {
+    str: re.compile(r"[.!?:;](?:[\"')\]]|»)*$"),
+    bytes: re.compile(rb"[.!?:;](?:[\"')\]]|\xc2\xbb)*$")
+}
+_NEWLINE = {str: "\n", bytes: b"\n"}
+
+# Fuerza de un corte antes de una palabra
+_BREAK_NONE = 0
+_BREAK_LINE = 1
+_BREAK_SENTENCE = 2
+_BREAK_SECTION = 3
+
+
+class Chunk(NamedTuple):
+    """Fragmento de un archivo con sus offsets en el texto original."""
+    text: str
+    start_char: int
+    end_char: int
+    start_byte: int
+    end_byte: int
+    word_count: int
+
+
+def chunking_params(chunk_size: int, overlap: int) -> Dict:
+    """Parámetros de chunking que se guardan en el manifest."""
+    return {"chunk_size": chunk_size, "overlap": overlap, "chunker": CHUNKER_VERSION}
+
+
+class _OffsetTranslator:
+    """
+    Convierte offsets crecientes entre unidades de un buffer (caracteres de un
+    str o bytes de un buffer UTF-8) avanzando un cursor, en tiempo lineal total.
+    """
+
+    def __init__(self, buffer: Union[str, Buffer]):
+        self.buffer = buffer
+        self.is_text = isinstance(buffer, str)
+        self.position = 0
+        self.translated = 0
+
+    def translate(self, position: int) -> int:
+        segment = self.buffer[self.position:position]
+        if self.is_text:
+            self.translated += len(segment.encode('utf-8'))
+        else:
+            self.translated += len(bytes(segment).decode('utf-8'))
+        self.position = position
+        return self.translated
+
+
+def compute_chunk_id(file_path: str, chunk: str) -> str:
+    """Genera un ID estable para un chunk a partir de su contenido."""
+    digest = hashlib.sha1(chunk.encode('utf-8')).hexdigest()[:16]
+    return f"{os.path.basename(file_path)}_{digest}"
 
 
 class ContentIndexer:
     """Indexa el contenido del curso en ChromaDB."""
 
-    def __init__(self, vector_store: ChromaVectorStore):
+    def __init__(
+        self,
+        vector_store: ChromaVectorStore,
+        manifest_path: Optional[str] = None
+    ):
+        """
+        Args:
+            vector_store: Vector store donde se indexa el contenido
+            manifest_path: Ruta del manifest de indexación incremental
+                (default: index_manifest.json dentro del directorio de ChromaDB)
+        """
         self.vector_store = vector_store
+        if manifest_path is None and vector_store is not None:
+            manifest_path = os.path.join(vector_store.persist_directory, MANIFEST_FILE_NAME)
+        self.manifest_path = manifest_path
 
     def chunk_text(
         self,
         text: str,
         chunk_size: int = 500,
         overlap: int = 100
-    ) -> List[Tuple[str, int]]:
+    ) -> List[Chunk]:
         """
         Divide el texto en chunks con overlap para mantener contexto.
 
@@ -24,18 +104,134 @@ class ContentIndexer:
             overlap: Número de palabras de overlap entre chunks
 
         Returns:
-            Lista de tuplas (chunk_text, start_position)
+            Lista de Chunk con el texto original y sus offsets (caracteres y bytes UTF-8)
         """
-        words = text.split()
-        chunks = []
+        return self.chunk_buffer(text, chunk_size=chunk_size, overlap=overlap)
 
-        if len(words) == 0:
-            return chunks
+    def chunk_file(
+        self,
+        file_path: str,
+        chunk_size: int = 500,
+        overlap: int = 100
+    ) -> List[Chunk]:
+        """
+        Divide un archivo en chunks leyendo desde un mmap: solo se decodifican
+        los spans de cada chunk, no el archivo completo.
 
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            if chunk.strip():  # Solo agregar chunks no vacíos
-                chunks.append((chunk, i))
+        Args:
+            file_path: Ruta al archivo
+            chunk_size: Tamaño del chunk en palabras
+            overlap: Número de palabras de overlap entre chunks
+
+        Returns:
+            Lista de Chunk con el texto original y sus offsets
+        """
+        with open_source(file_path) as buffer:
+            return self.chunk_buffer(buffer, chunk_size=chunk_size, overlap=overlap)
+
+    def chunk_buffer(
+        self,
+        buffer: Union[str, Buffer],
+        chunk_size: int = 500,
+        overlap: int = 100
+    ) -> List[Chunk]:
+        """
+        Chunker en una sola pasada sobre un str o un buffer de bytes UTF-8.
+
+        Cada chunk apunta ~chunk_size palabras y su final se ajusta (dentro de
+        un margen del 20%) al mejor límite disponible: sección (línea en blanco),
+        oración o salto de línea. El siguiente chunk retrocede `overlap` palabras
+        y arranca, si puede, en el límite más fuerte cercano. Una cola corta se absorbe
+        en el último chunk en lugar de generar un chunk casi duplicado.
+
+        Args:
+            buffer: Texto (str) o contenido crudo en bytes (p. ej. un mmap)
+            chunk_size: Tamaño del chunk en palabras
+            overlap: Número de palabras de overlap entre chunks
+
+        Returns:
+            Lista de Chunk; text es exactamente el span original (whitespace incluido)
+        """
+        if overlap >= chunk_size:
+            raise ValueError("overlap debe ser menor que chunk_size")
+
+        kind = str if isinstance(buffer, str) else bytes
+        sentence_end = _SENTENCE_END_PATTERN[kind]
+        newline = _NEWLINE[kind]
+
+        # Única pasada: offsets de cada palabra y fuerza del corte antes de ella
+        starts, ends, breaks = [], [], []
+        previous_end = 0
+        for match in _WORD_PATTERN[kind].finditer(buffer):
+            if starts:
+                first_newline = buffer.find(newline, previous_end, match.start())
+                if first_newline != -1 and buffer.find(newline, first_newline + 1, match.start()) != -1:
+                    breaks.append(_BREAK_SECTION)
+                elif sentence_end.search(buffer, starts[-1], ends[-1]):
+                    breaks.append(_BREAK_SENTENCE)
+                elif first_newline != -1:
+                    breaks.append(_BREAK_LINE)
+                else:
+                    breaks.append(_BREAK_NONE)
+            else:
+                breaks.append(_BREAK_SECTION)
+            starts.append(match.start())
+            ends.append(match.end())
+            previous_end = match.end()
+
+        n_words = len(starts)
+        if n_words == 0:
+            return []
+
+        slack = max(1, chunk_size // 5)
+        spans = []
+        start = 0
+        previous_end = 0
+        while start < n_words:
+            end = min(start + chunk_size, n_words)
+
+            if n_words - end <= slack:
+                # Absorber la cola corta en este chunk
+                end = n_words
+            else:
+                # Mejor corte en [end - slack, end]: el más fuerte y, a igual fuerza, el más tardío
+                best = end
+                best_strength = _BREAK_NONE
+                # Nunca cortar antes del final del chunk anterior (evita chunks contenidos en otros)
+                for candidate in range(end, max(start + 1, previous_end + 1, end - slack) - 1, -1):
+                    if breaks[candidate] > best_strength:
+                        best, best_strength = candidate, breaks[candidate]
+                end = best
+
+            spans.append((start, end))
+            if end >= n_words:
+                break
+            previous_end = end
+
+            next_start = max(start + 1, end - overlap)
+            # Arrancar el próximo chunk en el límite más fuerte cercano (el más temprano a igual fuerza)
+            best_strength = _BREAK_NONE
+            for candidate in range(next_start, min(end, next_start + slack)):
+                if breaks[candidate] > best_strength:
+                    start, best_strength = candidate, breaks[candidate]
+            if best_strength == _BREAK_NONE:
+                start = next_start
+
+        # Traducir offsets (crecientes) entre caracteres y bytes
+        start_translator = _OffsetTranslator(buffer)
+        end_translator = _OffsetTranslator(buffer)
+        chunks = []
+        for first, last in spans:
+            start_offset, end_offset = starts[first], ends[last - 1]
+            other_start = start_translator.translate(start_offset)
+            other_end = end_translator.translate(end_offset)
+
+            if kind is str:
+                text = buffer[start_offset:end_offset]
+                chunks.append(Chunk(text, start_offset, end_offset, other_start, other_end, last - first))
+            else:
+                text = bytes(buffer[start_offset:end_offset]).decode('utf-8')
+                chunks.append(Chunk(text, other_start, other_end, start_offset, end_offset, last - first))
 
         return chunks
 
@@ -60,41 +256,220 @@ class ContentIndexer:
             raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
 
         print(f"📖 Leyendo archivo: {file_path}")
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        print(f"📄 Archivo leído: {len(content)} caracteres")
+        print(f"📄 Archivo: {os.path.getsize(file_path)} bytes")
 
         # Dividir en chunks
         print(f"✂️  Dividiendo en chunks (size={chunk_size}, overlap={overlap})...")
-        chunks = self.chunk_text(content, chunk_size=chunk_size, overlap=overlap)
+        chunks = self.chunk_file(file_path, chunk_size=chunk_size, overlap=overlap)
         print(f"✅ {len(chunks)} chunks creados")
 
         if len(chunks) == 0:
             print("⚠️  No se crearon chunks, archivo vacío")
             return 0
 
-        # Preparar datos para ChromaDB
-        texts = [chunk[0] for chunk in chunks]
+        texts, metadatas, ids = self.build_chunk_records(file_path, chunks)
+
+        # Agregar a ChromaDB
+        self.vector_store.add_documents(texts, metadatas, ids)
+        self.vector_store.save_lexical_index()
+
+        return len(chunks)
+
+    def build_chunk_records(
+        self,
+        file_path: str,
+        chunks: List[Chunk]
+    ) -> Tuple[List[str], List[Dict], List[str]]:
+        """
+        Prepara textos, metadatos e IDs (derivados del contenido) para ChromaDB.
+
+        Los metadatos guardan los offsets del span original, de modo que el
+        texto exacto se puede recuperar del archivo (ver SourceSpanReader).
+
+        Args:
+            file_path: Archivo de origen de los chunks
+            chunks: Lista de Chunk
+
+        Returns:
+            Tupla (texts, metadatas, ids)
+        """
+        texts = [chunk.text for chunk in chunks]
         metadatas = [
             {
                 "source": file_path,
                 "chunk_index": i,
-                "start_position": chunk[1],
-                "chunk_size": len(chunk[0].split())
+                "start_char": chunk.start_char,
+                "end_char": chunk.end_char,
+                "start_byte": chunk.start_byte,
+                "end_byte": chunk.end_byte,
+                "chunk_size": chunk.word_count
             }
             for i, chunk in enumerate(chunks)
         ]
-        ids = [
-            f"{os.path.basename(file_path)}_chunk_{i}"
-            for i in range(len(chunks))
-        ]
 
-        # Agregar a ChromaDB
-        self.vector_store.add_documents(texts, metadatas, ids)
+        # Chunks idénticos dentro del mismo archivo reciben un sufijo para no colisionar
+        ids = []
+        seen = {}
+        for text in texts:
+            chunk_id = compute_chunk_id(file_path, text)
+            occurrence = seen.get(chunk_id, 0)
+            seen[chunk_id] = occurrence + 1
+            ids.append(chunk_id if occurrence == 0 else f"{chunk_id}_{occurrence}")
 
-        return len(chunks)
+        return texts, metadatas, ids
+
+    def _load_manifest(self) -> Dict:
+        """Carga el manifest; se descarta si corresponde a otra colección (p. ej. tras un reset)."""
+        empty = {"collection_id": self.vector_store.get_collection_id(), "files": {}}
+
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return empty
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return empty
+
+        if manifest.get("collection_id") != empty["collection_id"]:
+            return empty
+        return manifest
+
+    def _save_manifest(self, manifest: Dict):
+        # El índice léxico se persiste junto con el manifest para que ambos queden consistentes
+        self.vector_store.save_lexical_index()
+
+        if not self.manifest_path:
+            return
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def sync_file(
+        self,
+        file_path: str,
+        chunk_size: int = 400,
+        overlap: int = 50,
+        manifest: Optional[Dict] = None
+    ) -> Dict[str, int]:
+        """
+        Re-indexa un archivo de forma incremental.
+
+        Si el archivo no cambió (mtime/tamaño/hash) no se hace nada. Si cambió,
+        solo se embeben los chunks nuevos y se eliminan los que desaparecieron;
+        los chunks sin cambios solo actualizan sus metadatos de posición.
+
+        Args:
+            file_path: Ruta al archivo a sincronizar
+            chunk_size: Tamaño de cada chunk en palabras
+            overlap: Palabras de overlap entre chunks
+            manifest: Manifest ya cargado (si es None se carga y se guarda al terminar)
+
+        Returns:
+            Diccionario con {added, removed, unchanged}
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+
+        owns_manifest = manifest is None
+        if owns_manifest:
+            manifest = self._load_manifest()
+
+        stat = os.stat(file_path)
+        params = chunking_params(chunk_size, overlap)
+        entry = manifest["files"].get(file_path)
+
+        if entry and entry["params"] == params and \
+                entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return {"added": 0, "removed": 0, "unchanged": len(entry["chunk_ids"])}
+
+        with open_source(file_path) as buffer:
+            file_hash = hashlib.sha256(buffer).hexdigest()
+
+            if entry and entry["params"] == params and entry["sha256"] == file_hash:
+                # Solo cambió el mtime (p. ej. checkout de git): nada que re-embeber
+                entry.update({"mtime": stat.st_mtime, "size": stat.st_size})
+                if owns_manifest:
+                    self._save_manifest(manifest)
+                return {"added": 0, "removed": 0, "unchanged": len(entry["chunk_ids"])}
+
+            chunks = self.chunk_buffer(buffer, chunk_size=chunk_size, overlap=overlap)
+
+        texts, metadatas, ids = self.build_chunk_records(file_path, chunks)
+
+        existing_ids = set(self.vector_store.get_ids(where={"source": file_path}))
+
+        new_positions = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+        kept_positions = [i for i, chunk_id in enumerate(ids) if chunk_id in existing_ids]
+        removed_ids = list(existing_ids - set(ids))
+
+        self.vector_store.delete_documents(removed_ids)
+        self.vector_store.upsert_documents(
+            [texts[i] for i in new_positions],
+            [metadatas[i] for i in new_positions],
+            [ids[i] for i in new_positions]
+        )
+        self.vector_store.update_metadatas(
+            [ids[i] for i in kept_positions],
+            [metadatas[i] for i in kept_positions]
+        )
+
+        manifest["files"][file_path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha256": file_hash,
+            "params": params,
+            "chunk_ids": ids
+        }
+        if owns_manifest:
+            self._save_manifest(manifest)
+
+        return {
+            "added": len(new_positions),
+            "removed": len(removed_ids),
+            "unchanged": len(kept_positions)
+        }
+
+    def sync_files(
+        self,
+        file_paths: List[str],
+        chunk_size: int = 400,
+        overlap: int = 50
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Re-indexa incrementalmente un conjunto de archivos.
+
+        Los archivos que estaban en el manifest pero ya no están en file_paths
+        se eliminan del índice.
+
+        Args:
+            file_paths: Lista de rutas a archivos
+            chunk_size: Tamaño de chunks
+            overlap: Overlap entre chunks
+
+        Returns:
+            Diccionario con {file_path: {added, removed, unchanged}}
+        """
+        manifest = self._load_manifest()
+        results = {}
+
+        for file_path in file_paths:
+            try:
+                results[file_path] = self.sync_file(file_path, chunk_size, overlap, manifest=manifest)
+            except Exception as e:
+                print(f"❌ Error indexando {file_path}: {str(e)}")
+                results[file_path] = {"added": 0, "removed": 0, "unchanged": 0}
+
+        for stale_path in set(manifest["files"]) - set(file_paths):
+            stale_ids = self.vector_store.get_ids(where={"source": stale_path})
+            self.vector_store.delete_documents(stale_ids)
+            del manifest["files"][stale_path]
+            results[stale_path] = {"added": 0, "removed": len(stale_ids), "unchanged": 0}
+
+        self._save_manifest(manifest)
+        return results
 
     def index_multiple_files(
         self,
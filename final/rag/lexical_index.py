@@ -0,0 +1,216 @@
+import math
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from collections import Counter
+from heapq import nlargest
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LEXICAL_INDEX_FILE_NAME = "lexical_index.pkl"
+
+# Se incrementa cuando cambia el formato serializado o el tokenizador
+_FORMAT_VERSION = 1
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Palabras funcionales del español que no aportan a la búsqueda léxica
+_STOPWORDS = frozenset("""
+a al algo ante como con cual cuando de del desde donde e el ella ellas ellos en entre es esa ese eso
+esta este esto fue ha hay la las le les lo los mas me mi muy no nos o para pero por que se ser si sin
+sobre son su sus te tiene u un una uno unos unas y ya
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokeniza texto para la búsqueda léxica.
+
+    Normaliza a minúsculas sin tildes (para que "código" y "codigo" coincidan)
+    y descarta stopwords y tokens de un carácter.
+
+    Args:
+        text: Texto a tokenizar
+
+    Returns:
+        Lista de tokens en orden de aparición
+    """
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    normalized = ''.join(char for char in normalized if not unicodedata.combining(char))
+    return [
+        token for token in _TOKEN_PATTERN.findall(normalized)
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    Índice invertido en memoria con ranking BM25.
+
+    Complementa la búsqueda vectorial para términos que los embeddings
+    capturan mal (acrónimos, nombres de productos). Se mantiene en paralelo
+    a la colección de ChromaDB y se serializa junto a ella.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            k1: Saturación de la frecuencia de términos
+            b: Normalización por longitud del documento
+        """
+        self.k1 = k1
+        self.b = b
+        self.collection_id: Optional[str] = None
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        """
+        Agrega o reemplaza documentos en el índice.
+
+        Args:
+            ids: IDs de los documentos (los mismos que en ChromaDB)
+            texts: Textos de los documentos
+        """
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                self._remove_locked(doc_id)
+
+                term_counts = dict(Counter(tokenize(text)))
+                self._doc_terms[doc_id] = term_counts
+                self._doc_lengths[doc_id] = sum(term_counts.values())
+                self._total_length += self._doc_lengths[doc_id]
+
+                for term, count in term_counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = count
+
+    def remove(self, ids: Iterable[str]):
+        """
+        Elimina documentos del índice.
+
+        Args:
+            ids: IDs de los documentos a eliminar
+        """
+        with self._lock:
+            for doc_id in ids:
+                self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        term_counts = self._doc_terms.pop(doc_id, None)
+        if term_counts is None:
+            return
+
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in term_counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def clear(self):
+        """Vacía el índice."""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """
+        Busca los documentos con mayor puntaje BM25 para la query.
+
+        Args:
+            query: Texto de búsqueda
+            n_results: Número máximo de resultados
+
+        Returns:
+            Lista de tuplas (id, score) ordenada de mayor a menor score
+        """
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            n_docs = len(self._doc_lengths)
+            if not n_docs or not query_terms:
+                return []
+
+            average_length = self._total_length / n_docs
+            scores: Dict[str, float] = {}
+
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    length_norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / average_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        return nlargest(n_results, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: str):
+        """
+        Serializa el índice a disco (escritura atómica).
+
+        Args:
+            path: Ruta del archivo de destino
+        """
+        with self._lock:
+            state = {
+                "version": _FORMAT_VERSION,
+                "collection_id": self.collection_id,
+                "k1": self.k1,
+                "b": self.b,
+                "postings": self._postings,
+                "doc_terms": self._doc_terms,
+                "doc_lengths": self._doc_lengths,
+                "total_length": self._total_length
+            }
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, collection_id: Optional[str] = None) -> Optional["BM25Index"]:
+        """
+        Carga un índice serializado con save().
+
+        Args:
+            path: Ruta del archivo
+            collection_id: Si se indica, el índice se descarta cuando
+                pertenece a otra colección (p. ej. tras un reset)
+
+        Returns:
+            El índice o None si no existe, es de otra versión o de otra colección
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        if state.get("version") != _FORMAT_VERSION:
+            return None
+        if collection_id is not None and state.get("collection_id") != collection_id:
+            return None
+
+        index = cls(k1=state["k1"], b=state["b"])
+        index.collection_id = state["collection_id"]
+        # Se guardan las postings ya construidas para no re-tokenizar ni recorrer el corpus al cargar
+        index._postings = state["postings"]
+        index._doc_terms = state["doc_terms"]
+        index._doc_lengths = state["doc_lengths"]
+        index._total_length = state["total_length"]
+        return index
@@ -0,0 +1,347 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from tqdm import tqdm
+from final.rag.indexer import ContentIndexer, chunking_params
+from final.rag.spans import open_source
+
+# Marca de fin de stream entre etapas del pipeline
+_END_OF_STREAM = None
+
+
+def read_and_chunk_file(file_path: str, chunk_size: int, overlap: int) -> Dict:
+    """
+    Lee y divide un archivo en chunks. Se ejecuta dentro del pool de procesos.
+
+    Args:
+        file_path: Ruta al archivo
+        chunk_size: Tamaño de cada chunk en palabras
+        overlap: Palabras de overlap entre chunks
+
+    Returns:
+        Diccionario con los datos del manifest (mtime, size, sha256) y los
+        registros listos para ChromaDB (texts, metadatas, ids)
+    """
+    stat = os.stat(file_path)
+    chunker = ContentIndexer(vector_store=None)
+
+    with open_source(file_path) as buffer:
+        file_hash = hashlib.sha256(buffer).hexdigest()
+        chunks = chunker.chunk_buffer(buffer, chunk_size=chunk_size, overlap=overlap)
+
+    texts, metadatas, ids = chunker.build_chunk_records(file_path, chunks)
+
+    return {
+        "file_path": file_path,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "sha256": file_hash,
+        "texts": texts,
+        "metadatas": metadatas,
+        "ids": ids
+    }
+
+
+class IngestionPipeline:
+    """
+    Pipeline de ingesta en streaming para directorios grandes de contenido.
+
+    Etapas:
+        1. Lectura + chunking en un pool de procesos
+        2. Embeddings en batches de tamaño fijo (thread dedicado)
+        3. Escritura en ChromaDB en batches acotados (thread dedicado)
+
+    Las etapas se comunican con colas acotadas, así que si el encoder o
+    ChromaDB se atrasan, las etapas anteriores se bloquean (backpressure)
+    en lugar de acumular todo el contenido en memoria.
+
+    Como ContentIndexer.sync_files, los archivos sin cambios de mtime/tamaño
+    no se leen, y los que salieron de la lista se eliminan del índice.
+    """
+
+    def __init__(
+        self,
+        indexer: ContentIndexer,
+        workers: Optional[int] = None,
+        embed_batch_size: int = 64,
+        write_batch_size: int = 256,
+        max_pending_batches: int = 4
+    ):
+        """
+        Args:
+            indexer: Indexer con el vector store y el manifest a actualizar
+            workers: Procesos para lectura/chunking (default: CPUs disponibles)
+            embed_batch_size: Chunks por llamada al encoder
+            write_batch_size: Documentos por escritura en ChromaDB; se juntan
+                varios batches de embeddings hasta completarlo
+            max_pending_batches: Batches en vuelo entre etapas antes de bloquear
+        """
+        self.indexer = indexer
+        self.vector_store = indexer.vector_store
+        self.workers = workers or os.cpu_count() or 1
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self.max_pending_batches = max_pending_batches
+
+    def run(
+        self,
+        file_paths: List[str],
+        chunk_size: int = 400,
+        overlap: int = 50,
+        skip_existing: bool = True
+    ) -> Dict:
+        """
+        Indexa los archivos en streaming.
+
+        Args:
+            file_paths: Lista de rutas a archivos
+            chunk_size: Tamaño de chunks en palabras
+            overlap: Overlap entre chunks
+            skip_existing: No re-leer archivos sin cambios según el manifest
+                ni re-embeber chunks cuyo ID (hash del contenido) ya está en
+                la colección
+
+        Returns:
+            Diccionario con files, files_unchanged, files_removed,
+            chunks_embedded, chunks_removed, chunks_unchanged,
+            elapsed_seconds y docs_per_second
+        """
+        embed_queue = queue.Queue(maxsize=self.max_pending_batches)
+        write_queue = queue.Queue(maxsize=self.max_pending_batches)
+        errors: List[BaseException] = []
+        stats = {
+            "files_unchanged": 0,
+            "files_removed": 0,
+            "chunks_embedded": 0,
+            "chunks_removed": 0,
+            "chunks_unchanged": 0
+        }
+
+        embedder = threading.Thread(
+            target=self._embed_stage, args=(embed_queue, write_queue, errors), daemon=True
+        )
+        writer = threading.Thread(
+            target=self._write_stage, args=(write_queue, errors, stats), daemon=True
+        )
+        embedder.start()
+        writer.start()
+
+        manifest = self.indexer._load_manifest()
+        params = chunking_params(chunk_size, overlap)
+        pending = {"texts": [], "metadatas": [], "ids": []}
+        start = time.perf_counter()
+
+        progress = tqdm(total=len(file_paths), desc="Indexando", unit="archivo", ncols=80)
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                remaining = iter(self._changed_files(file_paths, manifest, params, skip_existing, stats, progress))
+                in_flight = set()
+
+                # Ventana acotada de archivos en vuelo: no se leen más archivos de los que se pueden procesar
+                while True:
+                    while len(in_flight) < self.workers * 2:
+                        file_path = next(remaining, None)
+                        if file_path is None:
+                            break
+                        in_flight.add(pool.submit(read_and_chunk_file, file_path, chunk_size, overlap))
+
+                    if not in_flight:
+                        break
+
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            print(f"❌ Error leyendo archivo: {str(e)}")
+                            progress.update(1)
+                            continue
+
+                        entry = manifest["files"].get(result["file_path"])
+                        if skip_existing and entry and entry["params"] == params and \
+                                entry["sha256"] == result["sha256"]:
+                            # Solo cambió el mtime (p. ej. checkout de git): nada que re-embeber
+                            entry.update({"mtime": result["mtime"], "size": result["size"]})
+                            stats["files_unchanged"] += 1
+                            stats["chunks_unchanged"] += len(entry["chunk_ids"])
+                            progress.update(1)
+                            continue
+
+                        self._enqueue_file(result, pending, embed_queue, skip_existing, stats)
+                        manifest["files"][result["file_path"]] = {
+                            "mtime": result["mtime"],
+                            "size": result["size"],
+                            "sha256": result["sha256"],
+                            "params": params,
+                            "chunk_ids": result["ids"]
+                        }
+                        progress.update(1)
+                        progress.set_postfix(chunks=stats["chunks_embedded"])
+
+                        if errors:
+                            raise errors[0]
+
+            if pending["ids"]:
+                embed_queue.put(pending)
+        finally:
+            embed_queue.put(_END_OF_STREAM)
+            embedder.join()
+            writer.join()
+            progress.close()
+
+        if errors:
+            raise errors[0]
+
+        self._remove_stale_files(file_paths, manifest, stats)
+        self.indexer._save_manifest(manifest)
+
+        elapsed = time.perf_counter() - start
+        docs_per_second = stats["chunks_embedded"] / elapsed if elapsed > 0 else 0.0
+        print(
+            f"✅ Ingesta completada: {len(file_paths)} archivos, {stats['chunks_embedded']} chunks "
+            f"en {elapsed:.1f}s ({docs_per_second:.1f} docs/s)"
+        )
+
+        return {
+            "files": len(file_paths),
+            **stats,
+            "elapsed_seconds": round(elapsed, 2),
+            "docs_per_second": round(docs_per_second, 1)
+        }
+
+    @staticmethod
+    def _changed_files(
+        file_paths: List[str],
+        manifest: Dict,
+        params: Dict,
+        skip_existing: bool,
+        stats: Dict,
+        progress: tqdm
+    ) -> Iterator[str]:
+        """Archivos a leer: se omiten, sin abrirlos, los de mtime y tamaño iguales al manifest."""
+        for file_path in file_paths:
+            entry = manifest["files"].get(file_path)
+            if skip_existing and entry and entry["params"] == params:
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    stat = None  # el worker reporta el error
+                if stat and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    stats["files_unchanged"] += 1
+                    stats["chunks_unchanged"] += len(entry["chunk_ids"])
+                    progress.update(1)
+                    continue
+            yield file_path
+
+    def _remove_stale_files(self, file_paths: List[str], manifest: Dict, stats: Dict):
+        """Elimina del índice y del manifest los archivos que ya no están en file_paths."""
+        for stale_path in set(manifest["files"]) - set(file_paths):
+            stale_ids = self.vector_store.get_ids(where={"source": stale_path})
+            self.vector_store.delete_documents(stale_ids)
+            del manifest["files"][stale_path]
+            stats["files_removed"] += 1
+            stats["chunks_removed"] += len(stale_ids)
+
+    def _enqueue_file(
+        self,
+        result: Dict,
+        pending: Dict[str, List],
+        embed_queue: queue.Queue,
+        skip_existing: bool,
+        stats: Dict
+    ):
+        """Elimina chunks obsoletos del archivo y encola los nuevos en batches fijos."""
+        existing_ids = set(self.vector_store.get_ids(where={"source": result["file_path"]}))
+        new_ids = set(result["ids"])
+
+        removed_ids = list(existing_ids - new_ids)
+        self.vector_store.delete_documents(removed_ids)
+        stats["chunks_removed"] += len(removed_ids)
+
+        kept_ids, kept_metadatas = [], []
+        for text, metadata, chunk_id in zip(result["texts"], result["metadatas"], result["ids"]):
+            if skip_existing and chunk_id in existing_ids:
+                kept_ids.append(chunk_id)
+                kept_metadatas.append(metadata)
+                continue
+
+            pending["texts"].append(text)
+            pending["metadatas"].append(metadata)
+            pending["ids"].append(chunk_id)
+
+            if len(pending["ids"]) >= self.embed_batch_size:
+                # put bloquea si el encoder va atrasado (backpressure)
+                embed_queue.put({key: list(values) for key, values in pending.items()})
+                for values in pending.values():
+                    values.clear()
+
+        # Los chunks sin cambios solo actualizan sus offsets, sin re-embeber
+        self.vector_store.update_metadatas(kept_ids, kept_metadatas)
+        stats["chunks_unchanged"] += len(kept_ids)
+
+    def _embed_stage(self, embed_queue: queue.Queue, write_queue: queue.Queue, errors: List):
+        """Calcula embeddings batch por batch mientras se chunkean los siguientes archivos."""
+        try:
+            while True:
+                batch = embed_queue.get()
+                if batch is _END_OF_STREAM:
+                    break
+                if errors:
+                    continue  # drenar la cola para no bloquear al productor
+
+                try:
+                    batch["embeddings"] = self.vector_store.embedding_model.embed_documents(
+                        batch["texts"], batch_size=self.embed_batch_size
+                    )
+                    write_queue.put(batch)
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            write_queue.put(_END_OF_STREAM)
+
+    def _write_stage(self, write_queue: queue.Queue, errors: List, stats: Dict):
+        """
+        Escribe en ChromaDB en batches de write_batch_size documentos, juntando
+        los batches de embeddings que van llegando (el último puede ser menor).
+        """
+        pending = {"texts": [], "metadatas": [], "ids": [], "embeddings": []}
+        while True:
+            batch = write_queue.get()
+            if batch is _END_OF_STREAM:
+                break
+            if errors:
+                continue
+
+            for key, values in batch.items():
+                if key == "embeddings":
+                    pending[key].append(values)
+                else:
+                    pending[key].extend(values)
+            try:
+                while len(pending["ids"]) >= self.write_batch_size:
+                    self._write_pending(pending, self.write_batch_size, stats)
+            except Exception as e:
+                errors.append(e)
+
+        if pending["ids"] and not errors:
+            try:
+                self._write_pending(pending, len(pending["ids"]), stats)
+            except Exception as e:
+                errors.append(e)
+
+    def _write_pending(self, pending: Dict[str, List], size: int, stats: Dict):
+        """Escribe los primeros `size` documentos pendientes y deja el resto en pending."""
+        embeddings = np.concatenate(pending["embeddings"])
+        self.vector_store.upsert_embeddings(
+            pending["texts"][:size], pending["metadatas"][:size], pending["ids"][:size], embeddings[:size]
+        )
+        stats["chunks_embedded"] += size
+
+        for key in ("texts", "metadatas", "ids"):
+            del pending[key][:size]
+        pending["embeddings"] = [embeddings[size:]]
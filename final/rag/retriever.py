@@ -1,18 +1,234 @@
-from typing import List, Dict, Optional
+import asyncio
+import functools
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import List, Dict, NamedTuple, Optional, Tuple
+from final.rag.spans import SourceSpanReader
 from final.rag.vector_store import ChromaVectorStore
 
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+# Constante de Reciprocal Rank Fusion (valor estándar de la literatura)
+RRF_K = 60
+
+# Aproximación de caracteres por token para el presupuesto de contexto
+_CHARS_PER_TOKEN = 4
+# No vale la pena incluir un fragmento recortado más corto que esto
+_MIN_TRUNCATED_CHARS = 200
+
+# Defaults del retriever (RAG_MIN_SIMILARITY / RAG_MAX_CONTEXT_TOKENS en los agentes).
+# Con all-MiniLM-L6-v2 los fragmentos sin relación con la query quedan por debajo de ~0.2
+DEFAULT_MIN_SIMILARITY = 0.2
+DEFAULT_MAX_CONTEXT_TOKENS = 1200
+
+
+class RetrievedChunk(NamedTuple):
+    """Fragmento recuperado con su similitud y su span en el archivo de origen."""
+    id: str
+    text: str
+    score: float
+    source: Optional[str]
+    start_char: Optional[int]
+    end_char: Optional[int]
+    metadata: Dict
+
+
+class RetrievalResult(NamedTuple):
+    """Resultado de una búsqueda: fragmentos con score y el texto listo para el prompt."""
+    chunks: List[RetrievedChunk]
+    formatted: str
+    total_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima los tokens de un texto sin depender del tokenizador del proveedor."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+# Executor compartido para las búsquedas async: el encoding y la consulta a
+# ChromaDB son bloqueantes y no deben correr en el event loop
+_rag_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RAG_EXECUTOR_WORKERS", "4")),
+    thread_name_prefix="rag"
+)
+
+
+# Aspectos generales del curso usados como relevancia cuando no hay un tema
+_GENERAL_QUERIES = [
+    "conceptos fundamentales",
+    "aplicaciones prácticas",
+    "casos de uso",
+    "definiciones importantes",
+    "ejemplos y ejercicios"
+]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normaliza cada fila a norma 1 para que el producto punto sea similitud coseno."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    initial_redundancy: Optional[np.ndarray] = None
+) -> List[int]:
+    """
+    Selecciona k candidatos con Maximal Marginal Relevance.
+
+    En cada paso elige el candidato que maximiza
+    lambda * relevancia - (1 - lambda) * máxima similitud con lo ya elegido.
+    La similitud máxima se mantiene como vector y se actualiza con una sola
+    columna de la matriz de similitudes por paso.
+
+    Args:
+        relevance: Relevancia de cada candidato, forma (n,)
+        candidate_embeddings: Embeddings normalizados de los candidatos, forma (n, d)
+        k: Número de candidatos a seleccionar
+        lambda_mult: Peso de la relevancia frente a la diversidad (0-1)
+        initial_redundancy: Similitud previa de cada candidato con contenido
+            ya cubierto, forma (n,) (opcional)
+
+    Returns:
+        Índices de los candidatos seleccionados, en orden de selección
+    """
+    n_candidates = len(relevance)
+    k = min(k, n_candidates)
+    if k <= 0:
+        return []
+
+    similarities = candidate_embeddings @ candidate_embeddings.T
+    redundancy = (
+        np.asarray(initial_redundancy, dtype=np.float32).copy()
+        if initial_redundancy is not None
+        else np.full(n_candidates, -np.inf, dtype=np.float32)
+    )
+    available = np.ones(n_candidates, dtype=bool)
+    selected = []
+
+    for _ in range(k):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        scores[~available] = -np.inf
+
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarities[:, best])
+
+    return selected
+
+
+def _cosine_similarities(embeddings: np.ndarray, query_embedding: np.ndarray) -> np.ndarray:
+    """Similitud coseno de cada fila de embeddings contra la query."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
+    return (embeddings @ query_embedding) / np.maximum(norms, 1e-12)
+
 
 class ContentRetriever:
     """Recupera contenido relevante usando RAG."""
 
-    def __init__(self, vector_store: ChromaVectorStore):
+    def __init__(
+        self,
+        vector_store: ChromaVectorStore,
+        span_reader: Optional[SourceSpanReader] = None,
+        mode: str = "hybrid",
+        max_context_tokens: Optional[int] = DEFAULT_MAX_CONTEXT_TOKENS,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ):
+        """
+        Args:
+            vector_store: Vector store con el contenido indexado
+            span_reader: Lector de spans del archivo de origen (opcional)
+            mode: Modo de búsqueda por defecto: "vector", "lexical" (BM25) o "hybrid"
+            max_context_tokens: Presupuesto de tokens por defecto del contexto (None = sin límite)
+            min_similarity: Similitud coseno mínima por defecto para incluir un
+                fragmento (depende del modelo de embeddings, así que conviene
+                calibrarla con el contenido indexado; 0.0 no filtra)
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de búsqueda inválido: {mode}. Opciones: {', '.join(RETRIEVAL_MODES)}")
+
         self.vector_store = vector_store
+        self.span_reader = span_reader or SourceSpanReader()
+        self.mode = mode
+        self.max_context_tokens = max_context_tokens
+        self.min_similarity = min_similarity
+
+    def _resolve_document(self, document: Optional[str], metadata: Dict) -> str:
+        """
+        Retorna el span exacto del archivo de origen según los offsets del chunk.
+
+        Si el chunk no tiene offsets (índices viejos) o el archivo cambió de tamaño,
+        se usa el texto guardado en ChromaDB.
+        """
+        span = None
+        try:
+            span = self.span_reader.read_span(metadata)
+        except (UnicodeDecodeError, ValueError):
+            pass
+
+        if span is None or (document is not None and len(span) != len(document)):
+            return document or ""
+        return span
+
+    def retrieve(
+        self,
+        query: str,
+        n_results: int = 3,
+        min_similarity: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        mode: Optional[str] = None
+    ) -> RetrievalResult:
+        """
+        Recupera fragmentos relevantes con su similitud y su span de origen.
+
+        Args:
+            query: Texto de búsqueda
+            n_results: Número máximo de fragmentos a recuperar
+            min_similarity: Similitud coseno mínima para incluir un fragmento
+                (default: la del retriever)
+            max_tokens: Presupuesto de tokens del contexto (default: el del retriever);
+                el último fragmento que no entra se recorta
+            mode: "vector", "lexical" o "hybrid" (default: el modo del retriever)
+
+        Returns:
+            RetrievalResult con los fragmentos, el texto formateado y los tokens estimados
+        """
+        if not query or not query.strip():
+            return RetrievalResult([], "No se proporcionó una query válida.", 0)
+
+        mode = mode or self.mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de búsqueda inválido: {mode}. Opciones: {', '.join(RETRIEVAL_MODES)}")
+
+        if mode == "vector":
+            chunks = self._vector_search(query, n_results)
+        else:
+            chunks = self._fused_search(query, n_results, use_vector=(mode == "hybrid"))
+
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+        chunks = [chunk for chunk in chunks if chunk.score >= min_similarity]
+        chunks, total_tokens = self._apply_token_budget(
+            chunks, max_tokens if max_tokens is not None else self.max_context_tokens
+        )
+
+        return RetrievalResult(chunks, self._format_chunks(chunks), total_tokens)
 
     def retrieve_relevant_content(
         self,
         query: str,
         n_results: int = 3,
-        min_similarity: float = 0.5
+        min_similarity: Optional[float] = None,
+        mode: Optional[str] = None,
+        max_tokens: Optional[int] = None
     ) -> str:
         """
         Recupera contenido relevante para una query.
@@ -20,27 +236,187 @@ class ContentRetriever:
         Args:
             query: Texto de búsqueda
             n_results: Número de fragmentos a recuperar
-            min_similarity: Umbral mínimo de similitud (no usado actualmente)
+            min_similarity: Similitud coseno mínima para incluir un fragmento
+                (default: la del retriever)
+            mode: "vector", "lexical" o "hybrid" (default: el modo del retriever)
+            max_tokens: Presupuesto de tokens del contexto (default: el del retriever)
 
         Returns:
             Contenido formateado con los fragmentos más relevantes
         """
-        if not query:
-            return "No se proporcionó una query válida."
+        return self.retrieve(query, n_results, min_similarity, max_tokens, mode).formatted
+
+    async def _run_in_executor(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_rag_executor, functools.partial(func, *args, **kwargs))
+
+    async def aretrieve(self, query: str, *args, **kwargs) -> RetrievalResult:
+        """Versión async de retrieve(); la búsqueda corre en el executor de RAG."""
+        return await self._run_in_executor(self.retrieve, query, *args, **kwargs)
+
+    async def aretrieve_relevant_content(self, query: str, *args, **kwargs) -> str:
+        """Versión async de retrieve_relevant_content()."""
+        return await self._run_in_executor(self.retrieve_relevant_content, query, *args, **kwargs)
+
+    async def aretrieve_for_question_creation(self, *args, **kwargs) -> str:
+        """Versión async de retrieve_for_question_creation()."""
+        return await self._run_in_executor(self.retrieve_for_question_creation, *args, **kwargs)
+
+    async def aretrieve_related_to_errors(self, incorrect_questions: List[str], *args, **kwargs) -> str:
+        """Versión async de retrieve_related_to_errors()."""
+        return await self._run_in_executor(self.retrieve_related_to_errors, incorrect_questions, *args, **kwargs)
+
+    async def asearch_specific_concept(self, concept: str, *args, **kwargs) -> str:
+        """Versión async de search_specific_concept()."""
+        return await self._run_in_executor(self.search_specific_concept, concept, *args, **kwargs)
+
+    def _make_chunk(
+        self,
+        doc_id: str,
+        document: Optional[str],
+        metadata: Dict,
+        score: float,
+        resolve_span: bool = True
+    ) -> RetrievedChunk:
+        return RetrievedChunk(
+            id=doc_id,
+            text=self._resolve_document(document, metadata) if resolve_span else (document or ""),
+            score=score,
+            source=metadata.get("source"),
+            start_char=metadata.get("start_char"),
+            end_char=metadata.get("end_char"),
+            metadata=metadata
+        )
+
+    def _with_span(self, chunk: RetrievedChunk) -> RetrievedChunk:
+        """Reemplaza el texto guardado en ChromaDB por el span del archivo de origen."""
+        return chunk._replace(text=self._resolve_document(chunk.text, chunk.metadata))
+
+    def _vector_search(self, query: str, n_results: int, resolve_spans: bool = True) -> List[RetrievedChunk]:
+        """
+        Búsqueda vectorial; la colección usa distancia coseno, así que similitud = 1 - distancia.
 
+        Con resolve_spans=False los fragmentos conservan el texto de ChromaDB
+        (para pools de candidatos que después se recortan).
+        """
         results = self.vector_store.query(query, n_results=n_results)
+        return [
+            self._make_chunk(doc_id, doc, metadata, 1.0 - distance, resolve_span=resolve_spans)
+            for doc_id, doc, metadata, distance in zip(
+                results['ids'][0], results['documents'][0], results['metadatas'][0], results['distances'][0]
+            )
+        ]
+
+    def _fused_search(
+        self,
+        query: str,
+        n_results: int,
+        use_vector: bool = True
+    ) -> List[RetrievedChunk]:
+        """
+        Combina los rankings BM25 y vectorial con Reciprocal Rank Fusion.
 
-        if not results['documents'][0]:
+        Cada lista aporta 1 / (RRF_K + rank) por documento, así que no hace
+        falta calibrar distancias coseno contra puntajes BM25. El score de
+        cada fragmento sigue siendo su similitud coseno con la query, para
+        que el umbral min_similarity signifique lo mismo en todos los modos.
+
+        Args:
+            query: Texto de búsqueda
+            n_results: Número de fragmentos a retornar
+            use_vector: Si es False se usa solo el ranking léxico
+
+        Returns:
+            Fragmentos ordenados por score fusionado
+        """
+        pool_size = max(n_results * 4, 20)
+        # Otro proceso (indexación incremental) pudo reescribir el índice léxico
+        self.vector_store.refresh_lexical_index()
+        lexical_hits = self.vector_store.lexical_index.search(query, n_results=pool_size)
+
+        fused: Dict[str, float] = {}
+        candidates: Dict[str, RetrievedChunk] = {}
+
+        if use_vector:
+            # Los spans se leen del disco solo para los fragmentos que se retornan
+            vector_chunks = self._vector_search(query, pool_size, resolve_spans=False)
+            if not lexical_hits:
+                # Sin coincidencias léxicas el ranking híbrido es el vectorial
+                return [self._with_span(chunk) for chunk in vector_chunks[:n_results]]
+
+            for rank, chunk in enumerate(vector_chunks):
+                fused[chunk.id] = 1.0 / (RRF_K + rank + 1)
+                candidates[chunk.id] = chunk
+
+        for rank, (doc_id, _) in enumerate(lexical_hits):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:n_results]
+
+        # Los fragmentos que solo encontró BM25 necesitan su similitud coseno con la query
+        missing = self.vector_store.get_documents(
+            [doc_id for doc_id in top_ids if doc_id not in candidates], include_embeddings=True
+        )
+        if missing['ids']:
+            query_embedding = self.vector_store.embedding_model.embed_query(query)
+            similarities = _cosine_similarities(missing['embeddings'], query_embedding)
+            for doc_id, doc, metadata, similarity in zip(
+                missing['ids'], missing['documents'], missing['metadatas'], similarities
+            ):
+                candidates[doc_id] = self._make_chunk(doc_id, doc, metadata, float(similarity), resolve_span=False)
+
+        return [self._with_span(candidates[doc_id]) for doc_id in top_ids if doc_id in candidates]
+
+    def _apply_token_budget(
+        self,
+        chunks: List[RetrievedChunk],
+        max_tokens: Optional[int]
+    ) -> Tuple[List[RetrievedChunk], int]:
+        """
+        Corta el contexto al llegar a max_tokens (estimados).
+
+        Los fragmentos entran en orden de relevancia; el primero que no entra
+        completo se recorta en un límite de palabra (ajustando su span) si
+        queda espacio suficiente, y el resto se descarta.
+        """
+        total_tokens = 0
+        kept = []
+
+        for chunk in chunks:
+            tokens = estimate_tokens(chunk.text)
+            if max_tokens is None or total_tokens + tokens <= max_tokens:
+                kept.append(chunk)
+                total_tokens += tokens
+                continue
+
+            remaining_chars = (max_tokens - total_tokens) * _CHARS_PER_TOKEN
+            if remaining_chars >= _MIN_TRUNCATED_CHARS:
+                cut = chunk.text.rfind(' ', 0, remaining_chars)
+                text = chunk.text[:cut if cut > 0 else remaining_chars].rstrip()
+                end_char = chunk.start_char + len(text) if chunk.start_char is not None else None
+                kept.append(chunk._replace(text=text, end_char=end_char))
+                total_tokens += estimate_tokens(text)
+            break
+
+        return kept, total_tokens
+
+    def _format_chunks(self, chunks: List[RetrievedChunk]) -> str:
+        return self._format_fragments(
+            [chunk.text for chunk in chunks],
+            [chunk.metadata for chunk in chunks],
+            resolve_spans=False
+        )
+
+    def _format_fragments(self, documents: List[str], metadatas: List[Dict], resolve_spans: bool = True) -> str:
+        """Formatea fragmentos recuperados para incluirlos en un prompt."""
+        if not documents:
             return "No se encontró contenido relevante."
 
-        # Formatear resultados
         formatted_content = []
-        for i, (doc, metadata) in enumerate(zip(
-            results['documents'][0],
-            results['metadatas'][0]
-        )):
+        for i, (doc, metadata) in enumerate(zip(documents, metadatas)):
+            text = self._resolve_document(doc, metadata) if resolve_spans else doc
             formatted_content.append(
-                f"[Fragmento {i+1} - Chunk {metadata['chunk_index']}]\n{doc}\n"
+                f"[Fragmento {i+1} - Chunk {metadata['chunk_index']}]\n{text}\n"
             )
 
         return "\n".join(formatted_content)
@@ -90,10 +466,29 @@ class ContentRetriever:
         if not incorrect_questions:
             return "No hay preguntas incorrectas para analizar."
 
-        # Combinar preguntas incorrectas en una query (limitar a 3)
-        query = " ".join(incorrect_questions[:3])
+        # Una query por pregunta incorrecta (limitar a 3), resueltas en un solo batch
+        per_question = self.vector_store.query_many(
+            incorrect_questions[:3],
+            n_results=n_results,
+            deduplicate=True
+        )
+
+        # Quedarse con los fragmentos más cercanos entre todas las preguntas
+        candidates = sorted(
+            (
+                (distance, doc, metadata)
+                for result in per_question
+                for doc, metadata, distance in zip(
+                    result['documents'], result['metadatas'], result['distances']
+                )
+            ),
+            key=lambda candidate: candidate[0]
+        )[:n_results]
 
-        content = self.retrieve_relevant_content(query, n_results)
+        content = self._format_fragments(
+            [doc for _, doc, _ in candidates],
+            [metadata for _, _, metadata in candidates]
+        )
 
         # Agregar contexto adicional
         header = f"Contenido relacionado a {len(incorrect_questions)} pregunta(s) incorrecta(s):\n\n"
@@ -102,34 +497,61 @@ class ContentRetriever:
     def retrieve_diverse_content(
         self,
         n_samples: int = 5,
-        previously_covered: Optional[List[str]] = None
+        previously_covered: Optional[List[str]] = None,
+        query: Optional[str] = None,
+        lambda_mult: float = 0.5
     ) -> List[str]:
         """
         Recupera contenido diverso para evitar repetición de temas.
 
+        Usa Maximal Marginal Relevance: se obtiene un pool de candidatos en una
+        sola búsqueda y se eligen fragmentos que maximizan la relevancia menos la
+        similitud con los ya elegidos y con los temas ya cubiertos.
+
         Args:
             n_samples: Número de fragmentos diversos a recuperar
             previously_covered: Lista de temas ya cubiertos (opcional)
+            query: Tema para la relevancia (default: aspectos generales del curso)
+            lambda_mult: Peso de la relevancia frente a la diversidad (0-1)
 
         Returns:
             Lista de fragmentos de contenido
         """
-        # Para diversidad, hacer queries sobre diferentes aspectos generales
-        queries = [
-            "conceptos fundamentales",
-            "aplicaciones prácticas",
-            "casos de uso",
-            "definiciones importantes",
-            "ejemplos y ejercicios"
-        ]
+        queries = [query] if query else _GENERAL_QUERIES
+        pool_size = max(n_samples * 4, 20)
+
+        # Un solo batch de búsqueda para armar el pool de candidatos
+        per_query = self.vector_store.query_many(
+            queries,
+            n_results=math.ceil(pool_size / len(queries)),
+            deduplicate=True,
+            include_embeddings=True
+        )
+
+        documents = [doc for result in per_query for doc in result['documents']]
+        metadatas = [metadata for result in per_query for metadata in result['metadatas']]
+        if not documents:
+            return []
+
+        candidate_embeddings = _normalize_rows(
+            np.vstack([result['embeddings'] for result in per_query if result['ids']])
+        )
+        query_embeddings = _normalize_rows(self.vector_store.embedding_model.embed_queries(queries))
+        # Relevancia: similitud con la query más cercana
+        relevance = (candidate_embeddings @ query_embeddings.T).max(axis=1)
+
+        covered_similarity = None
+        if previously_covered:
+            covered_embeddings = _normalize_rows(
+                self.vector_store.embedding_model.embed_queries(previously_covered)
+            )
+            covered_similarity = (candidate_embeddings @ covered_embeddings.T).max(axis=1)
 
-        all_content = []
-        for query in queries[:n_samples]:
-            results = self.vector_store.query(query, n_results=1)
-            if results['documents'][0]:
-                all_content.append(results['documents'][0][0])
+        selected = maximal_marginal_relevance(
+            relevance, candidate_embeddings, n_samples, lambda_mult, covered_similarity
+        )
 
-        return all_content
+        return [self._resolve_document(documents[i], metadatas[i]) for i in selected]
 
     def search_specific_concept(
         self,
@@ -0,0 +1,97 @@
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, Optional, Union
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+@contextmanager
+def open_source(file_path: str) -> Iterator[Buffer]:
+    """
+    Abre un archivo de contenido como buffer de bytes memory-mapped.
+
+    Los archivos vacíos no se pueden mapear, así que se devuelve b"".
+
+    Args:
+        file_path: Ruta al archivo
+
+    Yields:
+        Buffer de solo lectura con el contenido crudo (UTF-8) del archivo
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+
+class SourceSpanReader:
+    """
+    Lee spans exactos del archivo de origen a partir de los offsets en bytes
+    guardados en los metadatos de cada chunk.
+
+    Mantiene un descriptor abierto por archivo y lee solo los bytes de cada
+    span. No usa mmap: un archivo truncado o reescrito en el lugar daría SIGBUS
+    al leer un mapeo viejo, mientras que una lectura corta solo produce un span
+    distinto (el retriever lo detecta y usa el texto de ChromaDB). Si el archivo
+    fue reemplazado (otro inode) se vuelve a abrir.
+    """
+
+    def __init__(self):
+        self._files: Dict[str, BinaryIO] = {}
+        self._lock = threading.Lock()
+
+    def _get_file(self, file_path: str) -> BinaryIO:
+        """Descriptor del archivo, reabierto si la ruta ya apunta a otro archivo."""
+        current = os.stat(file_path)
+        f = self._files.get(file_path)
+        if f is not None:
+            opened = os.fstat(f.fileno())
+            if (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino):
+                return f
+            f.close()
+
+        # Sin buffer: cada lectura va al archivo y no devuelve bytes de antes de un truncado
+        f = open(file_path, 'rb', buffering=0)
+        self._files[file_path] = f
+        return f
+
+    def read_span(self, metadata: Dict) -> Optional[str]:
+        """
+        Obtiene el texto original de un chunk desde su archivo de origen.
+
+        Args:
+            metadata: Metadatos del chunk (source, start_byte, end_byte)
+
+        Returns:
+            Texto del span o None si los metadatos no tienen offsets
+            o el archivo ya no existe
+        """
+        if "start_byte" not in metadata or "end_byte" not in metadata:
+            return None
+
+        start, end = metadata["start_byte"], metadata["end_byte"]
+        with self._lock:
+            try:
+                f = self._get_file(metadata["source"])
+                f.seek(start)
+                data = f.read(max(0, end - start))
+            except OSError:
+                return None
+
+        return data.decode('utf-8')
+
+    def close(self):
+        """Cierra todos los archivos abiertos."""
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
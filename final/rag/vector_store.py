@@ -1,7 +1,10 @@
+import os
 import chromadb
+import numpy as np
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from final.rag.embeddings import EmbeddingModel
+from final.rag.lexical_index import BM25Index, LEXICAL_INDEX_FILE_NAME
 
 
 class ChromaVectorStore:
@@ -27,6 +30,7 @@ class ChromaVectorStore:
             )
         )
 
+        self.persist_directory = persist_directory
         self.embedding_model = EmbeddingModel()
         self.collection_name = collection_name
 
@@ -36,8 +40,61 @@ class ChromaVectorStore:
             metadata={"hnsw:space": "cosine"}
         )
 
+        # Índice léxico (BM25) que se mantiene en paralelo a la colección
+        self.lexical_index_path = os.path.join(persist_directory, LEXICAL_INDEX_FILE_NAME)
+        self.lexical_index = self._load_lexical_index()
+
         print(f"✅ ChromaDB inicializado - Colección: {collection_name}")
 
+    def _lexical_index_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Identifica la versión en disco del índice léxico (se reescribe con os.replace)."""
+        try:
+            stat = os.stat(self.lexical_index_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_lexical_index(self) -> BM25Index:
+        """Carga el índice léxico de disco o lo reconstruye desde la colección si falta o es de otra colección."""
+        collection_id = self.get_collection_id()
+        # La firma se toma antes de leer: si otro proceso lo reescribe en el medio, se recarga después
+        self._lexical_index_seen = self._lexical_index_signature()
+        index = BM25Index.load(self.lexical_index_path, collection_id=collection_id)
+        if index is not None:
+            return index
+
+        index = BM25Index()
+        index.collection_id = collection_id
+        if self.collection.count() > 0:
+            print("🔧 Reconstruyendo índice léxico desde la colección...")
+            existing = self.collection.get(include=["documents"])
+            index.add(existing['ids'], existing['documents'])
+            index.save(self.lexical_index_path)
+            self._lexical_index_seen = self._lexical_index_signature()
+        return index
+
+    def save_lexical_index(self):
+        """Persiste el índice léxico en el directorio de ChromaDB."""
+        self.lexical_index.save(self.lexical_index_path)
+        self._lexical_index_seen = self._lexical_index_signature()
+
+    def refresh_lexical_index(self):
+        """
+        Recarga el índice léxico si otro proceso lo reescribió en disco (p. ej.
+        scripts/index_content.py --incremental con la app corriendo).
+
+        Cuesta un stat por llamada; los cambios propios aún sin guardar se
+        conservan mientras nadie más escriba el archivo.
+        """
+        signature = self._lexical_index_signature()
+        if signature is None or signature == self._lexical_index_seen:
+            return
+
+        index = BM25Index.load(self.lexical_index_path, collection_id=self.get_collection_id())
+        self._lexical_index_seen = signature
+        if index is not None:
+            self.lexical_index = index
+
     def add_documents(
         self,
         texts: List[str],
@@ -59,6 +116,7 @@ class ChromaVectorStore:
         print(f"📝 Generando embeddings para {len(texts)} documentos...")
         embeddings = self.embedding_model.embed_documents(texts)
 
+        # La matriz float32 se pasa directo a Chroma, sin convertir a listas de Python
         print(f"💾 Agregando {len(texts)} documentos a ChromaDB...")
         self.collection.add(
             documents=texts,
@@ -66,8 +124,133 @@ class ChromaVectorStore:
             embeddings=embeddings,
             ids=ids
         )
+        self.lexical_index.add(ids, texts)
         print(f"✅ {len(texts)} documentos agregados exitosamente")
 
+    def upsert_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str]
+    ):
+        """
+        Inserta o reemplaza documentos en la colección.
+
+        Args:
+            texts: Lista de textos a insertar
+            metadatas: Lista de metadatos asociados a cada texto
+            ids: Lista de IDs únicos para cada documento
+        """
+        if not texts:
+            return
+
+        embeddings = self.embedding_model.embed_documents(texts)
+        self.upsert_embeddings(texts, metadatas, ids, embeddings)
+
+    def upsert_embeddings(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        embeddings: np.ndarray
+    ):
+        """
+        Inserta o reemplaza documentos cuyos embeddings ya fueron calculados.
+
+        Args:
+            texts: Lista de textos a insertar
+            metadatas: Lista de metadatos asociados a cada texto
+            ids: Lista de IDs únicos para cada documento
+            embeddings: Matriz float32 de forma (len(texts), dimension)
+        """
+        if not texts:
+            return
+
+        self.collection.upsert(
+            documents=texts,
+            metadatas=metadatas,
+            embeddings=embeddings,
+            ids=ids
+        )
+        self.lexical_index.add(ids, texts)
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]):
+        """
+        Actualiza los metadatos de documentos existentes sin recalcular embeddings.
+
+        Args:
+            ids: IDs de los documentos a actualizar
+            metadatas: Nuevos metadatos para cada documento
+        """
+        if not ids:
+            return
+
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete_documents(self, ids: List[str]):
+        """
+        Elimina documentos de la colección.
+
+        Args:
+            ids: IDs de los documentos a eliminar
+        """
+        if not ids:
+            return
+
+        self.collection.delete(ids=ids)
+        self.lexical_index.remove(ids)
+
+    def get_ids(self, where: Optional[Dict] = None) -> List[str]:
+        """
+        Obtiene los IDs de los documentos que cumplen un filtro de metadatos.
+
+        Args:
+            where: Filtros de metadatos opcionales
+
+        Returns:
+            Lista de IDs
+        """
+        return self.collection.get(where=where, include=[])['ids']
+
+    def get_documents(self, ids: List[str], include_embeddings: bool = False) -> Dict:
+        """
+        Obtiene textos y metadatos de documentos por ID.
+
+        Args:
+            ids: IDs de los documentos
+            include_embeddings: Si es True, también retorna la matriz de embeddings
+
+        Returns:
+            Diccionario con ids, documents, metadatas (y embeddings) en el mismo
+            orden que ids (los IDs inexistentes se omiten)
+        """
+        dimension = self.embedding_model.dimension if include_embeddings else 0
+        empty = {"ids": [], "documents": [], "metadatas": []}
+        if include_embeddings:
+            empty["embeddings"] = np.empty((0, dimension), dtype=np.float32)
+        if not ids:
+            return empty
+
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        found = self.collection.get(ids=ids, include=include)
+        positions = {doc_id: i for i, doc_id in enumerate(found['ids'])}
+        order = [positions[doc_id] for doc_id in ids if doc_id in positions]
+        if not order:
+            return empty
+
+        result = {
+            "ids": [found['ids'][i] for i in order],
+            "documents": [found['documents'][i] for i in order],
+            "metadatas": [found['metadatas'][i] for i in order]
+        }
+        if include_embeddings:
+            result["embeddings"] = np.asarray(found['embeddings'], dtype=np.float32)[order]
+        return result
+
+    def get_collection_id(self) -> str:
+        """Retorna el identificador interno de la colección (cambia al resetearla)."""
+        return str(self.collection.id)
+
     def query(
         self,
         query_text: str,
@@ -85,19 +268,108 @@ class ChromaVectorStore:
         Returns:
             Diccionario con resultados de la búsqueda
         """
-        if not query_text:
-            return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
+        # Una query vacía no tiene embedding (ver EmbeddingModel.embed_query): no se consulta a Chroma
+        if not query_text or not query_text.strip():
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
 
         query_embedding = self.embedding_model.embed_query(query_text)
 
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embedding[np.newaxis, :],
             n_results=n_results,
             where=where
         )
 
         return results
 
+    def query_many(
+        self,
+        query_texts: List[str],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+        deduplicate: bool = False,
+        include_embeddings: bool = False
+    ) -> List[Dict]:
+        """
+        Busca documentos similares para varias queries a la vez.
+
+        Todas las queries se embeben en un solo batch y se envían a Chroma
+        en una única llamada.
+
+        Args:
+            query_texts: Lista de textos de búsqueda
+            n_results: Número de resultados por query
+            where: Filtros de metadatos opcionales
+            deduplicate: Si es True, un documento solo aparece en la primera
+                query (en orden) que lo recuperó
+            include_embeddings: Si es True, cada resultado incluye también la
+                matriz float32 "embeddings" de sus documentos
+
+        Returns:
+            Lista con un diccionario por query, en el mismo orden que query_texts,
+            con las claves query, ids, documents, metadatas y distances
+        """
+        per_query = [
+            {"query": text, "ids": [], "documents": [], "metadatas": [], "distances": []}
+            for text in query_texts
+        ]
+        if include_embeddings:
+            for entry in per_query:
+                entry["embeddings"] = []
+
+        positions = [i for i, text in enumerate(query_texts) if text]
+        if not positions:
+            return self._stack_embeddings(per_query) if include_embeddings else per_query
+
+        query_embeddings = self.embedding_model.embed_queries(
+            [query_texts[i] for i in positions]
+        )
+
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=include
+        )
+
+        seen_ids = set()
+        for row, position in enumerate(positions):
+            entry = per_query[position]
+            for column, (doc_id, doc, metadata, distance) in enumerate(zip(
+                results['ids'][row],
+                results['documents'][row],
+                results['metadatas'][row],
+                results['distances'][row]
+            )):
+                if deduplicate:
+                    if doc_id in seen_ids:
+                        continue
+                    seen_ids.add(doc_id)
+
+                entry["ids"].append(doc_id)
+                entry["documents"].append(doc)
+                entry["metadatas"].append(metadata)
+                entry["distances"].append(distance)
+                if include_embeddings:
+                    entry["embeddings"].append(results['embeddings'][row][column])
+
+        return self._stack_embeddings(per_query) if include_embeddings else per_query
+
+    def _stack_embeddings(self, per_query: List[Dict]) -> List[Dict]:
+        """Convierte la lista de embeddings de cada resultado en una matriz float32."""
+        dimension = self.embedding_model.dimension
+        for entry in per_query:
+            entry["embeddings"] = (
+                np.asarray(entry["embeddings"], dtype=np.float32)
+                if entry["embeddings"]
+                else np.empty((0, dimension), dtype=np.float32)
+            )
+        return per_query
+
     def get_collection_stats(self) -> Dict:
         """
         Obtiene estadísticas de la colección.
@@ -119,4 +391,7 @@ class ChromaVectorStore:
             name=self.collection_name,
             metadata={"hnsw:space": "cosine"}
         )
+        self.lexical_index.clear()
+        self.lexical_index.collection_id = self.get_collection_id()
+        self.save_lexical_index()
         print("✅ Colección reseteada")
@@ -0,0 +1,372 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Mapping, Optional
+from langchain_core.rate_limiters import BaseRateLimiter
+
+LLM_PROVIDERS = ("openai", "anthropic", "groq")
+
+# Posiciones del estado (un Array de doubles para poder compartirlo entre procesos)
+_REQUEST_BUDGET, _TOKEN_BUDGET, _LAST_REFILL, _BLOCKED_UNTIL, _CONSECUTIVE_429 = range(5)
+_REQUESTS, _TOKENS, _RATE_LIMITED, _WAITED_SECONDS = range(5, 9)
+_STATE_SIZE = 9
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Convierte "6m0s", "1.5s", "20ms" o "12" (segundos) a segundos; None si no se entiende."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Segundos pedidos por el proveedor en retry-after-ms / Retry-After (segundos o fecha HTTP)."""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """
+    Limitador de requests y tokens por minuto de un proveedor de LLM.
+
+    Sin límites configurados no frena a nadie: las llamadas salen a toda
+    velocidad mientras el proveedor tenga margen. Se adapta con lo que
+    reporta el proveedor:
+        - Headers x-ratelimit-remaining-*/reset-*: al agotarse el cupo, todos
+          los llamadores esperan hasta el reset
+        - 429: todos esperan el Retry-After (o un backoff exponencial si no
+          viene), con jitter para no volver todos a la vez
+
+    Con requests_per_minute / tokens_per_minute se agrega además un token
+    bucket propio por cada límite. Con shared=True el estado vive en memoria
+    compartida y lo respetan todos los procesos (benchmark en matriz).
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        shared: bool = False,
+        max_backoff: float = 60.0,
+        jitter: float = 0.5
+    ):
+        """
+        Args:
+            provider: Nombre del proveedor (solo informativo)
+            requests_per_minute: Límite propio de requests por minuto (None = sin límite)
+            tokens_per_minute: Límite propio de tokens por minuto (None = sin límite)
+            shared: Guardar el estado en memoria compartida entre procesos
+            max_backoff: Espera máxima tras 429 sin Retry-After, en segundos
+            jitter: Segundos aleatorios máximos que se suman a cada espera
+        """
+        self.provider = provider
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+        # Buckets llenos al inicio: hasta un minuto de cupo puede salir de golpe
+        initial = [0.0] * _STATE_SIZE
+        initial[_REQUEST_BUDGET] = requests_per_minute or 0.0
+        initial[_TOKEN_BUDGET] = tokens_per_minute or 0.0
+        initial[_LAST_REFILL] = time.monotonic()
+        if shared:
+            self._state = multiprocessing.get_context("spawn").Array("d", initial)
+            self._lock = self._state.get_lock()
+        else:
+            self._state = initial
+            self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserva una request (y sus tokens estimados); si no se puede, retorna cuánto esperar."""
+        state = self._state
+        with self._lock:
+            now = time.monotonic()
+            if now < state[_BLOCKED_UNTIL]:
+                return state[_BLOCKED_UNTIL] - now + random.uniform(0, self.jitter)
+
+            elapsed = now - state[_LAST_REFILL]
+            state[_LAST_REFILL] = now
+            wait = 0.0
+            if self.requests_per_minute:
+                state[_REQUEST_BUDGET] = min(
+                    self.requests_per_minute, state[_REQUEST_BUDGET] + elapsed * self.requests_per_minute / 60
+                )
+                if state[_REQUEST_BUDGET] < 1:
+                    wait = (1 - state[_REQUEST_BUDGET]) * 60 / self.requests_per_minute
+            if self.tokens_per_minute:
+                state[_TOKEN_BUDGET] = min(
+                    self.tokens_per_minute, state[_TOKEN_BUDGET] + elapsed * self.tokens_per_minute / 60
+                )
+                # Una request más grande que el cupo entero solo espera a tenerlo lleno
+                needed = min(tokens, self.tokens_per_minute)
+                if state[_TOKEN_BUDGET] < needed:
+                    wait = max(wait, (needed - state[_TOKEN_BUDGET]) * 60 / self.tokens_per_minute)
+            if wait > 0:
+                return wait
+
+            if self.requests_per_minute:
+                state[_REQUEST_BUDGET] -= 1
+            if self.tokens_per_minute:
+                state[_TOKEN_BUDGET] -= tokens
+            state[_REQUESTS] += 1
+            state[_TOKENS] += tokens
+            return 0.0
+
+    def _waited(self, seconds: float):
+        with self._lock:
+            self._state[_WAITED_SECONDS] += seconds
+
+    def acquire(self, *, blocking: bool = True, tokens: int = 0) -> bool:
+        """
+        Espera turno para una request.
+
+        Args:
+            blocking: Si es False, retorna False en vez de esperar
+            tokens: Tokens estimados de la request (para el límite por minuto)
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0:
+                return True
+            if not blocking:
+                return False
+            self._waited(wait)
+            time.sleep(wait)
+
+    async def aacquire(self, *, blocking: bool = True, tokens: int = 0) -> bool:
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0:
+                return True
+            if not blocking:
+                return False
+            self._waited(wait)
+            await asyncio.sleep(wait)
+
+    def _block_for(self, seconds: float):
+        """Frena a todos los llamadores durante `seconds` (sin acortar un bloqueo mayor)."""
+        with self._lock:
+            self._state[_BLOCKED_UNTIL] = max(self._state[_BLOCKED_UNTIL], time.monotonic() + seconds)
+
+    def record_usage(self, tokens: int, estimated: int):
+        """Corrige la estimación de tokens de una request con el uso real reportado."""
+        with self._lock:
+            if self.tokens_per_minute:
+                self._state[_TOKEN_BUDGET] -= tokens - estimated
+            self._state[_TOKENS] += tokens - estimated
+
+    def record_headers(self, headers: Mapping[str, str], next_tokens: int = 0):
+        """Bloquea hasta el reset si el proveedor reporta el cupo de requests o tokens agotado."""
+        for kind, needed in (("requests", 1), ("tokens", next_tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                exhausted = float(remaining) < max(needed, 1)
+            except ValueError:
+                continue
+            reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if exhausted and reset:
+                self._block_for(reset)
+
+    def record_rate_limited(self, retry_after: Optional[float] = None) -> float:
+        """
+        Registra un 429 y frena a todos los llamadores.
+
+        Returns:
+            Segundos de espera aplicados: el Retry-After del proveedor, o un
+            backoff exponencial con jitter si no lo indicó
+        """
+        with self._lock:
+            self._state[_CONSECUTIVE_429] += 1
+            self._state[_RATE_LIMITED] += 1
+            attempt = int(self._state[_CONSECUTIVE_429])
+
+        if retry_after is None:
+            backoff = min(self.max_backoff, 2.0 ** attempt)
+            retry_after = backoff / 2 + random.uniform(0, backoff / 2)
+        self._block_for(retry_after)
+        return retry_after
+
+    def record_success(self):
+        with self._lock:
+            self._state[_CONSECUTIVE_429] = 0
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas del limitador.
+
+        Returns:
+            Diccionario con provider, requests, tokens, rate_limited (429
+            recibidos), waited_seconds (espera acumulada de los llamadores) y
+            los límites configurados
+        """
+        with self._lock:
+            return {
+                "provider": self.provider,
+                "requests": int(self._state[_REQUESTS]),
+                "tokens": int(self._state[_TOKENS]),
+                "rate_limited": int(self._state[_RATE_LIMITED]),
+                "waited_seconds": round(self._state[_WAITED_SECONDS], 2),
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute
+            }
+
+
+def _estimate_tokens(request) -> int:
+    # ~4 bytes por token en el JSON del request; se corrige con el uso real de la respuesta
+    return len(request.content) // 4 if request.content else 0
+
+
+def _is_json_response(response) -> bool:
+    return response.status_code == 200 and response.headers.get("content-type", "").startswith("application/json")
+
+
+def _observe_response(limiter: AdaptiveRateLimiter, response):
+    estimated = _estimate_tokens(response.request)
+    limiter.record_headers(response.headers, next_tokens=estimated)
+    if response.status_code == 429:
+        limiter.record_rate_limited(parse_retry_after(response.headers))
+        return
+
+    limiter.record_success()
+    if _is_json_response(response):
+        try:
+            total = (json.loads(response.content).get("usage") or {}).get("total_tokens")
+        except (ValueError, AttributeError):
+            return
+        if isinstance(total, (int, float)):
+            limiter.record_usage(int(total), estimated)
+
+
+def rate_limit_event_hooks(limiter: AdaptiveRateLimiter) -> Dict[str, List[Callable]]:
+    """
+    event_hooks para un cliente httpx síncrono de un SDK de LLM.
+
+    Cada request (incluidos los reintentos del SDK) espera turno en el
+    limitador, y cada respuesta le informa headers de cupo, 429 y tokens usados.
+    """
+    def on_request(request):
+        limiter.acquire(tokens=_estimate_tokens(request))
+
+    def on_response(response):
+        # Solo respuestas JSON completas; los streams no se leen acá
+        if _is_json_response(response):
+            response.read()
+        _observe_response(limiter, response)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def async_rate_limit_event_hooks(limiter: AdaptiveRateLimiter) -> Dict[str, List[Callable]]:
+    """Versión async de rate_limit_event_hooks."""
+    async def on_request(request):
+        await limiter.aacquire(tokens=_estimate_tokens(request))
+
+    async def on_response(response):
+        if _is_json_response(response):
+            await response.aread()
+        _observe_response(limiter, response)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _configured_limit(name: str, provider: str) -> Optional[float]:
+    value = os.environ.get(f"{name}_{provider.upper()}") or os.environ.get(name)
+    if not value or float(value) <= 0:
+        return None
+    return float(value)
+
+
+def _create_limiter(provider: str, shared: bool = False) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(
+        provider,
+        requests_per_minute=_configured_limit("LLM_REQUESTS_PER_MINUTE", provider),
+        tokens_per_minute=_configured_limit("LLM_TOKENS_PER_MINUTE", provider),
+        shared=shared
+    )
+
+
+def get_rate_limiter(provider: str) -> AdaptiveRateLimiter:
+    """
+    Retorna el limitador del proveedor, compartido por todas las llamadas del proceso.
+
+    Se configura con las variables de entorno (por defecto sin límites propios;
+    solo se respetan los headers y los 429 del proveedor):
+        LLM_REQUESTS_PER_MINUTE: Requests por minuto para todos los proveedores
+        LLM_TOKENS_PER_MINUTE: Tokens por minuto para todos los proveedores
+        LLM_REQUESTS_PER_MINUTE_<PROVEEDOR> / LLM_TOKENS_PER_MINUTE_<PROVEEDOR>:
+            Límites de un proveedor (OPENAI, ANTHROPIC, GROQ)
+    """
+    limiter = _limiters.get(provider)
+    if limiter is not None:
+        return limiter
+
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = _create_limiter(provider)
+        return _limiters[provider]
+
+
+def share_rate_limiters() -> Dict[str, AdaptiveRateLimiter]:
+    """
+    Crea los limitadores de todos los proveedores en memoria compartida.
+
+    El resultado se pasa a los workers como initargs y se instala con
+    install_rate_limiters, de modo que todos respetan los mismos límites y
+    pausas.
+    """
+    with _limiters_lock:
+        for provider in LLM_PROVIDERS:
+            _limiters[provider] = _create_limiter(provider, shared=True)
+        return dict(_limiters)
+
+
+def install_rate_limiters(limiters: Dict[str, AdaptiveRateLimiter]):
+    """Usa en este proceso los limitadores compartidos creados por share_rate_limiters."""
+    with _limiters_lock:
+        _limiters.update(limiters)
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict]:
+    """Estadísticas de los limitadores que atendieron alguna request."""
+    stats = {provider: limiter.get_stats() for provider, limiter in list(_limiters.items())}
+    return {provider: s for provider, s in stats.items() if s["requests"]}
@@ -0,0 +1,46 @@
+"""Deterministic routing of user requests, shared by the orchestrator and the UI."""
+
+import os
+from typing import Literal
+
+_QUESTION_KEYWORDS = ("pregunta", "question", "nueva")
+_PERFORMANCE_KEYWORDS = ("rendimiento", "puntaje", "score")
+
+
+def is_question_request(text: str) -> bool:
+    """True if the text explicitly asks for a question."""
+    text = text.lower()
+    return any(keyword in text for keyword in _QUESTION_KEYWORDS)
+
+
+def is_performance_request(text: str) -> bool:
+    """True if the orchestrator routes the text to the performance report."""
+    if is_question_request(text):
+        return False
+    text = text.lower()
+    return any(keyword in text for keyword in _PERFORMANCE_KEYWORDS)
+
+
+def question_type_decision(overall_percentage: float) -> Literal["mcq", "open"]:
+    """
+    Question type for the student's overall performance.
+
+    Open-ended questions are only used when USE_OPEN_ENDED_QUESTIONS is
+    enabled and the performance reaches OPEN_ENDED_THRESHOLD (default 70%).
+    """
+    use_open_ended = os.environ.get("USE_OPEN_ENDED_QUESTIONS", "false").lower() == "true"
+    threshold = float(os.environ.get("OPEN_ENDED_THRESHOLD", "70.0"))
+    if use_open_ended and overall_percentage >= threshold:
+        return "open"
+    return "mcq"
+
+
+def route_request(text: str, overall_percentage: float) -> Literal["performance", "mcq", "open"]:
+    """
+    Where the orchestrator sends a request: the performance report, or a new
+    question of the type that fits the student's performance. Every request
+    that is not a performance request asks for a question.
+    """
+    if is_performance_request(text):
+        return "performance"
+    return question_type_decision(overall_percentage)
@@ -19,16 +19,25 @@ from services.service_manager import (
 )
 from final.models import AgentState
 from final.nodes import (
+    sync_and_async,
     orchestrator_node,
     feedback_agent_node,
+    afeedback_agent_node,
     question_creator_node,
+    aquestion_creator_node,
     open_question_creator_node,
+    aopen_question_creator_node,
     open_answer_evaluator_node,
+    aopen_answer_evaluator_node,
     difficulty_reviewer_node,
+    adifficulty_reviewer_node,
+    speculative_question_node,
+    aspeculative_question_node,
     present_question_node,
     route_orchestrator,
     route_after_feedback,
     route_after_question_creation,
+    route_after_speculative_creation,
     route_after_difficulty_review
 )
 from final.logs import log_separator, log_user_input, log_user_output
@@ -37,15 +46,34 @@ load_dotenv()
 colorama_init(autoreset=True)
 
 
-def build_workflow():
+def build_workflow(speculative: bool = None, present: bool = True):
+    """
+    Build the question workflow.
+
+    Args:
+        speculative: Create MCQ candidates in parallel and review them in one
+            batched call instead of the serial create/review/retry loop
+            (default: SPECULATIVE_QUESTIONS env var)
+        present: Register and present the approved question. With False the
+            workflow ends with the approved question in the state, unregistered
+            (used to pre-generate questions)
+    """
+    if speculative is None:
+        speculative = os.environ.get("SPECULATIVE_QUESTIONS", "false").lower() == "true"
+    present_target = "present_question" if present else END
+
     workflow = StateGraph(AgentState)
 
     workflow.add_node("orchestrator", orchestrator_node)
-    workflow.add_node("get_feedback", feedback_agent_node)
-    workflow.add_node("create_mcq_question", question_creator_node)
-    workflow.add_node("create_open_question", open_question_creator_node)
-    workflow.add_node("review_difficulty", difficulty_reviewer_node)
-    workflow.add_node("present_question", present_question_node)
+    workflow.add_node("get_feedback", sync_and_async(feedback_agent_node, afeedback_agent_node))
+    if speculative:
+        workflow.add_node("create_mcq_question", sync_and_async(speculative_question_node, aspeculative_question_node))
+    else:
+        workflow.add_node("create_mcq_question", sync_and_async(question_creator_node, aquestion_creator_node))
+    workflow.add_node("create_open_question", sync_and_async(open_question_creator_node, aopen_question_creator_node))
+    workflow.add_node("review_difficulty", sync_and_async(difficulty_reviewer_node, adifficulty_reviewer_node))
+    if present:
+        workflow.add_node("present_question", present_question_node)
 
     workflow.add_edge(START, "orchestrator")
     workflow.add_conditional_edges(
@@ -68,14 +96,25 @@ def build_workflow():
         }
     )
 
-    workflow.add_conditional_edges(
-        "create_mcq_question",
-        route_after_question_creation,
-        {
-            "review_difficulty": "review_difficulty",
-            "create_mcq_question": "create_mcq_question"
-        }
-    )
+    if speculative:
+        # The speculative node already reviewed its candidates
+        workflow.add_conditional_edges(
+            "create_mcq_question",
+            route_after_speculative_creation,
+            {
+                "present_question": present_target,
+                "end": END
+            }
+        )
+    else:
+        workflow.add_conditional_edges(
+            "create_mcq_question",
+            route_after_question_creation,
+            {
+                "review_difficulty": "review_difficulty",
+                "create_mcq_question": "create_mcq_question"
+            }
+        )
 
     workflow.add_conditional_edges(
         "create_open_question",
@@ -92,11 +131,12 @@ def build_workflow():
         {
             "create_mcq_question": "create_mcq_question",
             "create_open_question": "create_open_question",
-            "present_question": "present_question"
+            "present_question": present_target
         }
     )
 
-    workflow.add_edge("present_question", END)
+    if present:
+        workflow.add_edge("present_question", END)
 
     return workflow.compile()
 
@@ -105,7 +145,7 @@ def build_evaluation_workflow():
     """Separate workflow for evaluating open-ended answers"""
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("evaluate_answer", open_answer_evaluator_node)
+    workflow.add_node("evaluate_answer", sync_and_async(open_answer_evaluator_node, aopen_answer_evaluator_node))
 
     workflow.add_edge(START, "evaluate_answer")
     workflow.add_edge("evaluate_answer", END)
@@ -1,23 +1,124 @@
+import json
+import re
+from typing import Dict, Optional, Tuple
 import chainlit as cl
+from chainlit.utils import utc_now
 from services.service import MCQService
-from services.service_manager import initialize_session_services, get_service, set_service
+from services.service_manager import (
+    initialize_session_services,
+    get_service,
+    get_session_services,
+    restore_session_services
+)
 from final_agent import build_workflow
+from final.nodes import present_question_node, extract_json_from_response
+from final.prefetch import QuestionPrefetcher
 from langchain_core.messages import HumanMessage
 from tools.tools import check_last_multiple_choice_answer
 
+# Progress label for each workflow node
+_NODE_LABELS = {
+    "orchestrator": "🎯 Orquestador",
+    "get_feedback": "💡 Analizando tu historial",
+    "create_mcq_question": "✨ Creando pregunta",
+    "create_open_question": "✨ Creando pregunta abierta",
+    "review_difficulty": "⚖️ Revisando dificultad",
+    "present_question": "📢 Presentando pregunta"
+}
+_LLM_NODES = {"get_feedback", "create_mcq_question", "create_open_question", "review_difficulty"}
+_CREATOR_NODES = {"create_mcq_question", "create_open_question"}
+_PARTIAL_QUESTION = re.compile(r'"question"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _chunk_text(chunk) -> str:
+    """Text of a streamed chat model chunk (providers may send content blocks)."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def _draft_question(buffer: str):
+    """
+    Renders the question being generated as soon as it can be read from the
+    streamed JSON: the full question with options once it parses, or just the
+    question text once that field is complete.
+    """
+    try:
+        data = extract_json_from_response(buffer)
+    except ValueError:
+        data = None
+
+    if data and data.get("question"):
+        options = "\n".join(f"{chr(65 + i)}) {option}" for i, option in enumerate(data.get("options", [])))
+        return f"📝 **{data['question']}**\n\n{options}\n\n_(en revisión)_"
+
+    match = _PARTIAL_QUESTION.search(buffer)
+    if match:
+        try:
+            question = json.loads(f'"{match.group(1)}"')
+        except ValueError:
+            question = match.group(1)
+        return f"📝 **{question}**\n\n_(en revisión)_"
+    return None
+
+
+class _NodeRuns:
+    """
+    Streamed tokens of one node, kept per agent run.
+
+    The speculative creator node runs several creator agents concurrently and
+    then the batch reviewer, all under the same node, so their tokens arrive
+    interleaved. Each run gets its own buffer, and a question draft is only
+    read while the node has had a single run.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, str] = {}
+
+    @property
+    def concurrent(self) -> bool:
+        """True once a second run has streamed in this node."""
+        return len(self._buffers) > 1
+
+    def add(self, event: dict, token: str) -> Tuple[int, Optional[str]]:
+        """
+        Adds a streamed token to its run's buffer.
+
+        Returns:
+            Index of the run within the node (in order of first token) and the
+            question draft, or None while several runs share the node
+        """
+        parent_ids = event.get("parent_ids", [])
+        # parent_ids go from the graph root down: [graph, node, agent run, ...]
+        run_id = parent_ids[2] if len(parent_ids) > 2 else event["run_id"]
+        self._buffers[run_id] = self._buffers.get(run_id, "") + token
+        index = list(self._buffers).index(run_id)
+
+        if self.concurrent:
+            return index, None
+        return index, _draft_question(self._buffers[run_id])
+
+
 class ChainlitHandler:
     @staticmethod
     async def init_session():
         """Initialize user session with isolated services."""
         # Initialize all services (MCQ, Open-Ended, Unified)
-        initialize_session_services()
+        # With a persistent STORAGE_BACKEND, authenticated users get their history back
+        user = cl.user_session.get("user")
+        initialize_session_services(user.identifier if user else cl.user_session.get("id"))
 
-        # Store service in user session for reference
-        service = get_service()
-        cl.user_session.set("mcq_service", service)
+        # Store services in user session: each message runs in a new task without the ContextVars
+        cl.user_session.set("services", get_session_services())
 
         app = build_workflow()
         cl.user_session.set("app", app)
+
+        # Preguntas revisadas listas de antemano para ocultar la latencia del LLM
+        prefetcher = QuestionPrefetcher(build_workflow(present=False))
+        cl.user_session.set("prefetcher", prefetcher)
+        prefetcher.start()
         
         await cl.Message(
             content="¡Hola! Soy tu asistente de aprendizaje. Puedo generar preguntas de opción múltiple para ayudarte a estudiar. \n\nEscribe 'nueva pregunta' para comenzar o pídeme revisar tu rendimiento."
@@ -35,6 +136,13 @@ class ChainlitHandler:
 
         await ChainlitHandler._run_agent(app, user_input)
 
+    @staticmethod
+    async def end_session():
+        """Stop background work for the session."""
+        prefetcher = cl.user_session.get("prefetcher")
+        if prefetcher:
+            await prefetcher.close()
+
     @staticmethod
     async def process_action(action: cl.Action):
         """Handle button clicks."""
@@ -48,10 +156,10 @@ class ChainlitHandler:
     @staticmethod
     def _restore_context():
         """Restore ContextVars from session."""
-        service = cl.user_session.get("mcq_service")
-        set_service(service)
+        services = cl.user_session.get("services")
+        restore_session_services(services)
         app = cl.user_session.get("app")
-        return service, app
+        return services["mcq_service"], app
 
     @staticmethod
     def _is_answer_attempt(text: str) -> bool:
@@ -73,6 +181,10 @@ class ChainlitHandler:
                 f"({score_data['correct_count']}/{score_data['total_questions']} correctas)"
             )
             await cl.Message(content=score_msg).send()
+
+        prefetcher = cl.user_session.get("prefetcher")
+        if prefetcher:
+            prefetcher.on_performance_change()
         
         actions = [
             cl.Action(name="new_question", payload={"value": "nueva pregunta"}, label="Nueva Pregunta"),
@@ -83,6 +195,15 @@ class ChainlitHandler:
     @staticmethod
     async def _run_agent(app, user_input: str):
         """Execute the agent workflow."""
+        prefetcher = cl.user_session.get("prefetcher")
+        # Solo una solicitud que el orquestador enviaría a una pregunta MCQ consume la cola
+        prefetched = prefetcher.serve(user_input) if prefetcher else None
+        if prefetched:
+            # Registrar y mostrar la pregunta ya revisada, sin esperar al LLM
+            result = {**prefetched, **present_question_node(prefetched)}
+            await ChainlitHandler._render_agent_result(result)
+            return
+
         initial_state = {
             "messages": [HumanMessage(content=user_input)],
             "current_question": "",
@@ -96,13 +217,87 @@ class ChainlitHandler:
             "next_action": ""
         }
 
-        msg = cl.Message(content="")
-        await msg.send() # Placeholder for potential streaming
+        msg = cl.Message(content="⏳ Procesando...")
+        await msg.send()
 
-        # Use ainvoke to get final state in one go
-        result = await app.ainvoke(initial_state)
+        result = await ChainlitHandler._stream_workflow(app, initial_state, msg)
+        await msg.remove()
         await ChainlitHandler._render_agent_result(result)
 
+    @staticmethod
+    async def _stream_workflow(app, initial_state: dict, msg: cl.Message) -> dict:
+        """
+        Run the workflow with astream_events, showing progress as it happens.
+
+        Each top-level node gets a step that streams its LLM tokens (one
+        nested step per extra agent run, e.g. speculative candidates), the
+        placeholder message shows the current node, and the question draft is
+        rendered as soon as the creator's JSON can be read.
+
+        Returns:
+            Final workflow state (same as ainvoke)
+        """
+        result = {}
+        node = None
+        step = None
+        runs = _NodeRuns()
+        run_steps = {}
+
+        async for event in app.astream_events(initial_state, version="v2"):
+            kind = event["event"]
+            # Top-level nodes are direct children of the graph run
+            depth = len(event.get("parent_ids", []))
+
+            if kind == "on_chain_start" and depth == 1 and event["name"] in _NODE_LABELS:
+                node = event["name"]
+                runs = _NodeRuns()
+                run_steps = {}
+                step = cl.Step(
+                    name=_NODE_LABELS[node],
+                    type="llm" if node in _LLM_NODES else "run",
+                    default_open=(node == "get_feedback")
+                )
+                step.start = utc_now()
+                await step.send()
+                msg.content = f"{_NODE_LABELS[node]}..."
+                await msg.update()
+
+            elif kind == "on_chat_model_stream" and step is not None:
+                token = _chunk_text(event["data"]["chunk"])
+                if not token:
+                    continue
+                index, draft = runs.add(event, token)
+                if index == 0:
+                    await step.stream_token(token)
+                else:
+                    if index not in run_steps:
+                        run_steps[index] = cl.Step(
+                            name=f"{_NODE_LABELS[node]} ({index + 1})", type="llm", parent_id=step.id
+                        )
+                        run_steps[index].start = utc_now()
+                        await run_steps[index].send()
+                    await run_steps[index].stream_token(token)
+
+                if node in _CREATOR_NODES:
+                    # With several runs in the node no single draft is the question being created
+                    content = f"{_NODE_LABELS[node]}..." if runs.concurrent else draft
+                    if content and content != msg.content:
+                        msg.content = content
+                        await msg.update()
+
+            elif kind == "on_chain_end" and depth == 1 and step is not None and event["name"] == node:
+                for run_step in run_steps.values():
+                    run_step.end = utc_now()
+                    await run_step.update()
+                step.end = utc_now()
+                await step.update()
+                step = None
+
+            elif kind == "on_chain_end" and depth == 0:
+                result = event["data"].get("output") or {}
+
+        return result
+
     @staticmethod
     async def _render_agent_result(result: dict):
         """Display the final result from the agent."""
@@ -126,8 +321,8 @@ class ChainlitHandler:
              options = result["question_options"]
         else:
              q_data = service.get_question(last_id)
-             q_text = q_data["question"]
-             options = q_data["options"] # These are already shuffled
+             q_text = q_data.question
+             options = q_data.options # These are already shuffled
         
         question_display = f"**{q_text}**\n\n"
         actions = []
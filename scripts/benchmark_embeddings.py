@@ -0,0 +1,87 @@
+"""Benchmark de memoria y latencia: embeddings como listas de Python vs arrays float32."""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from dotenv import load_dotenv
+from colorama import Fore, Style, init as colorama_init
+
+# Configurar encoding UTF-8 para Windows
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.rag.embeddings import EmbeddingModel
+from final.rag.indexer import ContentIndexer
+
+load_dotenv()
+colorama_init(autoreset=True)
+
+
+def load_chunks(content_dir: str) -> list:
+    """Lee los .txt de content_dir y los divide en chunks como lo hace la indexación."""
+    indexer = ContentIndexer(vector_store=None)
+    chunks = []
+    for file_name in sorted(os.listdir(content_dir)):
+        if file_name.endswith('.txt'):
+            with open(os.path.join(content_dir, file_name), 'r', encoding='utf-8') as f:
+                chunks.extend(chunk.text for chunk in indexer.chunk_text(f.read(), chunk_size=400, overlap=50))
+    return chunks
+
+
+def measure(label: str, func, repeats: int = 20):
+    """Mide latencia promedio y memoria pico asignada por func."""
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    elapsed_ms = (time.perf_counter() - start) / repeats * 1000
+
+    print(f"   {label:<40} {elapsed_ms:>9.3f} ms  {peak / 1024:>10.1f} KB")
+    return result
+
+
+def main():
+    content_dir = os.environ.get("CONTENT_DIR", "./content")
+    chunks = load_chunks(content_dir)
+    if not chunks:
+        print(f"{Fore.RED}❌ No hay contenido para medir en {content_dir}{Style.RESET_ALL}")
+        return
+
+    model = EmbeddingModel()
+    matrix = model.embed_documents(chunks)
+    query = model.embed_query("conceptos fundamentales")
+
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}📊 {len(chunks)} chunks x {matrix.shape[1]} dims{Style.RESET_ALL}\n")
+    print(f"{Fore.CYAN}Indexación (matriz de documentos){Style.RESET_ALL}")
+
+    # Antes: encode -> .tolist() -> Chroma lo vuelve a convertir a float32
+    measure("listas de Python (tolist + np.array)",
+            lambda: np.array(matrix.tolist(), dtype=np.float32))
+    # Ahora: la matriz float32 se pasa tal cual
+    measure("ndarray float32 (sin copia)",
+            lambda: np.ascontiguousarray(matrix, dtype=np.float32))
+
+    print(f"\n{Fore.CYAN}Query individual{Style.RESET_ALL}")
+    measure("listas de Python (tolist + np.array)",
+            lambda: np.array([query.tolist()], dtype=np.float32), repeats=1000)
+    measure("ndarray float32 (sin copia)",
+            lambda: query[np.newaxis, :], repeats=1000)
+
+    list_bytes = sys.getsizeof(matrix.tolist()) + sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row) for row in matrix.tolist()
+    )
+    print(f"\n{Fore.GREEN}💾 Memoria de la matriz: listas={list_bytes / 1024:.1f} KB, "
+          f"ndarray={matrix.nbytes / 1024:.1f} KB{Style.RESET_ALL}\n")
+
+
+if __name__ == "__main__":
+    main()
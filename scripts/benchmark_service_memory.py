@@ -0,0 +1,121 @@
+"""Benchmark de memoria: bytes por pregunta respondida con registros dict + datetime vs dataclasses con __slots__."""
+
+import os
+import sys
+import uuid
+import argparse
+import tracemalloc
+from datetime import datetime
+from colorama import Fore, Style, init as colorama_init
+
+# Configurar encoding UTF-8 para Windows
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.service import MCQService, OpenEndedService
+
+colorama_init(autoreset=True)
+
+_OPTIONS = ["Un sistema integrado", "Un lenguaje", "Un protocolo", "Una base de datos"]
+
+
+def legacy_mcq(n: int):
+    """Antes: un dict por pregunta y por respuesta, con datetime y listas."""
+    questions, answers = {}, {}
+    for i in range(n):
+        question_id = str(uuid.uuid4())
+        questions[question_id] = {
+            'question': f"¿Pregunta {i}?",
+            'options': list(_OPTIONS),
+            'correct_answer': _OPTIONS[0],
+            'created_at': datetime.now()
+        }
+        answers[question_id] = {
+            'user_answer': _OPTIONS[i % 4],
+            'is_correct': i % 4 == 0,
+            'answered_at': datetime.now()
+        }
+    return questions, answers
+
+
+def current_mcq(n: int) -> MCQService:
+    """Ahora: registros congelados con __slots__ y timestamps epoch."""
+    service = MCQService()
+    for i in range(n):
+        question_id = service.store_question(f"¿Pregunta {i}?", list(_OPTIONS), _OPTIONS[0])
+        service.store_user_answer(question_id, _OPTIONS[i % 4], i % 4 == 0)
+    return service
+
+
+def legacy_open(n: int):
+    questions, evaluations = {}, {}
+    for i in range(n):
+        question_id = str(uuid.uuid4())
+        questions[question_id] = {
+            'question': f"Explica el concepto {i}",
+            'evaluation_criteria': "Precisión y profundidad",
+            'key_concepts': ["integración", "procesos"],
+            'difficulty': "medio",
+            'created_at': datetime.now()
+        }
+        evaluations[question_id] = {
+            'user_answer': f"Respuesta {i}",
+            'score': 7.5,
+            'feedback': "Buena respuesta",
+            'is_passing': True,
+            'strengths': ["claridad"],
+            'weaknesses': ["ejemplos"],
+            'evaluated_at': datetime.now()
+        }
+    return questions, evaluations
+
+
+def current_open(n: int) -> OpenEndedService:
+    service = OpenEndedService()
+    for i in range(n):
+        question_id = service.store_question(
+            f"Explica el concepto {i}", "Precisión y profundidad", ["integración", "procesos"], "medio"
+        )
+        service.store_evaluation(
+            question_id, f"Respuesta {i}", 7.5, "Buena respuesta", True, ["claridad"], ["ejemplos"]
+        )
+    return service
+
+
+def measure(label: str, build, n: int) -> float:
+    """Memoria retenida por build(n), en bytes por pregunta respondida."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build(n)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    per_question = (after - before) / n
+    print(f"   {label:<40} {per_question:>10.1f} B/pregunta  {(after - before) / 1024:>10.1f} KB")
+    return per_question
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memoria por pregunta respondida (registros dict vs __slots__)')
+    parser.add_argument('--questions', type=int, default=10000,
+                        help='Preguntas respondidas a simular')
+    args = parser.parse_args()
+
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}💾 {args.questions} preguntas respondidas por tipo{Style.RESET_ALL}\n")
+
+    for title, legacy, current in (
+        ("Opción múltiple", legacy_mcq, current_mcq),
+        ("Abiertas", legacy_open, current_open)
+    ):
+        print(f"{Fore.CYAN}{title}{Style.RESET_ALL}")
+        before = measure("dicts + datetime (antes)", legacy, args.questions)
+        after = measure("dataclasses __slots__ + epoch (ahora)", current, args.questions)
+        print(f"{Fore.GREEN}   Reducción: {(1 - after / before) * 100:.1f}%{Style.RESET_ALL}\n")
+
+
+if __name__ == "__main__":
+    main()
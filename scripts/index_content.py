@@ -14,13 +14,15 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from final.rag.vector_store import ChromaVectorStore
 from final.rag.indexer import ContentIndexer
+from final.rag.pipeline import IngestionPipeline
 from final.rag.retriever import ContentRetriever
+from final.rag.embeddings import get_model_stats
 
 load_dotenv()
 colorama_init(autoreset=True)
 
 
-def main(force_reset=False):
+def main(force_reset=False, incremental=False, workers=None):
     """Indexa el contenido del curso en ChromaDB."""
     print(f"\n{Fore.CYAN}{Style.BRIGHT}{'='*70}")
     print("🚀 INDEXACIÓN DE CONTENIDO EN CHROMADB")
@@ -38,7 +40,9 @@ def main(force_reset=False):
     if stats['count'] > 0:
         print(f"\n{Fore.YELLOW}⚠️  La colección ya contiene {stats['count']} documentos.{Style.RESET_ALL}")
 
-        if force_reset:
+        if incremental and not force_reset:
+            print(f"{Fore.BLUE}ℹ️  Modo incremental: solo se re-indexan los chunks que cambiaron{Style.RESET_ALL}")
+        elif force_reset:
             print(f"{Fore.YELLOW}🔄 Forzando reseteo (--force)...{Style.RESET_ALL}")
             vector_store.reset_collection()
             print(f"{Fore.GREEN}✅ Colección reseteada{Style.RESET_ALL}")
@@ -84,12 +88,23 @@ def main(force_reset=False):
     print(f"{Fore.BLUE}⚙️  Configuración: chunk_size=400 palabras, overlap=50 palabras{Style.RESET_ALL}\n")
 
     try:
-        total_chunks = 0
-        for i, file_path in enumerate(files_to_index, 1):
-            print(f"\n{Fore.CYAN}[{i}/{len(files_to_index)}] {os.path.basename(file_path)}{Style.RESET_ALL}")
-            num_chunks = indexer.index_file(file_path, chunk_size=400, overlap=50)
-            total_chunks += num_chunks
-            print(f"{Fore.GREEN}   ✅ {num_chunks} chunks creados{Style.RESET_ALL}")
+        if workers:
+            # Pipeline en streaming: chunking en paralelo, embeddings y escrituras en batches
+            pipeline = IngestionPipeline(indexer, workers=workers)
+            pipeline_stats = pipeline.run(files_to_index, chunk_size=400, overlap=50)
+            total_chunks = pipeline_stats['chunks_embedded'] + pipeline_stats['chunks_unchanged']
+        else:
+            # La sincronización incremental solo embebe los chunks que no están en el índice
+            sync_results = indexer.sync_files(files_to_index, chunk_size=400, overlap=50)
+
+            total_chunks = 0
+            for i, (file_path, result) in enumerate(sync_results.items(), 1):
+                print(f"\n{Fore.CYAN}[{i}/{len(sync_results)}] {os.path.basename(file_path)}{Style.RESET_ALL}")
+                total_chunks += result['added'] + result['unchanged']
+                print(
+                    f"{Fore.GREEN}   ✅ {result['added']} chunks nuevos, {result['removed']} eliminados, "
+                    f"{result['unchanged']} sin cambios{Style.RESET_ALL}"
+                )
 
         print(f"\n{Fore.GREEN}{Style.BRIGHT}{'='*70}")
         print(f"✅ INDEXACIÓN COMPLETADA")
@@ -100,7 +115,13 @@ def main(force_reset=False):
         stats = vector_store.get_collection_stats()
         print(f"{Fore.CYAN}📊 Estadísticas de la colección:{Style.RESET_ALL}")
         print(f"   - Nombre: {Fore.WHITE}{stats['name']}{Style.RESET_ALL}")
-        print(f"   - Total documentos: {Fore.WHITE}{stats['count']}{Style.RESET_ALL}\n")
+        print(f"   - Total documentos: {Fore.WHITE}{stats['count']}{Style.RESET_ALL}")
+        for model_name, model_stats in get_model_stats().items():
+            print(
+                f"   - Modelo {model_name}: {Fore.WHITE}carga {model_stats['load_seconds']}s, "
+                f"RSS {model_stats['rss_mb']} MB (pico {model_stats['peak_rss_mb']} MB){Style.RESET_ALL}"
+            )
+        print()
 
         # Test de búsqueda
         print(f"{Fore.CYAN}{Style.BRIGHT}🔍 PRUEBA DE BÚSQUEDA{Style.RESET_ALL}")
@@ -145,6 +166,10 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='Indexar contenido del curso en ChromaDB')
     parser.add_argument('--force', action='store_true', help='Forzar reseteo sin confirmación')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-indexar solo los chunks que cambiaron, sin resetear la colección')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos para el pipeline de ingesta en paralelo (para directorios grandes)')
     args = parser.parse_args()
 
-    main(force_reset=args.force)
+    main(force_reset=args.force, incremental=args.incremental, workers=args.workers)
@@ -0,0 +1,122 @@
+"""Load test: sesiones concurrentes del workflow con nodos sync vs async en un solo worker."""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from dotenv import load_dotenv
+from colorama import Fore, Style, init as colorama_init
+
+# Configurar encoding UTF-8 para Windows
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+import final_agent
+from services.service_manager import initialize_session_services
+
+load_dotenv()
+colorama_init(autoreset=True)
+
+# Respuestas fijas por agente: el load test mide el overhead del workflow, no el LLM
+_FAKE_RESPONSES = {
+    "question_creator": json.dumps({
+        "question": "¿Qué es un ERP?",
+        "options": ["Un sistema integrado", "Un lenguaje", "Un protocolo", "Una base de datos"],
+        "correct_index": 0
+    }),
+    "difficulty_reviewer": json.dumps({"approved": True, "feedback": "Dificultad adecuada"}),
+    "feedback": "El usuario progresa de forma constante."
+}
+
+
+class FakeAgent:
+    """Agente que simula la latencia de un round trip al LLM."""
+
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    def _result(self):
+        return {"messages": [AIMessage(content=_FAKE_RESPONSES[self.name])]}
+
+    def invoke(self, _input):
+        time.sleep(self.latency)  # bloquea el thread, como una llamada HTTP sync
+        return self._result()
+
+    async def ainvoke(self, _input):
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+async def run_session(app) -> float:
+    """Ejecuta un pedido de pregunta en una sesión aislada y retorna su latencia."""
+    initialize_session_services()
+    start = time.perf_counter()
+    await app.ainvoke({
+        "messages": [HumanMessage(content="nueva pregunta")],
+        "iteration_count": 0
+    })
+    return time.perf_counter() - start
+
+
+async def run_load(mode: str, sessions: int, threads: int) -> dict:
+    """Corre `sessions` sesiones concurrentes con nodos sync (modo actual) o async."""
+    # Un solo worker: el executor por defecto acota cuántos nodos sync corren a la vez
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads))
+
+    if mode == "sync":
+        # Como antes: solo la implementación sync de cada nodo
+        with patch.object(final_agent, "sync_and_async", lambda func, afunc: func):
+            app = final_agent.build_workflow()
+    else:
+        app = final_agent.build_workflow()
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(run_session(app) for _ in range(sessions))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "elapsed": elapsed,
+        "throughput": sessions / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test de sesiones concurrentes (sync vs async)')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 50, 100],
+                        help='Cantidades de sesiones concurrentes a probar')
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help='Latencia simulada por llamada al LLM (segundos)')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Threads del executor del worker')
+    args = parser.parse_args()
+
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}⚡ LOAD TEST: latencia LLM={args.latency}s, threads={args.threads}{Style.RESET_ALL}\n")
+    print(f"   {'modo':<6} {'sesiones':>8} {'total (s)':>10} {'sesiones/s':>11} {'p50 (s)':>8} {'p95 (s)':>8}")
+
+    with patch("final.nodes.get_agent", lambda name: FakeAgent(name, args.latency)):
+        for sessions in args.sessions:
+            for mode in ("sync", "async"):
+                stats = asyncio.run(run_load(mode, sessions, args.threads))
+                color = Fore.GREEN if mode == "async" else Fore.WHITE
+                print(
+                    f"{color}   {stats['mode']:<6} {stats['sessions']:>8} {stats['elapsed']:>10.2f} "
+                    f"{stats['throughput']:>11.1f} {stats['p50']:>8.2f} {stats['p95']:>8.2f}{Style.RESET_ALL}"
+                )
+    print()
+
+
+if __name__ == "__main__":
+    main()
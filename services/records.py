@@ -0,0 +1,57 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Tuple, Union
+
+
+@dataclass(frozen=True, slots=True)
+class MCQQuestion:
+    """Pregunta de opción múltiple almacenada"""
+    question: str
+    options: Tuple[str, ...]
+    correct_answer: str
+    created_at: float  # epoch (time.time())
+
+
+@dataclass(frozen=True, slots=True)
+class MCQAnswer:
+    """Respuesta del usuario a una pregunta de opción múltiple"""
+    user_answer: str
+    is_correct: bool
+    answered_at: float
+
+
+@dataclass(frozen=True, slots=True)
+class OpenQuestion:
+    """Pregunta abierta almacenada"""
+    question: str
+    evaluation_criteria: str
+    key_concepts: Tuple[str, ...]
+    difficulty: str
+    created_at: float
+
+
+@dataclass(frozen=True, slots=True)
+class OpenEvaluation:
+    """Evaluación de la respuesta del usuario a una pregunta abierta"""
+    user_answer: str
+    score: float
+    feedback: str
+    is_passing: bool
+    strengths: Tuple[str, ...]
+    weaknesses: Tuple[str, ...]
+    evaluated_at: float
+
+
+Record = Union[MCQQuestion, MCQAnswer, OpenQuestion, OpenEvaluation]
+
+
+def record_to_dict(record: Record) -> Dict:
+    """Convierte un registro a diccionario (para serializarlo)"""
+    return {field.name: getattr(record, field.name) for field in fields(record)}
+
+
+def record_from_dict(record_type, data: Dict) -> Record:
+    """Reconstruye un registro desde un diccionario; las listas vuelven a ser tuplas"""
+    return record_type(**{
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in data.items()
+    })
@@ -1,62 +1,102 @@
 import os
-from typing import List, Dict, Optional
+import time
+from collections import deque
+from typing import Deque, List, Dict, Mapping, Optional, Tuple
 import uuid
-from datetime import datetime
+from services.records import MCQQuestion, MCQAnswer, OpenQuestion, OpenEvaluation
+from services.storage import StorageBackend, InMemoryStorage
+
+# Respuestas que forman el rendimiento reciente
+RECENT_WINDOW = 5
 
 
 class MCQService:
-    def __init__(self):
-        self._questions: Dict[str, Dict] = {}
-        self._answers: Dict[str, Dict] = {}
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        self._storage = storage or InMemoryStorage()
+        # Agregados que se actualizan al escribir, para que el puntaje no recorra el historial.
+        # Son válidos para la versión del historial en _aggregates_version
+        self._aggregates_version = 0
+        self._answered_count = 0
+        self._correct_count = 0
+        self._recent: Deque[Tuple[str, MCQAnswer]] = deque(maxlen=RECENT_WINDOW)
+        self._load_aggregates()
+
+    @property
+    def history_version(self) -> int:
+        """Versión del historial de respuestas; cambia con cada respuesta almacenada"""
+        return self._storage.answers_version()
+
+    def _sync_aggregates(self):
+        """Recarga los agregados si otra instancia escribió en el mismo almacenamiento"""
+        if self._storage.answers_version() != self._aggregates_version:
+            self._load_aggregates()
+
+    def _load_aggregates(self):
+        """Recalcula los agregados desde el almacenamiento (una pasada por el historial)"""
+        # La versión se lee antes: una escritura concurrente solo provoca otra recarga
+        self._aggregates_version = self._storage.answers_version()
+        answers = sorted(self._storage.all_answers().items(), key=lambda x: x[1].answered_at)
+        self._answered_count = len(answers)
+        self._correct_count = sum(1 for _, ans in answers if ans.is_correct)
+        self._recent.clear()
+        self._recent.extend(answers[-RECENT_WINDOW:])
     
     def store_question(self, question: str, options: List[str], correct_answer: str) -> str:
         """Almacena una pregunta de opción múltiple y retorna su ID"""
         question_id = str(uuid.uuid4())
-        self._questions[question_id] = {
-            'question': question,
-            'options': options,
-            'correct_answer': correct_answer,
-            'created_at': datetime.now()
-        }
+        self._storage.put_question(
+            question_id, MCQQuestion(question, tuple(options), correct_answer, time.time())
+        )
         return question_id
     
-    def get_question(self, question_id: str) -> Optional[Dict]:
+    def get_question(self, question_id: str) -> Optional[MCQQuestion]:
         """Obtiene una pregunta por su ID"""
-        return self._questions.get(question_id)
+        return self._storage.get_question(question_id)
     
     def store_user_answer(self, question_id: str, user_answer: str, is_correct: bool) -> bool:
         """Almacena la respuesta del usuario y si fue correcta"""
-        if question_id not in self._questions:
+        if self._storage.get_question(question_id) is None:
             return False
         
-        self._answers[question_id] = {
-            'user_answer': user_answer,
-            'is_correct': is_correct,
-            'answered_at': datetime.now()
-        }
+        previously_answered = self._storage.get_answer(question_id) is not None
+        answer = MCQAnswer(user_answer, is_correct, time.time())
+        self._storage.put_answer(question_id, answer)
+        version = self._storage.answers_version()
+
+        if previously_answered or version != self._aggregates_version + 1:
+            # Reemplazar una respuesta, o escrituras de otra instancia, son poco comunes: se recalcula todo
+            self._load_aggregates()
+        else:
+            self._aggregates_version = version
+            self._answered_count += 1
+            self._correct_count += int(is_correct)
+            self._recent.append((question_id, answer))
         return True
     
-    def get_user_answer(self, question_id: str) -> Optional[Dict]:
+    def get_user_answer(self, question_id: str) -> Optional[MCQAnswer]:
         """Obtiene la respuesta del usuario para una pregunta"""
-        return self._answers.get(question_id)
+        return self._storage.get_answer(question_id)
     
-    def get_all_questions(self) -> Dict[str, Dict]:
-        """Obtiene todas las preguntas almacenadas"""
-        return self._questions.copy()
+    def get_all_questions(self) -> Mapping[str, MCQQuestion]:
+        """Obtiene todas las preguntas almacenadas (vista de solo lectura, sin copiar)"""
+        return self._storage.all_questions()
     
-    def get_all_answers(self) -> Dict[str, Dict]:
-        """Obtiene todas las respuestas almacenadas"""
-        return self._answers.copy()
+    def get_all_answers(self) -> Mapping[str, MCQAnswer]:
+        """Obtiene todas las respuestas almacenadas (vista de solo lectura, sin copiar)"""
+        return self._storage.all_answers()
 
     def get_last_question_id(self) -> Optional[str]:
         """Retorna el ID de la pregunta creada más recientemente"""
-        if not self._questions:
-            return None
-        return max(self._questions.items(), key=lambda item: item[1].get('created_at'))[0]
+        return self._storage.last_question_id()
+
+    def get_recent_questions(self, limit: Optional[int] = None) -> List[Tuple[str, MCQQuestion]]:
+        """Retorna las últimas `limit` preguntas (todas si es None) en orden de creación"""
+        return self._storage.recent_questions(limit)
     
     def compute_user_score(self) -> Dict:
         """Calcula el puntaje y métricas de rendimiento del usuario"""
-        total_questions = len(self._answers)
+        self._sync_aggregates()
+        total_questions = self._answered_count
         if total_questions == 0:
             return {
                 'total_questions': 0,
@@ -66,23 +106,18 @@ class MCQService:
                 'recent_performance': []
             }
         
-        correct_count = sum(1 for ans in self._answers.values() if ans['is_correct'])
+        correct_count = self._correct_count
         incorrect_count = total_questions - correct_count
         score_percentage = (correct_count / total_questions) * 100
         
-        # Obtener las últimas 5 respuestas
-        sorted_answers = sorted(
-            self._answers.items(),
-            key=lambda x: x[1]['answered_at']
-        )
-        recent_answers = sorted_answers[-5:]
+        # Últimas 5 respuestas, en orden cronológico
         recent_performance = [
             {
                 'question_id': qid,
-                'is_correct': ans['is_correct'],
-                'answered_at': ans['answered_at']
+                'is_correct': ans.is_correct,
+                'answered_at': ans.answered_at
             }
-            for qid, ans in recent_answers
+            for qid, ans in self._recent
         ]
         
         return {
@@ -93,23 +128,25 @@ class MCQService:
             'recent_performance': recent_performance
         }
     
-    def get_answer_history(self) -> List[Dict]:
-        """Retorna historial cronológico de respuestas"""
-        sorted_answers = sorted(
-            self._answers.items(),
-            key=lambda x: x[1]['answered_at']
-        )
+    def get_answer_history(self, limit: Optional[int] = None) -> List[Dict]:
+        """Retorna historial cronológico de respuestas (las últimas `limit`, todas si es None)"""
+        answers = self._storage.recent_answers(limit)
+        # El historial completo lee todas las preguntas de una vez; las últimas N, solo las suyas
+        if limit is None:
+            questions = self._storage.all_questions()
+        else:
+            questions = {qid: self._storage.get_question(qid) for qid, _ in answers}
         
         history = []
-        for qid, ans in sorted_answers:
-            question_data = self._questions.get(qid, {})
+        for qid, ans in answers:
+            question_data = questions.get(qid)
             history.append({
                 'question_id': qid,
-                'question': question_data.get('question', ''),
-                'user_answer': ans['user_answer'],
-                'correct_answer': question_data.get('correct_answer', ''),
-                'is_correct': ans['is_correct'],
-                'answered_at': ans['answered_at']
+                'question': question_data.question if question_data else '',
+                'user_answer': ans.user_answer,
+                'correct_answer': question_data.correct_answer if question_data else '',
+                'is_correct': ans.is_correct,
+                'answered_at': ans.answered_at
             })
         
         return history
@@ -172,66 +209,100 @@ class FileService:
 class OpenEndedService:
     """Service for managing open-ended questions and evaluations."""
 
-    def __init__(self):
-        self._questions: Dict[str, Dict] = {}
-        self._evaluations: Dict[str, Dict] = {}
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        self._storage = storage or InMemoryStorage()
+        # Agregados que se actualizan al escribir, para que el puntaje no recorra el historial.
+        # Son válidos para la versión del historial en _aggregates_version
+        self._aggregates_version = 0
+        self._evaluated_count = 0
+        self._score_sum = 0.0
+        self._passing_count = 0
+        self._recent: Deque[Tuple[str, OpenEvaluation]] = deque(maxlen=RECENT_WINDOW)
+        self._load_aggregates()
+
+    @property
+    def history_version(self) -> int:
+        """Versión del historial de evaluaciones; cambia con cada evaluación almacenada"""
+        return self._storage.answers_version()
+
+    def _sync_aggregates(self):
+        """Recarga los agregados si otra instancia escribió en el mismo almacenamiento"""
+        if self._storage.answers_version() != self._aggregates_version:
+            self._load_aggregates()
+
+    def _load_aggregates(self):
+        """Recalcula los agregados desde el almacenamiento (una pasada por el historial)"""
+        # La versión se lee antes: una escritura concurrente solo provoca otra recarga
+        self._aggregates_version = self._storage.answers_version()
+        evaluations = sorted(self._storage.all_answers().items(), key=lambda x: x[1].evaluated_at)
+        self._evaluated_count = len(evaluations)
+        self._score_sum = sum(eval_data.score for _, eval_data in evaluations)
+        self._passing_count = sum(1 for _, eval_data in evaluations if eval_data.is_passing)
+        self._recent.clear()
+        self._recent.extend(evaluations[-RECENT_WINDOW:])
 
     def store_question(self, question: str, criteria: str,
                       key_concepts: List[str], difficulty: str) -> str:
         """Almacena una pregunta abierta y retorna su ID"""
         question_id = str(uuid.uuid4())
-        self._questions[question_id] = {
-            'question': question,
-            'evaluation_criteria': criteria,
-            'key_concepts': key_concepts,
-            'difficulty': difficulty,
-            'created_at': datetime.now()
-        }
+        self._storage.put_question(
+            question_id, OpenQuestion(question, criteria, tuple(key_concepts), difficulty, time.time())
+        )
         return question_id
 
-    def get_question(self, question_id: str) -> Optional[Dict]:
+    def get_question(self, question_id: str) -> Optional[OpenQuestion]:
         """Obtiene una pregunta por su ID"""
-        return self._questions.get(question_id)
+        return self._storage.get_question(question_id)
 
     def store_evaluation(self, question_id: str, user_answer: str,
                         score: float, feedback: str, is_passing: bool,
                         strengths: List[str], weaknesses: List[str]) -> bool:
         """Almacena la evaluación de una respuesta abierta"""
-        if question_id not in self._questions:
+        if self._storage.get_question(question_id) is None:
             return False
 
-        self._evaluations[question_id] = {
-            'user_answer': user_answer,
-            'score': score,
-            'feedback': feedback,
-            'is_passing': is_passing,
-            'strengths': strengths,
-            'weaknesses': weaknesses,
-            'evaluated_at': datetime.now()
-        }
+        previously_evaluated = self._storage.get_answer(question_id) is not None
+        evaluation = OpenEvaluation(
+            user_answer, score, feedback, is_passing, tuple(strengths), tuple(weaknesses), time.time()
+        )
+        self._storage.put_answer(question_id, evaluation)
+        version = self._storage.answers_version()
+
+        if previously_evaluated or version != self._aggregates_version + 1:
+            # Reemplazar una evaluación, o escrituras de otra instancia, son poco comunes: se recalcula todo
+            self._load_aggregates()
+        else:
+            self._aggregates_version = version
+            self._evaluated_count += 1
+            self._score_sum += score
+            self._passing_count += int(is_passing)
+            self._recent.append((question_id, evaluation))
         return True
 
-    def get_evaluation(self, question_id: str) -> Optional[Dict]:
+    def get_evaluation(self, question_id: str) -> Optional[OpenEvaluation]:
         """Obtiene la evaluación para una pregunta"""
-        return self._evaluations.get(question_id)
+        return self._storage.get_answer(question_id)
 
-    def get_all_questions(self) -> Dict[str, Dict]:
-        """Obtiene todas las preguntas almacenadas"""
-        return self._questions.copy()
+    def get_all_questions(self) -> Mapping[str, OpenQuestion]:
+        """Obtiene todas las preguntas almacenadas (vista de solo lectura, sin copiar)"""
+        return self._storage.all_questions()
 
-    def get_all_evaluations(self) -> Dict[str, Dict]:
-        """Obtiene todas las evaluaciones almacenadas"""
-        return self._evaluations.copy()
+    def get_all_evaluations(self) -> Mapping[str, OpenEvaluation]:
+        """Obtiene todas las evaluaciones almacenadas (vista de solo lectura, sin copiar)"""
+        return self._storage.all_answers()
 
     def get_last_question_id(self) -> Optional[str]:
         """Retorna el ID de la pregunta creada más recientemente"""
-        if not self._questions:
-            return None
-        return max(self._questions.items(), key=lambda item: item[1].get('created_at'))[0]
+        return self._storage.last_question_id()
+
+    def get_recent_questions(self, limit: Optional[int] = None) -> List[Tuple[str, OpenQuestion]]:
+        """Retorna las últimas `limit` preguntas (todas si es None) en orden de creación"""
+        return self._storage.recent_questions(limit)
 
     def compute_user_score(self) -> Dict:
         """Calcula métricas de rendimiento para preguntas abiertas"""
-        total_questions = len(self._evaluations)
+        self._sync_aggregates()
+        total_questions = self._evaluated_count
         if total_questions == 0:
             return {
                 'total_questions': 0,
@@ -241,25 +312,19 @@ class OpenEndedService:
                 'recent_performance': []
             }
 
-        scores = [eval_data['score'] for eval_data in self._evaluations.values()]
-        avg_score = sum(scores) / len(scores)
-        passing_count = sum(1 for eval_data in self._evaluations.values() if eval_data['is_passing'])
+        avg_score = self._score_sum / total_questions
+        passing_count = self._passing_count
         score_percentage = (avg_score / 10.0) * 100  # Convert to percentage
 
-        # Obtener las últimas 5 evaluaciones
-        sorted_evals = sorted(
-            self._evaluations.items(),
-            key=lambda x: x[1]['evaluated_at']
-        )
-        recent_evals = sorted_evals[-5:]
+        # Últimas 5 evaluaciones, en orden cronológico
         recent_performance = [
             {
                 'question_id': qid,
-                'score': eval_data['score'],
-                'is_passing': eval_data['is_passing'],
-                'evaluated_at': eval_data['evaluated_at']
+                'score': eval_data.score,
+                'is_passing': eval_data.is_passing,
+                'evaluated_at': eval_data.evaluated_at
             }
-            for qid, eval_data in recent_evals
+            for qid, eval_data in self._recent
         ]
 
         return {
@@ -270,26 +335,27 @@ class OpenEndedService:
             'recent_performance': recent_performance
         }
 
-    def get_evaluation_history(self) -> List[Dict]:
-        """Retorna historial cronológico de evaluaciones"""
-        sorted_evals = sorted(
-            self._evaluations.items(),
-            key=lambda x: x[1]['evaluated_at']
-        )
+    def get_evaluation_history(self, limit: Optional[int] = None) -> List[Dict]:
+        """Retorna historial cronológico de evaluaciones (las últimas `limit`, todas si es None)"""
+        evaluations = self._storage.recent_answers(limit)
+        if limit is None:
+            questions = self._storage.all_questions()
+        else:
+            questions = {qid: self._storage.get_question(qid) for qid, _ in evaluations}
 
         history = []
-        for qid, eval_data in sorted_evals:
-            question_data = self._questions.get(qid, {})
+        for qid, eval_data in evaluations:
+            question_data = questions.get(qid)
             history.append({
                 'question_id': qid,
-                'question': question_data.get('question', ''),
-                'user_answer': eval_data['user_answer'],
-                'score': eval_data['score'],
-                'feedback': eval_data['feedback'],
-                'is_passing': eval_data['is_passing'],
-                'strengths': eval_data['strengths'],
-                'weaknesses': eval_data['weaknesses'],
-                'evaluated_at': eval_data['evaluated_at']
+                'question': question_data.question if question_data else '',
+                'user_answer': eval_data.user_answer,
+                'score': eval_data.score,
+                'feedback': eval_data.feedback,
+                'is_passing': eval_data.is_passing,
+                'strengths': list(eval_data.strengths),
+                'weaknesses': list(eval_data.weaknesses),
+                'evaluated_at': eval_data.evaluated_at
             })
 
         return history
@@ -302,6 +368,10 @@ class UnifiedPerformanceService:
         self.mcq = mcq_service
         self.open = open_service
 
+    def history_version(self) -> Tuple[int, int]:
+        """Versión del historial de respuestas (MCQ, abiertas); cambia con cada respuesta nueva"""
+        return self.mcq.history_version, self.open.history_version
+
     def compute_unified_performance(self) -> Dict:
         """
         Retorna performance unificado combinando MCQ y Open-Ended.
@@ -377,4 +447,23 @@ class UnifiedPerformanceService:
             'mcq_correct': mcq_data['correct_count'],
             'open_avg_score': open_data['avg_score'],
             'recent_overall_performance': recent_overall_performance
-        }
\ No newline at end of file
+        }
+
+
+class FeedbackMemo:
+    """Último análisis del Feedback Agent y la versión del historial sobre la que se hizo"""
+
+    def __init__(self):
+        self.analysis: Optional[str] = None
+        self.version: Tuple[int, int] = (0, 0)
+
+    def new_answers(self, version: Tuple[int, int]) -> Optional[int]:
+        """Respuestas agregadas desde el último análisis (None si todavía no hay análisis)"""
+        if self.analysis is None:
+            return None
+        return sum(version) - sum(self.version)
+
+    def store(self, analysis: str, version: Tuple[int, int]):
+        """Guarda el análisis hecho con el historial en la versión indicada"""
+        self.analysis = analysis
+        self.version = version
@@ -1,10 +1,14 @@
+import uuid
 from contextvars import ContextVar
-from services.service import MCQService, OpenEndedService, UnifiedPerformanceService
+from typing import Dict, Optional
+from services.service import MCQService, OpenEndedService, UnifiedPerformanceService, FeedbackMemo
+from services.storage import create_storage
 
 # Context variable to hold the MCQService instance for the current user session
 _mcq_service_ctx = ContextVar("mcq_service", default=None)
 _open_service_ctx = ContextVar("open_service", default=None)
 _unified_performance_ctx = ContextVar("unified_performance", default=None)
+_feedback_memo_ctx = ContextVar("feedback_memo", default=None)
 
 def get_service() -> MCQService:
     """
@@ -49,12 +53,53 @@ def set_unified_performance(service: UnifiedPerformanceService):
     """Sets UnifiedPerformanceService for current context."""
     _unified_performance_ctx.set(service)
 
-def initialize_session_services():
-    """Initializes all services for a new session. Call at session start."""
-    mcq_svc = MCQService()
-    open_svc = OpenEndedService()
+def get_feedback_memo() -> FeedbackMemo:
+    """Returns the FeedbackMemo for current context, or an empty one if unset."""
+    memo = _feedback_memo_ctx.get()
+    if memo is None:
+        return FeedbackMemo()
+    return memo
+
+def set_feedback_memo(memo: FeedbackMemo):
+    """Sets FeedbackMemo for current context."""
+    _feedback_memo_ctx.set(memo)
+
+def get_session_services() -> Dict:
+    """
+    Returns the services of the current context, to be kept in the session.
+
+    Each Chainlit message runs in a new task, so the ContextVars set at chat
+    start are lost; restore them with restore_session_services on every message.
+    """
+    return {
+        "mcq_service": _mcq_service_ctx.get(),
+        "open_service": _open_service_ctx.get(),
+        "unified_performance": _unified_performance_ctx.get(),
+        "feedback_memo": _feedback_memo_ctx.get()
+    }
+
+def restore_session_services(services: Dict):
+    """Sets the services saved with get_session_services in the current context."""
+    set_service(services["mcq_service"])
+    set_open_service(services["open_service"])
+    set_unified_performance(services["unified_performance"])
+    set_feedback_memo(services["feedback_memo"])
+
+def initialize_session_services(owner_id: Optional[str] = None):
+    """
+    Initializes all services for a new session. Call at session start.
+
+    Args:
+        owner_id: User (or session) whose history is loaded and stored; with a
+            persistent STORAGE_BACKEND, reusing it restores the history.
+            Defaults to a new random id.
+    """
+    owner_id = owner_id or str(uuid.uuid4())
+    mcq_svc = MCQService(create_storage("mcq", owner_id))
+    open_svc = OpenEndedService(create_storage("open", owner_id))
     unified_svc = UnifiedPerformanceService(mcq_svc, open_svc)
 
     set_service(mcq_svc)
     set_open_service(open_svc)
     set_unified_performance(unified_svc)
+    set_feedback_memo(FeedbackMemo())
@@ -0,0 +1,358 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from services.records import (
+    MCQQuestion,
+    MCQAnswer,
+    OpenQuestion,
+    OpenEvaluation,
+    Record,
+    record_to_dict,
+    record_from_dict
+)
+
+# Tablas, columna de tiempo de las respuestas y tipos de registro por tipo de servicio
+_SCHEMAS = {
+    "mcq": ("mcq_questions", "mcq_answers", "answered_at", MCQQuestion, MCQAnswer),
+    "open": ("open_questions", "open_evaluations", "evaluated_at", OpenQuestion, OpenEvaluation)
+}
+
+
+class StorageBackend(ABC):
+    """
+    Persistencia de las preguntas y respuestas de un servicio para un usuario.
+
+    Cada respuesta (o evaluación) está asociada al ID de su pregunta, y
+    guardar una respuesta para una pregunta ya respondida la reemplaza.
+
+    all_questions y all_answers recorren todo el historial (exportarlo); las
+    consultas de lo último (last_question_id, recent_questions,
+    recent_answers) no dependen de su tamaño.
+    """
+
+    @abstractmethod
+    def put_questions(self, items: Iterable[Tuple[str, Record]]):
+        """Guarda (o reemplaza) preguntas como pares (question_id, registro)"""
+
+    @abstractmethod
+    def get_question(self, question_id: str) -> Optional[Record]:
+        """Obtiene una pregunta por su ID"""
+
+    @abstractmethod
+    def all_questions(self) -> Mapping[str, Record]:
+        """Obtiene todas las preguntas del usuario (solo lectura, en orden de creación)"""
+
+    @abstractmethod
+    def last_question_id(self) -> Optional[str]:
+        """Retorna el ID de la pregunta creada más recientemente"""
+
+    @abstractmethod
+    def recent_questions(self, limit: Optional[int] = None) -> List[Tuple[str, Record]]:
+        """Retorna las últimas `limit` preguntas (todas si es None) en orden de creación"""
+
+    @abstractmethod
+    def put_answers(self, items: Iterable[Tuple[str, Record]]):
+        """Guarda (o reemplaza) respuestas como pares (question_id, registro)"""
+
+    @abstractmethod
+    def get_answer(self, question_id: str) -> Optional[Record]:
+        """Obtiene la respuesta a una pregunta"""
+
+    @abstractmethod
+    def all_answers(self) -> Mapping[str, Record]:
+        """Obtiene todas las respuestas del usuario (solo lectura)"""
+
+    @abstractmethod
+    def recent_answers(self, limit: Optional[int] = None) -> List[Tuple[str, Record]]:
+        """
+        Retorna las últimas `limit` respuestas (todas si es None) en orden de
+        escritura; una respuesta reemplazada pasa al final
+        """
+
+    @abstractmethod
+    def answers_version(self) -> int:
+        """
+        Versión del historial de respuestas: aumenta con cada respuesta guardada,
+        también si la escribe otra instancia que comparte el almacenamiento
+        """
+
+    def put_question(self, question_id: str, record: Record):
+        """Guarda (o reemplaza) una pregunta"""
+        self.put_questions([(question_id, record)])
+
+    def put_answer(self, question_id: str, record: Record):
+        """Guarda (o reemplaza) una respuesta"""
+        self.put_answers([(question_id, record)])
+
+
+class InMemoryStorage(StorageBackend):
+    """Almacenamiento en diccionarios del proceso; se pierde al reiniciar (default)"""
+
+    def __init__(self):
+        self._questions: Dict[str, Record] = {}
+        self._answers: Dict[str, Record] = {}
+        # IDs en orden de inserción: la última pregunta y las últimas N salen de un slice
+        self._question_log: List[str] = []
+        self._answers_version = 0
+        # Las vistas reflejan los cambios sin copiar los diccionarios en cada lectura
+        self._questions_view = MappingProxyType(self._questions)
+        self._answers_view = MappingProxyType(self._answers)
+
+    def put_questions(self, items: Iterable[Tuple[str, Record]]):
+        for question_id, record in items:
+            if question_id not in self._questions:
+                self._question_log.append(question_id)
+            self._questions[question_id] = record
+
+    def get_question(self, question_id: str) -> Optional[Record]:
+        return self._questions.get(question_id)
+
+    def all_questions(self) -> Mapping[str, Record]:
+        return self._questions_view
+
+    def last_question_id(self) -> Optional[str]:
+        return self._question_log[-1] if self._question_log else None
+
+    def recent_questions(self, limit: Optional[int] = None) -> List[Tuple[str, Record]]:
+        if limit is None:
+            question_ids = self._question_log
+        else:
+            question_ids = self._question_log[-limit:] if limit > 0 else []
+        return [(question_id, self._questions[question_id]) for question_id in question_ids]
+
+    def put_answers(self, items: Iterable[Tuple[str, Record]]):
+        items = list(items)
+        for question_id, record in items:
+            # El diccionario queda en orden de escritura: una respuesta reemplazada pasa al final
+            self._answers.pop(question_id, None)
+            self._answers[question_id] = record
+        self._answers_version += len(items)
+
+    def get_answer(self, question_id: str) -> Optional[Record]:
+        return self._answers.get(question_id)
+
+    def all_answers(self) -> Mapping[str, Record]:
+        return self._answers_view
+
+    def recent_answers(self, limit: Optional[int] = None) -> List[Tuple[str, Record]]:
+        if limit is None:
+            return list(self._answers.items())
+        recent = list(islice(reversed(self._answers.items()), max(limit, 0)))
+        recent.reverse()
+        return recent
+
+    def answers_version(self) -> int:
+        return self._answers_version
+
+
+def _encode_record(record: Record) -> str:
+    return json.dumps(record_to_dict(record), ensure_ascii=False)
+
+
+def _decode_record(record_type, data: str) -> Record:
+    return record_from_dict(record_type, json.loads(data))
+
+
+_connections: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_connections_lock = threading.Lock()
+
+
+def _shared_connection(path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    """Una conexión por archivo y proceso, compartida por todas las sesiones."""
+    with _connections_lock:
+        if path not in _connections:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            db = sqlite3.connect(path, check_same_thread=False)
+            # WAL: lecturas concurrentes entre workers mientras otro escribe
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+
+            for questions_table, answers_table, time_field, _, _ in _SCHEMAS.values():
+                db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {questions_table} ("
+                    "owner_id TEXT NOT NULL, "
+                    "question_id TEXT NOT NULL, "
+                    "created_at REAL, "
+                    "data TEXT NOT NULL, "
+                    "PRIMARY KEY (owner_id, question_id))"
+                )
+                db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {answers_table} ("
+                    "owner_id TEXT NOT NULL, "
+                    "question_id TEXT NOT NULL, "
+                    f"{time_field} REAL, "
+                    "data TEXT NOT NULL, "
+                    "PRIMARY KEY (owner_id, question_id))"
+                )
+                db.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{questions_table}_created_at "
+                    f"ON {questions_table} (owner_id, created_at)"
+                )
+                db.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{answers_table}_{time_field} "
+                    f"ON {answers_table} (owner_id, {time_field})"
+                )
+                # (owner_id, rowid): lo último de un usuario sale de ORDER BY rowid DESC LIMIT sin recorrer su historial
+                for table in (questions_table, answers_table):
+                    db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_owner ON {table} (owner_id)")
+            # Versión del historial por usuario y tabla, actualizada en la misma transacción que las respuestas
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS answer_versions ("
+                "owner_id TEXT NOT NULL, "
+                "answers_table TEXT NOT NULL, "
+                "version INTEGER NOT NULL, "
+                "PRIMARY KEY (owner_id, answers_table))"
+            )
+            db.commit()
+
+            _connections[path] = (db, threading.Lock())
+
+        return _connections[path]
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Almacenamiento en un archivo SQLite compartido por sesiones y workers.
+
+    Las filas se separan por owner_id (usuario o sesión). Los registros se
+    guardan como JSON junto a sus timestamps en columnas indexadas, y los
+    lotes se escriben en una sola transacción. Cada lote de respuestas
+    incrementa answer_versions en esa misma transacción, así las instancias
+    que comparten el archivo detectan escrituras ajenas con una sola lectura.
+    """
+
+    def __init__(self, path: str, owner_id: str, kind: str):
+        """
+        Args:
+            path: Ruta al archivo SQLite (se crea si no existe)
+            owner_id: Usuario o sesión dueña de los registros
+            kind: Tipo de servicio ("mcq" u "open")
+        """
+        self.path = path
+        self.owner_id = owner_id
+        (
+            self._questions_table, self._answers_table, self._time_field,
+            self._question_type, self._answer_type
+        ) = _SCHEMAS[kind]
+        self._db, self._lock = _shared_connection(path)
+
+    def _write(self, table: str, time_column: str, items: Iterable[Tuple[str, Record]]):
+        rows = [
+            (self.owner_id, question_id, getattr(record, time_column), _encode_record(record))
+            for question_id, record in items
+        ]
+        if not rows:
+            return
+        # rowid es el orden de escritura: reemplazar una pregunta la deja en su lugar,
+        # reemplazar una respuesta (INSERT OR REPLACE, rowid nuevo) la pasa al final
+        if table == self._answers_table:
+            statement = f"INSERT OR REPLACE INTO {table} (owner_id, question_id, {time_column}, data) VALUES (?, ?, ?, ?)"
+        else:
+            statement = (
+                f"INSERT INTO {table} (owner_id, question_id, {time_column}, data) VALUES (?, ?, ?, ?) "
+                f"ON CONFLICT (owner_id, question_id) DO UPDATE SET {time_column} = excluded.{time_column}, data = excluded.data"
+            )
+        with self._lock:
+            self._db.executemany(statement, rows)
+            if table == self._answers_table:
+                self._db.execute(
+                    "INSERT INTO answer_versions (owner_id, answers_table, version) VALUES (?, ?, ?) "
+                    "ON CONFLICT (owner_id, answers_table) DO UPDATE SET version = version + excluded.version",
+                    (self.owner_id, table, len(rows))
+                )
+            self._db.commit()
+
+    def _read_one(self, table: str, record_type, question_id: str) -> Optional[Record]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT data FROM {table} WHERE owner_id = ? AND question_id = ?",
+                (self.owner_id, question_id)
+            ).fetchone()
+        return _decode_record(record_type, row[0]) if row else None
+
+    def _read_all(self, table: str, record_type) -> Mapping[str, Record]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT question_id, data FROM {table} WHERE owner_id = ? ORDER BY rowid",
+                (self.owner_id,)
+            ).fetchall()
+        return MappingProxyType({question_id: _decode_record(record_type, data) for question_id, data in rows})
+
+    def _read_recent(self, table: str, record_type, limit: Optional[int]) -> List[Tuple[str, Record]]:
+        # LIMIT -1 es "sin límite" en SQLite; el índice (owner_id) trae el rowid y evita ordenar
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT question_id, data FROM {table} WHERE owner_id = ? ORDER BY rowid DESC LIMIT ?",
+                (self.owner_id, -1 if limit is None else limit)
+            ).fetchall()
+        return [(question_id, _decode_record(record_type, data)) for question_id, data in reversed(rows)]
+
+    def put_questions(self, items: Iterable[Tuple[str, Record]]):
+        self._write(self._questions_table, "created_at", items)
+
+    def get_question(self, question_id: str) -> Optional[Record]:
+        return self._read_one(self._questions_table, self._question_type, question_id)
+
+    def all_questions(self) -> Mapping[str, Record]:
+        return self._read_all(self._questions_table, self._question_type)
+
+    def last_question_id(self) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT question_id FROM {self._questions_table} WHERE owner_id = ? "
+                "ORDER BY rowid DESC LIMIT 1",
+                (self.owner_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def recent_questions(self, limit: Optional[int] = None) -> List[Tuple[str, Record]]:
+        return self._read_recent(self._questions_table, self._question_type, limit)
+
+    def put_answers(self, items: Iterable[Tuple[str, Record]]):
+        self._write(self._answers_table, self._time_field, items)
+
+    def get_answer(self, question_id: str) -> Optional[Record]:
+        return self._read_one(self._answers_table, self._answer_type, question_id)
+
+    def all_answers(self) -> Mapping[str, Record]:
+        return self._read_all(self._answers_table, self._answer_type)
+
+    def recent_answers(self, limit: Optional[int] = None) -> List[Tuple[str, Record]]:
+        return self._read_recent(self._answers_table, self._answer_type, limit)
+
+    def answers_version(self) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version FROM answer_versions WHERE owner_id = ? AND answers_table = ?",
+                (self.owner_id, self._answers_table)
+            ).fetchone()
+        return row[0] if row else 0
+
+
+def create_storage(kind: str, owner_id: str) -> StorageBackend:
+    """
+    Crea el almacenamiento de un servicio según la configuración.
+
+    Se configura con las variables de entorno:
+        STORAGE_BACKEND: "memory" (default) o "sqlite"
+        STORAGE_PATH: Archivo SQLite (default ./data/sessions.sqlite3)
+
+    Args:
+        kind: Tipo de servicio ("mcq" u "open")
+        owner_id: Usuario o sesión dueña de los registros
+    """
+    backend = os.environ.get("STORAGE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return InMemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(os.environ.get("STORAGE_PATH", "./data/sessions.sqlite3"), owner_id, kind)
+    raise ValueError(f"STORAGE_BACKEND desconocido: {backend}")
@@ -0,0 +1,47 @@
+"""Fixtures compartidos por los tests."""
+
+import hashlib
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class HashingEmbeddingModel:
+    """
+    Embeddings deterministas de bolsa de palabras (hashing) con la interfaz de
+    EmbeddingModel: textos con palabras en común quedan cerca, sin descargar
+    ningún modelo.
+    """
+
+    model_name = "hashing-test"
+    dimension = 256
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16) % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts, batch_size: int = 32) -> np.ndarray:
+        return np.array([self._embed(text) for text in texts], dtype=np.float32).reshape(len(texts), self.dimension)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed(text)
+
+    def embed_queries(self, texts) -> np.ndarray:
+        return self.embed_documents(texts)
+
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """ChromaVectorStore real en un directorio temporal, con HashingEmbeddingModel."""
+    from final.rag import vector_store as vector_store_module
+
+    monkeypatch.setattr(vector_store_module, "EmbeddingModel", HashingEmbeddingModel)
+    return vector_store_module.ChromaVectorStore(persist_directory=str(tmp_path / "chroma_db"))
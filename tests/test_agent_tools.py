@@ -0,0 +1,56 @@
+"""Tests de las tools de RAG de los agentes."""
+
+import asyncio
+import contextvars
+
+from final import agent_tools
+from services.service import MCQService
+from services.service_manager import set_service
+
+
+class _RecordingRetriever:
+    def __init__(self):
+        self.queries = None
+
+    def retrieve_related_to_errors(self, incorrect_questions):
+        self.queries = incorrect_questions
+        return "contenido"
+
+    async def aretrieve_related_to_errors(self, incorrect_questions):
+        return self.retrieve_related_to_errors(incorrect_questions)
+
+
+def _service_with_answers() -> MCQService:
+    service = MCQService()
+    for text, is_correct in (("¿Qué es un grafo?", False), ("¿Qué es una pila?", True), ("¿Qué es BFS?", False)):
+        question_id = service.store_question(text, ["A", "B"], "A")
+        service.store_user_answer(question_id, "A" if is_correct else "B", is_correct)
+    return service
+
+
+def test_weak_areas_use_incorrect_question_texts(monkeypatch):
+    retriever = _RecordingRetriever()
+    monkeypatch.setattr(agent_tools, "get_rag_components", lambda: (None, retriever))
+
+    def run():
+        set_service(_service_with_answers())
+        return agent_tools.analyze_weak_areas_tool.invoke({})
+
+    assert contextvars.Context().run(run) == "contenido"
+    assert retriever.queries == ["¿Qué es un grafo?", "¿Qué es BFS?"]
+
+
+def test_async_weak_areas_use_incorrect_question_texts(monkeypatch):
+    retriever = _RecordingRetriever()
+
+    async def components():
+        return None, retriever
+
+    monkeypatch.setattr(agent_tools, "aget_rag_components", components)
+
+    async def run():
+        set_service(_service_with_answers())
+        return await agent_tools.analyze_weak_areas_tool.ainvoke({})
+
+    assert asyncio.run(run()) == "contenido"
+    assert retriever.queries == ["¿Qué es un grafo?", "¿Qué es BFS?"]
@@ -0,0 +1,32 @@
+"""Tests de la creación del cliente LLM."""
+
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("langchain_anthropic")
+
+from final import agents, rate_limiter
+
+
+def test_anthropic_client_reports_429_to_the_limiter(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+
+    model = agents.create_model()
+    limiter = rate_limiter.get_rate_limiter("anthropic")
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages", content=b"{}")
+
+    for client in (model._client._client, model._async_client._client):
+        assert client.event_hooks["request"] and client.event_hooks["response"]
+
+    model._client._client.event_hooks["response"][0](
+        httpx.Response(429, headers={"retry-after": "5"}, request=request)
+    )
+    assert limiter.get_stats()["rate_limited"] == 1
+    assert not limiter.acquire(blocking=False)
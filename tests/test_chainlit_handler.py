@@ -0,0 +1,105 @@
+"""Tests del progreso en streaming de la interfaz de Chainlit."""
+
+import asyncio
+import os
+import sys
+
+from langchain_core.messages import AIMessageChunk
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from interface import chainlit_handler
+from interface.chainlit_handler import ChainlitHandler
+
+
+class _FakeStep:
+    created = []
+
+    def __init__(self, name, type="undefined", parent_id=None, default_open=False):
+        self.id = f"step-{len(_FakeStep.created)}"
+        self.name = name
+        self.parent_id = parent_id
+        self.output = ""
+        _FakeStep.created.append(self)
+
+    async def send(self):
+        pass
+
+    async def update(self):
+        pass
+
+    async def stream_token(self, token):
+        self.output += token
+
+
+class _FakeMessage:
+    def __init__(self):
+        self.content = ""
+        self.history = []
+
+    async def update(self):
+        self.history.append(self.content)
+
+
+class _FakeApp:
+    def __init__(self, events):
+        self.events = events
+
+    async def astream_events(self, state, version):
+        for event in self.events:
+            yield event
+
+
+def _node_events(tokens_by_run):
+    """Eventos de create_mcq_question con los tokens de cada run intercalados."""
+    events = [{"event": "on_chain_start", "name": "create_mcq_question", "parent_ids": ["graph"], "run_id": "node"}]
+    for run_id, token in tokens_by_run:
+        events.append({
+            "event": "on_chat_model_stream",
+            "name": "ChatModel",
+            "run_id": f"{run_id}-model",
+            "parent_ids": ["graph", "node", run_id, f"{run_id}-inner"],
+            "data": {"chunk": AIMessageChunk(content=token)}
+        })
+    events.append({"event": "on_chain_end", "name": "create_mcq_question", "parent_ids": ["graph"], "run_id": "node"})
+    events.append({"event": "on_chain_end", "name": "LangGraph", "parent_ids": [], "run_id": "graph", "data": {"output": {}}})
+    return events
+
+
+def _stream(events, monkeypatch):
+    _FakeStep.created = []
+    monkeypatch.setattr(chainlit_handler.cl, "Step", _FakeStep)
+    msg = _FakeMessage()
+    asyncio.run(ChainlitHandler._stream_workflow(_FakeApp(events), {}, msg))
+    return msg
+
+
+def test_single_creator_run_shows_draft(monkeypatch):
+    msg = _stream(_node_events([("a", '{"question": "¿Qué es '), ("a", 'TCP?", "options": [')]), monkeypatch)
+
+    assert any("¿Qué es TCP?" in content for content in msg.history)
+    assert _FakeStep.created[0].output == '{"question": "¿Qué es TCP?", "options": ['
+
+
+def test_interleaved_candidates_show_no_draft(monkeypatch):
+    events = _node_events([
+        ("a", '{"question": "¿Qué es '),
+        ("b", '{"question": "¿Qué es '),
+        ("a", 'TCP?", "options": ['),
+        ("b", 'UDP?", "options": ['),
+        # El revisor en lote corre después, en el mismo nodo
+        ("review", '{"question": "¿Qué es UDP?", "approved": true}'),
+    ])
+    msg = _stream(events, monkeypatch)
+
+    assert not any("TCP" in content or "UDP" in content for content in msg.history)
+    assert msg.content == "✨ Creando pregunta..."
+
+    # Cada run escribe su texto completo en su propio step
+    node_step, *run_steps = _FakeStep.created
+    assert node_step.output == '{"question": "¿Qué es TCP?", "options": ['
+    assert [step.output for step in run_steps] == [
+        '{"question": "¿Qué es UDP?", "options": [',
+        '{"question": "¿Qué es UDP?", "approved": true}'
+    ]
+    assert all(step.parent_id == node_step.id for step in run_steps)
@@ -0,0 +1,70 @@
+"""Tests del chunker con offsets y del lector de spans."""
+
+import os
+
+import pytest
+
+from final.rag.indexer import ContentIndexer
+from final.rag.spans import SourceSpanReader
+
+TEXT = (
+    "Capítulo 1\n\n"
+    "La «programación dinámica» resuelve subproblemas una sola vez.» Luego combina resultados (ver tabla).\n"
+    "Un valor con NBSP y otro con em space; también acentos: árbol, código, canción!\n\n"
+    "Sección 2: grafos\n"
+    "Un grafo G = (V, E) tiene vértices y aristas. ¿Cuál es el camino mínimo?» Dijkstra lo encuentra.\n"
+) * 15
+
+
+@pytest.fixture
+def chunker():
+    return ContentIndexer(vector_store=None)
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(12, 3), (25, 5), (60, 10)])
+def test_chunk_text_and_chunk_file_match(chunker, tmp_path, chunk_size, overlap):
+    path = tmp_path / "curso.txt"
+    path.write_bytes(TEXT.encode('utf-8'))
+
+    from_text = chunker.chunk_text(TEXT, chunk_size=chunk_size, overlap=overlap)
+    from_file = chunker.chunk_file(str(path), chunk_size=chunk_size, overlap=overlap)
+
+    assert from_text == from_file
+    for chunk in from_text:
+        assert TEXT[chunk.start_char:chunk.end_char] == chunk.text
+        assert TEXT.encode('utf-8')[chunk.start_byte:chunk.end_byte].decode('utf-8') == chunk.text
+
+
+def test_span_reader_reads_exact_spans(chunker, tmp_path):
+    path = tmp_path / "curso.txt"
+    path.write_bytes(TEXT.encode('utf-8'))
+    texts, metadatas, _ = chunker.build_chunk_records(str(path), chunker.chunk_file(str(path), 25, 5))
+
+    reader = SourceSpanReader()
+    assert [reader.read_span(metadata) for metadata in metadatas] == texts
+    reader.close()
+
+
+def test_span_reader_survives_truncated_and_replaced_files(chunker, tmp_path):
+    path = tmp_path / "curso.txt"
+    path.write_bytes(TEXT.encode('utf-8'))
+    _, metadatas, _ = chunker.build_chunk_records(str(path), chunker.chunk_file(str(path), 25, 5))
+    reader = SourceSpanReader()
+    reader.read_span(metadatas[-1])
+
+    # Truncado en el lugar: lectura corta, sin SIGBUS
+    with open(path, 'r+b') as f:
+        f.truncate(10)
+    assert reader.read_span(metadatas[-1]) == ""
+
+    # Reemplazado por otro archivo: se vuelve a abrir
+    replacement = tmp_path / "nuevo.txt"
+    replacement.write_bytes(TEXT.encode('utf-8'))
+    os.replace(replacement, path)
+    assert reader.read_span(metadatas[0]) == TEXT.encode('utf-8')[
+        metadatas[0]["start_byte"]:metadatas[0]["end_byte"]
+    ].decode('utf-8')
+
+    os.remove(path)
+    assert reader.read_span(metadatas[0]) is None
+    reader.close()
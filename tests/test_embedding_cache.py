@@ -0,0 +1,129 @@
+"""Tests de la cache de embeddings de queries."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.rag import embedding_cache, embeddings
+from final.rag.embedding_cache import EmbeddingCache, get_query_cache
+from final.rag.retriever import ContentRetriever
+
+
+def _vector(value: float) -> np.ndarray:
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_hit_normalizes_query_text():
+    cache = EmbeddingCache()
+    cache.put("modelo", "¿Qué es  TCP? ", _vector(1.0))
+
+    cached = cache.get("modelo", "¿Qué es TCP?")
+    np.testing.assert_array_equal(cached, _vector(1.0))
+    assert not cached.flags.writeable
+    assert cache.get("otro-modelo", "¿Qué es TCP?") is None
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache(max_size=2)
+    cache.put("modelo", "a", _vector(1.0))
+    cache.put("modelo", "b", _vector(2.0))
+    cache.get("modelo", "a")
+    cache.put("modelo", "c", _vector(3.0))
+
+    assert cache.get("modelo", "b") is None
+    assert cache.get("modelo", "a") is not None
+    assert cache.get("modelo", "c") is not None
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["size"] == 2
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: now[0])
+    cache = EmbeddingCache(ttl_seconds=60)
+    cache.put("modelo", "a", _vector(1.0))
+
+    now[0] += 59
+    assert cache.get("modelo", "a") is not None
+    now[0] += 2
+    assert cache.get("modelo", "a") is None
+    assert cache.get_stats()["size"] == 0
+
+
+def test_disk_layer_survives_restart(tmp_path):
+    path = str(tmp_path / "cache" / "queries.sqlite3")
+    EmbeddingCache(disk_path=path).put("modelo", "a", _vector(1.5))
+
+    restarted = EmbeddingCache(disk_path=path)
+    np.testing.assert_array_equal(restarted.get("modelo", "a"), _vector(1.5))
+    assert restarted.get_stats()["disk_hits"] == 1
+
+    # Después del primer acierto en disco se sirve desde memoria
+    restarted.get("modelo", "a")
+    assert restarted.get_stats()["hits"] == 1
+
+
+def test_disk_layer_respects_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "queries.sqlite3")
+    EmbeddingCache(disk_path=path).put("modelo", "a", _vector(1.0))
+
+    now[0] += 120
+    assert EmbeddingCache(ttl_seconds=60, disk_path=path).get("modelo", "a") is None
+
+
+def test_get_query_cache_reads_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_query_cache", None)
+    monkeypatch.setenv("EMBEDDING_CACHE_SIZE", "7")
+    monkeypatch.setenv("EMBEDDING_CACHE_TTL", "30")
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "queries.sqlite3"))
+
+    cache = get_query_cache()
+    assert (cache.max_size, cache.ttl_seconds, cache.disk_path) == (7, 30.0, str(tmp_path / "queries.sqlite3"))
+    assert get_query_cache() is cache
+
+
+def test_get_query_cache_defaults(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_query_cache", None)
+    for name in ("EMBEDDING_CACHE_SIZE", "EMBEDDING_CACHE_TTL", "EMBEDDING_CACHE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+
+    cache = get_query_cache()
+    assert (cache.max_size, cache.ttl_seconds, cache.disk_path) == (1024, None, None)
+
+
+class _CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, show_progress_bar=False, convert_to_numpy=True):
+        self.calls += 1
+        return _vector(float(len(text)))
+
+
+def test_embed_query_is_served_from_cache(monkeypatch):
+    encoder = _CountingEncoder()
+    monkeypatch.setattr(embeddings, "get_shared_model", lambda model_name: encoder)
+    model = embeddings.EmbeddingModel(query_cache=EmbeddingCache())
+
+    first = model.embed_query("grafos dirigidos")
+    second = model.embed_query("grafos  dirigidos")
+
+    assert encoder.calls == 1
+    np.testing.assert_array_equal(first, second)
+
+
+@pytest.mark.parametrize("query", ["", "   "])
+def test_blank_query_does_not_reach_chroma(vector_store, query):
+    vector_store.upsert_documents(["grafos dirigidos"], [{"source": "curso.txt", "chunk_index": 0}], ["grafos"])
+
+    assert vector_store.query(query)["ids"] == [[]]
+    for mode in ("vector", "lexical", "hybrid"):
+        assert ContentRetriever(vector_store, mode=mode).retrieve(query).chunks == []
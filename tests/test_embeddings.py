@@ -0,0 +1,25 @@
+"""Tests de la medición de memoria del modelo de embeddings."""
+
+import os
+import resource
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.rag import embeddings
+
+
+@pytest.mark.parametrize("platform,ru_maxrss", [("darwin", 512 * 1024 * 1024), ("linux", 512 * 1024)])
+def test_peak_rss_is_in_megabytes_on_every_platform(platform, ru_maxrss, monkeypatch):
+    monkeypatch.setattr(embeddings.sys, "platform", platform)
+    monkeypatch.setattr(resource, "getrusage", lambda who: SimpleNamespace(ru_maxrss=ru_maxrss))
+    assert embeddings._peak_rss_mb() == 512.0
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="requiere /proc")
+def test_current_rss_is_at_most_the_peak():
+    current = embeddings._current_rss_mb()
+    assert 0 < current <= embeddings._peak_rss_mb() + 1
@@ -0,0 +1,72 @@
+"""Tests del memo del Feedback Agent a lo largo de varios mensajes de una sesión."""
+
+import contextvars
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.service_manager import (
+    initialize_session_services,
+    get_service,
+    get_session_services,
+    restore_session_services
+)
+from final.nodes import _feedback_agent_request, _feedback_agent_result
+
+
+def _answer_questions(count: int):
+    service = get_service()
+    for i in range(count):
+        question_id = service.store_question(f"Pregunta {i}", ["A", "B", "C", "D"], "A")
+        service.store_user_answer(question_id, "A", True)
+
+
+def _start_session() -> dict:
+    """Como ChainlitHandler.init_session: servicios creados en su propio contexto."""
+    context = contextvars.copy_context()
+    context.run(initialize_session_services)
+    return context.run(get_session_services)
+
+
+def _on_message(session: dict, turn):
+    """Como ChainlitHandler.process_message: cada mensaje corre en un contexto nuevo."""
+    def run():
+        restore_session_services(session)
+        return turn()
+    return contextvars.Context().run(run)
+
+
+def test_second_turn_reuses_memo():
+    session = _start_session()
+
+    def first_turn():
+        _answer_questions(3)
+        mode, _, version = _feedback_agent_request()
+        assert mode == "full"
+        _feedback_agent_result("Análisis inicial", version)
+
+    _on_message(session, first_turn)
+    mode, payload, _ = _on_message(session, _feedback_agent_request)
+
+    assert mode == "done"
+    assert payload["user_feedback"] == "Análisis inicial"
+
+
+def test_one_new_answer_updates_memo():
+    session = _start_session()
+
+    def first_turn():
+        _answer_questions(3)
+        _, _, version = _feedback_agent_request()
+        _feedback_agent_result("Análisis inicial", version)
+
+    def second_turn():
+        _answer_questions(1)
+        return _feedback_agent_request()
+
+    _on_message(session, first_turn)
+    mode, payload, _ = _on_message(session, second_turn)
+
+    assert mode == "update"
+    assert "Análisis inicial" in payload[-1].content
@@ -0,0 +1,70 @@
+"""Tests de la re-indexación incremental de ContentIndexer."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.rag.indexer import ContentIndexer
+
+
+def _paragraphs(words):
+    return "\n\n".join(f"Tema {word}: definición y ejemplos de {word} en clase." for word in words)
+
+
+def test_sync_adds_only_new_chunks(vector_store, tmp_path):
+    path = tmp_path / "curso.txt"
+    path.write_text(_paragraphs(["grafos", "árboles", "pilas", "colas"]), encoding='utf-8')
+    indexer = ContentIndexer(vector_store)
+
+    first = indexer.sync_files([str(path)], chunk_size=10, overlap=0)[str(path)]
+    assert first["added"] > 0
+    assert first["removed"] == first["unchanged"] == 0
+    original_ids = set(vector_store.get_ids(where={"source": str(path)}))
+
+    # Un párrafo nuevo al final: los chunks anteriores se conservan
+    path.write_text(_paragraphs(["grafos", "árboles", "pilas", "colas", "hashing"]), encoding='utf-8')
+    second = indexer.sync_files([str(path)], chunk_size=10, overlap=0)[str(path)]
+
+    assert second["added"] == 1
+    assert second["removed"] == 0
+    assert second["unchanged"] == first["added"]
+    assert original_ids < set(vector_store.get_ids(where={"source": str(path)}))
+
+
+def test_sync_removes_changed_chunks(vector_store, tmp_path):
+    path = tmp_path / "curso.txt"
+    path.write_text(_paragraphs(["grafos", "árboles", "pilas"]), encoding='utf-8')
+    indexer = ContentIndexer(vector_store)
+    indexer.sync_files([str(path)], chunk_size=10, overlap=0)
+
+    path.write_text(_paragraphs(["grafos", "montículos", "pilas"]), encoding='utf-8')
+    result = indexer.sync_files([str(path)], chunk_size=10, overlap=0)[str(path)]
+
+    assert result == {"added": 1, "removed": 1, "unchanged": 2}
+    assert len(vector_store.get_ids(where={"source": str(path)})) == 3
+
+
+def test_sync_unchanged_file_is_a_no_op(vector_store, tmp_path):
+    path = tmp_path / "curso.txt"
+    path.write_text(_paragraphs(["grafos", "árboles"]), encoding='utf-8')
+    indexer = ContentIndexer(vector_store)
+    added = indexer.sync_files([str(path)], chunk_size=10, overlap=0)[str(path)]["added"]
+
+    result = ContentIndexer(vector_store).sync_files([str(path)], chunk_size=10, overlap=0)
+
+    assert result[str(path)] == {"added": 0, "removed": 0, "unchanged": added}
+
+
+def test_sync_removes_files_no_longer_listed(vector_store, tmp_path):
+    kept, removed = tmp_path / "a.txt", tmp_path / "b.txt"
+    kept.write_text(_paragraphs(["grafos"]), encoding='utf-8')
+    removed.write_text(_paragraphs(["pilas", "colas"]), encoding='utf-8')
+    indexer = ContentIndexer(vector_store)
+    indexer.sync_files([str(kept), str(removed)], chunk_size=10, overlap=0)
+
+    result = indexer.sync_files([str(kept)], chunk_size=10, overlap=0)
+
+    assert result[str(removed)] == {"added": 0, "removed": 2, "unchanged": 0}
+    assert vector_store.get_ids(where={"source": str(removed)}) == []
+    assert len(vector_store.get_ids(where={"source": str(kept)})) == 1
@@ -0,0 +1,65 @@
+"""Tests del índice BM25."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.rag.lexical_index import BM25Index, tokenize
+
+CORPUS = {
+    "tcp": "El protocolo TCP garantiza la entrega ordenada de segmentos",
+    "udp": "UDP envía datagramas sin garantía de entrega",
+    "dns": "DNS traduce nombres de dominio a direcciones IP",
+    "tcp-udp": "Comparación entre TCP y UDP: TCP usa conexión, UDP no. TCP TCP",
+}
+
+
+def _index() -> BM25Index:
+    index = BM25Index()
+    index.add(list(CORPUS), list(CORPUS.values()))
+    return index
+
+
+def test_tokenize_strips_accents_and_stopwords():
+    assert tokenize("La Búsqueda de código") == ["busqueda", "codigo"]
+
+
+def test_search_ranks_by_term_frequency_and_rarity():
+    results = _index().search("TCP", n_results=10)
+
+    assert [doc_id for doc_id, _ in results] == ["tcp-udp", "tcp"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_rare_term_outweighs_common_term():
+    # "dominio" aparece en un solo documento; "entrega" en dos
+    results = _index().search("entrega dominio", n_results=1)
+    assert results[0][0] == "dns"
+
+
+def test_search_without_matches_is_empty():
+    assert _index().search("kubernetes") == []
+    assert BM25Index().search("TCP") == []
+
+
+def test_remove_and_replace_documents():
+    index = _index()
+    index.remove(["tcp-udp"])
+    assert [doc_id for doc_id, _ in index.search("TCP")] == ["tcp"]
+
+    index.add(["tcp"], ["DNS sobre UDP"])
+    assert index.search("TCP") == []
+    assert len(index) == 3
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = _index()
+    index.collection_id = "coleccion"
+    path = str(tmp_path / "lexical_index.pkl")
+    index.save(path)
+
+    loaded = BM25Index.load(path, collection_id="coleccion")
+    assert loaded.search("UDP datagramas") == index.search("UDP datagramas")
+    assert BM25Index.load(path, collection_id="otra") is None
+    assert BM25Index.load(str(tmp_path / "no_existe.pkl")) is None
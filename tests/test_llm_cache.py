@@ -0,0 +1,82 @@
+"""Tests de la cache de respuestas del LLM (record / replay)."""
+
+import uuid
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from final.llm_cache import LLMCacheMiss, LLMResponseCache
+
+
+def _model(cache, responses=()):
+    return GenericFakeChatModel(messages=iter(responses), cache=cache)
+
+
+def _prompt(question_id: str):
+    return [HumanMessage(content=f"Evalúa la respuesta a la pregunta {question_id}")]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite3")
+
+
+def _record(cache_path, question_id):
+    model = _model(LLMResponseCache(cache_path, mode="record"), [
+        AIMessage(content=f"Primera muestra para {question_id}"),
+        AIMessage(content=f"Segunda muestra para {question_id}"),
+    ])
+    return [model.invoke(_prompt(question_id)).content for _ in range(2)]
+
+
+def test_record_keeps_one_response_per_repetition(cache_path):
+    question_id = str(uuid.uuid4())
+    assert _record(cache_path, question_id) == [
+        f"Primera muestra para {question_id}",
+        f"Segunda muestra para {question_id}",
+    ]
+
+    stats = LLMResponseCache(cache_path, mode="record").get_stats()
+    assert stats["size"] == 2
+
+
+def test_replay_rewrites_ids_and_keeps_order(cache_path):
+    _record(cache_path, str(uuid.uuid4()))
+
+    # Otra corrida: el ID de la pregunta es distinto, las respuestas siguen el orden grabado
+    question_id = str(uuid.uuid4())
+    cache = LLMResponseCache(cache_path, mode="replay")
+    model = _model(cache)
+    first = model.invoke(_prompt(question_id))
+    second = model.invoke(_prompt(question_id))
+
+    assert first.content == f"Primera muestra para {question_id}"
+    assert second.content == f"Segunda muestra para {question_id}"
+    # No se reproduce el ID de la corrida grabada (add_messages de LangGraph asigna uno nuevo)
+    assert first.id is None and second.id is None
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_replay_miss_raises(cache_path):
+    _record(cache_path, str(uuid.uuid4()))
+    model = _model(LLMResponseCache(cache_path, mode="replay"))
+
+    with pytest.raises(LLMCacheMiss):
+        model.invoke([HumanMessage(content="Un prompt que nunca se grabó")])
+
+    # Una tercera repetición del prompt grabado tampoco tiene respuesta
+    question_id = str(uuid.uuid4())
+    model.invoke(_prompt(question_id))
+    model.invoke(_prompt(question_id))
+    with pytest.raises(LLMCacheMiss):
+        model.invoke(_prompt(question_id))
+
+
+def test_namespaces_do_not_share_responses(cache_path):
+    question_id = str(uuid.uuid4())
+    _record(cache_path, question_id)
+
+    model = _model(LLMResponseCache(cache_path, mode="replay", namespace="seed1"))
+    with pytest.raises(LLMCacheMiss):
+        model.invoke(_prompt(question_id))
@@ -0,0 +1,75 @@
+"""Tests del pipeline de ingesta en streaming."""
+
+import os
+
+from final.rag.indexer import ContentIndexer
+from final.rag.pipeline import IngestionPipeline
+
+
+def _write(path, paragraphs: int, word: str):
+    text = "\n\n".join(f"Párrafo {i} sobre {word} número {i}. " * 5 for i in range(paragraphs))
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def _pipeline(vector_store, **kwargs) -> IngestionPipeline:
+    return IngestionPipeline(ContentIndexer(vector_store), workers=1, **kwargs)
+
+
+def test_unchanged_files_are_not_read(vector_store, tmp_path, monkeypatch):
+    first = _write(tmp_path / "a.txt", 20, "redes")
+    second = _write(tmp_path / "b.txt", 20, "grafos")
+    stats = _pipeline(vector_store).run([first, second], chunk_size=40, overlap=5)
+    assert stats["chunks_embedded"] > 0
+
+    # Con mtime y tamaño iguales no se abre ningún archivo
+    monkeypatch.setattr("final.rag.pipeline.read_and_chunk_file", None)
+    stats = _pipeline(vector_store).run([first, second], chunk_size=40, overlap=5)
+    assert stats["files_unchanged"] == 2
+    assert stats["chunks_embedded"] == 0
+
+
+def test_same_content_with_new_mtime_is_not_embedded(vector_store, tmp_path):
+    path = _write(tmp_path / "a.txt", 20, "redes")
+    _pipeline(vector_store).run([path], chunk_size=40, overlap=5)
+
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    stats = _pipeline(vector_store).run([path], chunk_size=40, overlap=5)
+    assert stats["files_unchanged"] == 1
+    assert stats["chunks_embedded"] == 0
+
+
+def test_removed_files_are_deleted(vector_store, tmp_path):
+    kept = _write(tmp_path / "a.txt", 20, "redes")
+    removed = _write(tmp_path / "b.txt", 20, "grafos")
+    indexer = ContentIndexer(vector_store)
+    IngestionPipeline(indexer, workers=1).run([kept, removed], chunk_size=40, overlap=5)
+    removed_ids = vector_store.get_ids(where={"source": removed})
+    assert removed_ids
+
+    stats = IngestionPipeline(indexer, workers=1).run([kept], chunk_size=40, overlap=5)
+
+    assert stats["files_removed"] == 1
+    assert stats["chunks_removed"] == len(removed_ids)
+    assert vector_store.get_ids(where={"source": removed}) == []
+    assert removed not in indexer._load_manifest()["files"]
+
+
+def test_writes_join_embedding_batches(vector_store, tmp_path, monkeypatch):
+    path = _write(tmp_path / "a.txt", 60, "redes")
+    writes = []
+    upsert = vector_store.upsert_embeddings
+
+    def record_write(texts, metadatas, ids, embeddings):
+        writes.append(len(ids))
+        upsert(texts, metadatas, ids, embeddings)
+
+    monkeypatch.setattr(vector_store, "upsert_embeddings", record_write)
+    stats = _pipeline(vector_store, embed_batch_size=4, write_batch_size=10).run(
+        [path], chunk_size=20, overlap=2
+    )
+
+    assert sum(writes) == stats["chunks_embedded"] == len(vector_store.get_ids(where={"source": path}))
+    assert all(size == 10 for size in writes[:-1])
+    assert 0 < writes[-1] <= 10
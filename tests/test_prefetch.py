@@ -0,0 +1,140 @@
+"""Tests del enrutamiento de solicitudes y de la cola de preguntas pre-generadas."""
+
+import asyncio
+import contextvars
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.prefetch import QuestionPrefetcher
+from final.routing import route_request
+from services.service_manager import initialize_session_services
+
+
+class _ApprovingWorkflow:
+    def __init__(self, question_type_decision: str = "mcq"):
+        self.question_type_decision = question_type_decision
+
+    async def ainvoke(self, state):
+        return {
+            "question_approved": True,
+            "current_question": "¿Qué es un grafo?",
+            "question_type_decision": self.question_type_decision
+        }
+
+
+@pytest.mark.parametrize("text,route", [
+    ("nueva pregunta", "mcq"),
+    ("quiero practicar", "mcq"),
+    ("ver mi rendimiento", "performance"),
+    ("dame una pregunta sobre mi puntaje", "mcq"),
+])
+def test_route_request(text, route, monkeypatch):
+    monkeypatch.delenv("USE_OPEN_ENDED_QUESTIONS", raising=False)
+    assert route_request(text, 90.0) == route
+
+
+def test_open_ended_route_above_threshold(monkeypatch):
+    monkeypatch.setenv("USE_OPEN_ENDED_QUESTIONS", "true")
+    monkeypatch.setenv("OPEN_ENDED_THRESHOLD", "70")
+    assert route_request("nueva pregunta", 80.0) == "open"
+    assert route_request("nueva pregunta", 50.0) == "mcq"
+
+
+def _serve_all(texts):
+    """Llena la cola con una pregunta y la pide con cada texto, en orden."""
+    async def run():
+        initialize_session_services()
+        prefetcher = QuestionPrefetcher(_ApprovingWorkflow(), target_size=1)
+        await prefetcher._fill()
+        served = [prefetcher.serve(text) for text in texts]
+        await prefetcher.close()
+        return served, prefetcher.stats
+
+    return contextvars.Context().run(asyncio.run, run())
+
+
+def test_only_mcq_requests_consume_the_queue(monkeypatch):
+    monkeypatch.delenv("USE_OPEN_ENDED_QUESTIONS", raising=False)
+    served, stats = _serve_all(["rendimiento", "nueva pregunta"])
+
+    assert served[0] is None
+    assert served[1]["current_question"] == "¿Qué es un grafo?"
+    assert stats["served"] == 1
+    assert stats["misses"] == 0
+
+
+def test_open_ended_requests_do_not_consume_the_queue(monkeypatch):
+    monkeypatch.setenv("USE_OPEN_ENDED_QUESTIONS", "true")
+    monkeypatch.setenv("OPEN_ENDED_THRESHOLD", "0")
+    served, stats = _serve_all(["nueva pregunta"])
+
+    assert served == [None]
+    assert stats["served"] == 0
+
+
+def _in_session(scenario, workflow=None):
+    """Corre scenario(prefetcher, performance) con el rendimiento controlado por el test."""
+    async def run():
+        initialize_session_services()
+        prefetcher = QuestionPrefetcher(workflow or _ApprovingWorkflow(), target_size=1)
+        performance = [0.0]
+        prefetcher._current_performance = lambda: performance[0]
+        try:
+            return await scenario(prefetcher, performance)
+        finally:
+            await prefetcher.close()
+
+    return contextvars.Context().run(asyncio.run, run())
+
+
+def _open_ended_from(threshold: str, monkeypatch):
+    monkeypatch.setenv("USE_OPEN_ENDED_QUESTIONS", "true")
+    monkeypatch.setenv("OPEN_ENDED_THRESHOLD", threshold)
+
+
+def test_crossing_the_threshold_discards_queued_mcq(monkeypatch):
+    _open_ended_from("70", monkeypatch)
+
+    async def scenario(prefetcher, performance):
+        performance[0] = 68.0
+        await prefetcher._fill()
+        assert len(prefetcher) == 1
+
+        # +3 puntos no supera shift_threshold, pero el orquestador ya elige preguntas abiertas
+        performance[0] = 71.0
+        prefetcher.on_performance_change()
+        return len(prefetcher), prefetcher.stats
+
+    remaining, stats = _in_session(scenario)
+    assert remaining == 0
+    assert stats["invalidated"] == 1
+
+
+def test_open_question_is_never_served_to_mcq_request(monkeypatch):
+    _open_ended_from("70", monkeypatch)
+
+    async def scenario(prefetcher, performance):
+        # El rendimiento bajó del umbral mientras el orquestador creaba una pregunta abierta
+        performance[0] = 69.0
+        await prefetcher._fill()
+        return prefetcher.serve("nueva pregunta"), prefetcher.stats
+
+    served, stats = _in_session(scenario, _ApprovingWorkflow("open"))
+    assert served is None
+    assert stats["served"] == 0
+    assert stats["invalidated"] >= 1
+
+
+def test_no_prefetch_above_open_ended_threshold(monkeypatch):
+    _open_ended_from("70", monkeypatch)
+
+    async def scenario(prefetcher, performance):
+        performance[0] = 80.0
+        await prefetcher._fill()
+        return len(prefetcher), prefetcher.stats["generated"]
+
+    assert _in_session(scenario) == (0, 0)
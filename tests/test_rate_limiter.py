@@ -0,0 +1,91 @@
+"""Tests del back-off del limitador adaptativo ante 429."""
+
+import os
+import sys
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from final.rate_limiter import (
+    AdaptiveRateLimiter,
+    parse_reset_duration,
+    parse_retry_after,
+    rate_limit_event_hooks
+)
+
+
+def test_retry_after_blocks_all_callers():
+    limiter = AdaptiveRateLimiter("openai")
+    assert limiter.acquire(blocking=False)
+
+    assert limiter.record_rate_limited(retry_after=30.0) == 30.0
+    assert not limiter.acquire(blocking=False)
+    assert limiter.get_stats()["rate_limited"] == 1
+
+
+def test_backoff_without_retry_after_doubles_with_jitter():
+    limiter = AdaptiveRateLimiter("openai", max_backoff=10.0)
+
+    for attempt in range(1, 6):
+        backoff = min(10.0, 2.0 ** attempt)
+        assert backoff / 2 <= limiter.record_rate_limited() <= backoff
+
+
+def test_success_resets_backoff():
+    limiter = AdaptiveRateLimiter("openai", max_backoff=60.0)
+    for _ in range(4):
+        limiter.record_rate_limited()
+
+    limiter.record_success()
+    assert limiter.record_rate_limited() <= 2.0
+
+
+def test_shorter_block_does_not_shorten_longer_one():
+    limiter = AdaptiveRateLimiter("openai", jitter=0.0)
+    limiter.record_rate_limited(retry_after=0.0)
+    assert limiter.acquire(blocking=False)
+
+    limiter.record_rate_limited(retry_after=30.0)
+    limiter.record_rate_limited(retry_after=0.0)
+    assert not limiter.acquire(blocking=False)
+
+
+@pytest.mark.parametrize("headers,expected", [
+    ({"retry-after": "12"}, 12.0),
+    ({"retry-after-ms": "1500", "retry-after": "12"}, 1.5),
+    ({"retry-after": "-3"}, 0.0),
+    ({"retry-after": "pronto"}, None),
+    ({}, None),
+])
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_http_date():
+    seconds = parse_retry_after({"retry-after": formatdate(time.time() + 120, usegmt=True)})
+    assert 110 <= seconds <= 120
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("6m0s", 360.0),
+    ("1.5s", 1.5),
+    ("20ms", 0.02),
+    ("12", 12.0),
+])
+def test_parse_reset_duration(value, expected):
+    assert parse_reset_duration(value) == pytest.approx(expected)
+
+
+def test_429_response_applies_retry_after():
+    limiter = AdaptiveRateLimiter("openai", jitter=0.0)
+    on_response = rate_limit_event_hooks(limiter)["response"][0]
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions", content=b"{}")
+
+    on_response(httpx.Response(429, headers={"retry-after": "5"}, request=request))
+    stats = limiter.get_stats()
+    assert stats["rate_limited"] == 1
+    assert not limiter.acquire(blocking=False)
@@ -0,0 +1,122 @@
+"""Tests del ContentRetriever sobre un índice pequeño."""
+
+import numpy as np
+import pytest
+
+from final.rag.retriever import (
+    DEFAULT_MAX_CONTEXT_TOKENS,
+    DEFAULT_MIN_SIMILARITY,
+    ContentRetriever,
+    maximal_marginal_relevance
+)
+
+CORPUS = {
+    "redes": "redes neuronales profundas con capas ocultas",
+    "grafos": "grafos dirigidos y caminos mínimos",
+    "ordenamiento": "algoritmos de ordenamiento por mezcla",
+}
+
+
+@pytest.fixture
+def indexed_store(vector_store):
+    ids = list(CORPUS)
+    vector_store.upsert_documents(
+        [CORPUS[doc_id] for doc_id in ids],
+        [{"source": "curso.txt", "chunk_index": i} for i in range(len(ids))],
+        ids
+    )
+    return vector_store
+
+
+def test_default_min_similarity_drops_unrelated_chunks(indexed_store):
+    retriever = ContentRetriever(indexed_store, mode="vector")
+    assert retriever.min_similarity == DEFAULT_MIN_SIMILARITY > 0
+    assert [chunk.id for chunk in retriever.retrieve("redes neuronales", n_results=3).chunks] == ["redes"]
+    # 0.0 desactiva el filtro
+    assert len(retriever.retrieve("redes neuronales", n_results=3, min_similarity=0.0).chunks) == 3
+
+
+def test_default_token_budget_limits_context(vector_store):
+    text = " ".join(["grafos"] * 2000)
+    vector_store.upsert_documents([text], [{"source": "curso.txt", "chunk_index": 0}], ["largo"])
+
+    result = ContentRetriever(vector_store, mode="vector").retrieve("grafos", n_results=1)
+    assert result.total_tokens <= DEFAULT_MAX_CONTEXT_TOKENS
+    assert len(result.chunks[0].text) < len(text)
+
+
+def test_min_similarity_filters_low_scores(indexed_store):
+    retriever = ContentRetriever(indexed_store, mode="vector")
+    result = retriever.retrieve("redes neuronales", n_results=3, min_similarity=0.5)
+    assert [chunk.id for chunk in result.chunks] == ["redes"]
+    assert all(chunk.score >= 0.5 for chunk in result.chunks)
+
+
+def test_min_similarity_configured_on_retriever(indexed_store):
+    retriever = ContentRetriever(indexed_store, mode="hybrid", min_similarity=0.5)
+    assert [chunk.id for chunk in retriever.retrieve("redes neuronales", n_results=3).chunks] == ["redes"]
+    # El argumento explícito tiene prioridad sobre el del retriever
+    assert len(retriever.retrieve("redes neuronales", n_results=3, min_similarity=0.0).chunks) == 3
+
+
+def _normalized(vectors):
+    vectors = np.array(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+# Dos candidatos casi duplicados y muy relevantes, y uno distinto y menos relevante
+MMR_EMBEDDINGS = _normalized([[1.0, 0.0], [0.99, 0.14], [0.0, 1.0]])
+MMR_RELEVANCE = np.array([0.9, 0.89, 0.5], dtype=np.float32)
+
+
+def test_mmr_prefers_diverse_candidate_over_near_duplicate():
+    assert maximal_marginal_relevance(MMR_RELEVANCE, MMR_EMBEDDINGS, k=3, lambda_mult=0.5) == [0, 2, 1]
+
+
+def test_mmr_with_lambda_one_is_relevance_order():
+    assert maximal_marginal_relevance(MMR_RELEVANCE, MMR_EMBEDDINGS, k=3, lambda_mult=1.0) == [0, 1, 2]
+
+
+def test_mmr_initial_redundancy_penalizes_covered_content():
+    covered = MMR_EMBEDDINGS @ MMR_EMBEDDINGS[0]
+    selected = maximal_marginal_relevance(
+        MMR_RELEVANCE, MMR_EMBEDDINGS, k=2, lambda_mult=0.5, initial_redundancy=covered
+    )
+    assert selected[0] == 2
+
+
+def test_mmr_k_is_capped_by_candidates():
+    assert maximal_marginal_relevance(MMR_RELEVANCE, MMR_EMBEDDINGS, k=10) == [0, 2, 1]
+    assert maximal_marginal_relevance(MMR_RELEVANCE, MMR_EMBEDDINGS, k=0) == []
+
+
+def test_spans_are_read_only_for_returned_chunks(vector_store):
+    ids = [f"grafos-{i}" for i in range(30)]
+    vector_store.upsert_documents(
+        [f"grafos dirigidos ejemplo {i}" for i in range(30)],
+        [{"source": "curso.txt", "chunk_index": i} for i in range(30)],
+        ids
+    )
+    retriever = ContentRetriever(vector_store, mode="hybrid", min_similarity=0.0)
+    reads = []
+    read_span = retriever.span_reader.read_span
+    retriever.span_reader.read_span = lambda metadata: reads.append(metadata) or read_span(metadata)
+
+    result = retriever.retrieve("grafos dirigidos", n_results=3)
+
+    assert len(result.chunks) == 3
+    assert len(reads) == 3
+
+
+def test_lexical_index_written_by_another_process_is_reloaded(vector_store):
+    from final.rag.vector_store import ChromaVectorStore
+
+    retriever = ContentRetriever(vector_store, mode="lexical", min_similarity=0.0)
+    assert retriever.retrieve("dijkstra", n_results=3).chunks == []
+
+    # Otra instancia (p. ej. index_content.py --incremental) indexa y guarda el índice léxico
+    other = ChromaVectorStore(persist_directory=vector_store.persist_directory)
+    other.upsert_documents(["algoritmo de Dijkstra"], [{"source": "curso.txt", "chunk_index": 0}], ["dijkstra"])
+    other.save_lexical_index()
+
+    assert [chunk.id for chunk in retriever.retrieve("dijkstra", n_results=3).chunks] == ["dijkstra"]
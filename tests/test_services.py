@@ -0,0 +1,82 @@
+"""Tests de los agregados de rendimiento de los servicios."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.service import MCQService, OpenEndedService
+from services.storage import create_storage
+
+
+def _answer(service: MCQService, is_correct: bool):
+    question_id = service.store_question("¿Pregunta?", ["A", "B", "C", "D"], "A")
+    service.store_user_answer(question_id, "A" if is_correct else "B", is_correct)
+
+
+def test_aggregates_shared_between_instances(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "sessions.sqlite3"))
+    first = MCQService(create_storage("mcq", "u1"))
+    second = MCQService(create_storage("mcq", "u1"))
+
+    _answer(first, True)
+    _answer(second, False)
+
+    for service in (first, second):
+        score = service.compute_user_score()
+        assert score['total_questions'] == 2
+        assert score['correct_count'] == 1
+        assert [p['is_correct'] for p in score['recent_performance']] == [True, False]
+    assert first.history_version == second.history_version == 2
+
+    # Una escritura propia después de una ajena también recalcula
+    _answer(first, True)
+    assert first.compute_user_score()['total_questions'] == 3
+    assert second.compute_user_score()['correct_count'] == 2
+
+
+def test_open_aggregates_shared_between_instances(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "sessions.sqlite3"))
+    first = OpenEndedService(create_storage("open", "u1"))
+    second = OpenEndedService(create_storage("open", "u1"))
+
+    for service, score in ((first, 8.0), (second, 4.0)):
+        question_id = service.store_question("¿Pregunta?", "criterio", ["concepto"], "medium")
+        service.store_evaluation(question_id, "respuesta", score, "ok", score >= 6, [], [])
+
+    for service in (first, second):
+        data = service.compute_user_score()
+        assert data['total_questions'] == 2
+        assert data['avg_score'] == 6.0
+        assert data['passing_count'] == 1
+
+
+def test_replaced_answer_counts_once():
+    service = MCQService()
+    question_id = service.store_question("¿Pregunta?", ["A", "B"], "A")
+    service.store_user_answer(question_id, "B", False)
+    service.store_user_answer(question_id, "A", True)
+
+    score = service.compute_user_score()
+    assert score['total_questions'] == 1
+    assert score['correct_count'] == 1
+    assert service.history_version == 2
+
+
+def test_limited_history_reads_only_latest_answers(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "sessions.sqlite3"))
+    service = MCQService(create_storage("mcq", "u1"))
+    for _ in range(3):
+        _answer(service, True)
+    _answer(service, False)
+
+    monkeypatch.setattr(service._storage, "all_answers", None)
+    monkeypatch.setattr(service._storage, "all_questions", None)
+    last = service.get_answer_history(limit=1)
+
+    assert len(last) == 1
+    assert last[0]['is_correct'] is False
+    assert last[0]['question'] == "¿Pregunta?"
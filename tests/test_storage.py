@@ -0,0 +1,132 @@
+"""Tests de ida y vuelta de los backends de almacenamiento."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.records import MCQAnswer, MCQQuestion, OpenEvaluation, OpenQuestion
+from services.storage import InMemoryStorage, SQLiteStorage
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_storage(request, tmp_path):
+    def make(kind: str, owner_id: str = "u1"):
+        if request.param == "memory":
+            return InMemoryStorage()
+        return SQLiteStorage(str(tmp_path / "sessions.sqlite3"), owner_id, kind)
+    return make
+
+
+def _questions(count: int):
+    return [
+        (f"q{i}", MCQQuestion(f"Pregunta {i}", ("A", "B", "C", "D"), "A", created_at=100.0 + i))
+        for i in range(count)
+    ]
+
+
+def test_mcq_round_trip(make_storage):
+    storage = make_storage("mcq")
+    questions = _questions(3)
+    storage.put_questions(questions)
+    storage.put_answer("q1", MCQAnswer("B", False, answered_at=200.0))
+
+    assert storage.get_question("q0") == questions[0][1]
+    assert storage.get_question("q9") is None
+    assert dict(storage.all_questions()) == dict(questions)
+    assert storage.get_answer("q1") == MCQAnswer("B", False, answered_at=200.0)
+    assert dict(storage.all_answers()) == {"q1": MCQAnswer("B", False, answered_at=200.0)}
+
+
+def test_open_round_trip_keeps_tuples(make_storage):
+    storage = make_storage("open")
+    question = OpenQuestion("¿Qué es TCP?", "criterio", ("conexión", "fiabilidad"), "medium", created_at=1.0)
+    evaluation = OpenEvaluation("respuesta", 7.5, "bien", True, ("claridad",), (), evaluated_at=2.0)
+    storage.put_question("q0", question)
+    storage.put_answer("q0", evaluation)
+
+    assert storage.get_question("q0") == question
+    assert storage.get_answer("q0") == evaluation
+    assert isinstance(storage.get_answer("q0").strengths, tuple)
+
+
+def test_recent_questions_in_insertion_order(make_storage):
+    storage = make_storage("mcq")
+    storage.put_questions(_questions(5))
+
+    assert storage.last_question_id() == "q4"
+    assert [question_id for question_id, _ in storage.recent_questions(2)] == ["q3", "q4"]
+    assert [question_id for question_id, _ in storage.recent_questions()] == ["q0", "q1", "q2", "q3", "q4"]
+    assert storage.recent_questions(0) == []
+
+
+def test_empty_storage(make_storage):
+    storage = make_storage("mcq")
+
+    assert storage.last_question_id() is None
+    assert storage.recent_questions() == []
+    assert dict(storage.all_answers()) == {}
+    assert storage.answers_version() == 0
+
+
+def test_answers_version_grows_with_each_write(make_storage):
+    storage = make_storage("mcq")
+    storage.put_questions(_questions(2))
+    versions = [storage.answers_version()]
+
+    storage.put_answer("q0", MCQAnswer("B", False, answered_at=1.0))
+    versions.append(storage.answers_version())
+    # Reemplazar una respuesta también cambia la versión
+    storage.put_answer("q0", MCQAnswer("A", True, answered_at=2.0))
+    versions.append(storage.answers_version())
+
+    assert versions[0] < versions[1] < versions[2]
+    assert len(storage.all_answers()) == 1
+
+
+def test_sqlite_separates_owners(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SQLiteStorage(path, "u1", "mcq")
+    second = SQLiteStorage(path, "u2", "mcq")
+    first.put_questions(_questions(2))
+
+    assert second.all_questions() == {}
+    assert second.last_question_id() is None
+    assert SQLiteStorage(path, "u1", "mcq").get_question("q1") == _questions(2)[1][1]
+
+
+def test_recent_answers_in_write_order(make_storage):
+    storage = make_storage("mcq")
+    storage.put_questions(_questions(3))
+    for i in range(3):
+        storage.put_answer(f"q{i}", MCQAnswer("A", True, answered_at=10.0 + i))
+    # Reemplazar una respuesta la pasa al final
+    storage.put_answer("q0", MCQAnswer("B", False, answered_at=20.0))
+
+    assert [question_id for question_id, _ in storage.recent_answers(2)] == ["q2", "q0"]
+    assert [question_id for question_id, _ in storage.recent_answers()] == ["q1", "q2", "q0"]
+    assert storage.recent_answers(1)[0][1] == MCQAnswer("B", False, answered_at=20.0)
+    assert storage.recent_answers(0) == []
+
+
+def test_replaced_question_keeps_its_position(make_storage):
+    storage = make_storage("mcq")
+    questions = _questions(2)
+    storage.put_questions(questions)
+    storage.put_question("q0", questions[0][1])
+
+    assert storage.last_question_id() == "q1"
+
+
+def test_sqlite_latest_lookups_use_the_owner_index(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "sessions.sqlite3"), "u1", "mcq")
+    for table in ("mcq_questions", "mcq_answers"):
+        plan = storage._db.execute(
+            f"EXPLAIN QUERY PLAN SELECT question_id, data FROM {table} WHERE owner_id = ? ORDER BY rowid DESC LIMIT 1",
+            ("u1",)
+        ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert f"idx_{table}_owner" in details
+        assert "TEMP B-TREE" not in details
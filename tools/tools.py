@@ -52,8 +52,8 @@ def check_multiple_choice_answer(question_id: str, user_answer: str) -> str:
         if not question_data:
             return f"Error: No se encontró pregunta con ID {question_id}"
         
-        correct_answer = question_data["correct_answer"]
-        options = question_data["options"]
+        correct_answer = question_data.correct_answer
+        options = question_data.options
         
         # Convertir respuesta de letra a texto si es necesario
         user_answer_text = user_answer
@@ -127,15 +127,11 @@ def list_multiple_choice_questions(limit: int = 20) -> str:
     """Lista las últimas preguntas registradas (sin revelar la respuesta correcta)"""
     try:
         mcq_service = get_service()
-        all_questions = mcq_service.get_all_questions()
-        items = list(all_questions.items())
-        items.sort(key=lambda kv: kv[1].get("created_at"))
-        if limit is not None:
-            items = items[-limit:]
+        items = mcq_service.get_recent_questions(limit)
         lines = []
         for qid, data in items:
-            question = data.get("question", "")
-            options = data.get("options", [])
+            question = data.question
+            options = data.options
             # Formatear sin revelar la correcta
             lines.append(f"ID: {qid}\nPregunta: {question}\nOpciones:\n" + "\n".join(
                 [f"{chr(65+i)}) {opt}" for i, opt in enumerate(options)]